@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .caching import (
+    aget_cached_user,
+    aset_cached_user,
+    get_cached_user,
+    set_cached_user,
+)
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with an awaitable `aauthenticate()` for async views.
+
+    Token parsing and validation are pure CPU work and stay synchronous;
+    only the user lookup goes through the async ORM, so no thread hop is
+    needed per request.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        """
+        The checks JWTAuthentication.get_user() runs once the user is loaded.
+        """
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+    async def afetch_user(self, user_id):
+        try:
+            return await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    async def aget_user(self, validated_token):
+        user = await self.afetch_user(self.get_user_id(validated_token))
+        return self.check_user(user, validated_token)
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+    Resolve the token's user from the cache (see caching.py) and only hit
+    the database on a miss. Both the sync and async paths share the cache.
+    Without AUTH_USER_CACHE['ENABLED'] every request loads the user.
+    """
+
+    def fetch_user(self, user_id):
+        try:
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    def get_user(self, validated_token):
+        if not settings.AUTH_USER_CACHE['ENABLED']:
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            user = self.fetch_user(user_id)
+            set_cached_user(user_id, user)
+
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        if not settings.AUTH_USER_CACHE['ENABLED']:
+            return await super().aget_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+
+        user = await aget_cached_user(user_id)
+        if user is None:
+            user = await self.afetch_user(user_id)
+            await aset_cached_user(user_id, user)
+
+        return self.check_user(user, validated_token)
@@ -0,0 +1,40 @@
+"""
+Cache of authenticated users for JWT requests, keyed by the token's user
+id claim (SIMPLE_JWT['USER_ID_FIELD']).
+
+CachedJWTAuthentication resolves the token's user id here before touching
+the database. Entries are dropped from signals whenever the user is saved
+(password change, deactivation, ...) or deleted, and expire after
+AUTH_USER_CACHE['TIMEOUT'] seconds as a backstop for queryset .update()s,
+which bypass signals.
+
+Signals only reach the cache of the process that saved the user, so the
+cache is used only when AUTH_USER_CACHE['ENABLED'] (by default, when the
+default cache is Redis and shared by all workers).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    return cache.get(user_cache_key(user_id))
+
+
+def set_cached_user(user_id, user):
+    cache.set(user_cache_key(user_id), user, settings.AUTH_USER_CACHE['TIMEOUT'])
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+async def aget_cached_user(user_id):
+    return await cache.aget(user_cache_key(user_id))
+
+
+async def aset_cached_user(user_id, user):
+    await cache.aset(user_cache_key(user_id), user, settings.AUTH_USER_CACHE['TIMEOUT'])
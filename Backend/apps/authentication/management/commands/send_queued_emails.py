@@ -0,0 +1,166 @@
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.authentication.models import EmailOutbox
+from apps.authentication.services import get_email_transport
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts, base, maximum):
+    """
+    Exponential backoff with +/-10% jitter so failed batches spread out.
+    """
+    delay = min(base * 2 ** max(attempts - 1, 0), maximum)
+    return delay * random.uniform(0.9, 1.1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued EmailOutbox messages in batches over one transport '
+        'connection, retrying failures with exponential backoff.'
+    )
+
+    def add_arguments(self, parser):
+        config = settings.EMAIL_OUTBOX
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send everything currently due, then exit',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=config['BATCH_SIZE'],
+            help='Messages claimed and sent per batch',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=config['POLL_INTERVAL'],
+            help='Seconds to wait when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        transport = get_email_transport()
+        transport.open()
+        logger.info(f"Email outbox worker started with {type(transport).__name__}")
+
+        sent = failed = 0
+        try:
+            while True:
+                messages = self.claim_batch(batch_size)
+                if not messages:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                batch_sent, batch_failed = self.deliver(transport, messages)
+                sent += batch_sent
+                failed += batch_failed
+        except KeyboardInterrupt:
+            pass
+        finally:
+            transport.close()
+
+        logger.info(f"Email outbox worker stopped: sent={sent} failed={failed}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent} email(s), {failed} attempt(s) failed"
+        ))
+
+    def claim_batch(self, batch_size):
+        """
+        Lease up to `batch_size` due messages to this worker.
+
+        Claimed rows get next_attempt_at pushed past the lease, so other
+        workers skip them, and come back on their own if this one dies.
+        """
+        now = timezone.now()
+        lease = timedelta(seconds=settings.EMAIL_OUTBOX['LEASE_SECONDS'])
+
+        expired = EmailOutbox.objects.filter(
+            status=EmailOutbox.STATUS_PENDING,
+            expires_at__lte=now
+        ).update(status=EmailOutbox.STATUS_FAILED, last_error='Expired before delivery')
+        if expired:
+            logger.warning(f"Dropped {expired} expired email(s) from the outbox")
+
+        with transaction.atomic():
+            ids = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=EmailOutbox.STATUS_PENDING,
+                    next_attempt_at__lte=now
+                )
+                .order_by('next_attempt_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            EmailOutbox.objects.filter(id__in=ids).update(
+                next_attempt_at=now + lease,
+                attempts=F('attempts') + 1
+            )
+
+        return list(EmailOutbox.objects.filter(id__in=ids).order_by('id'))
+
+    def deliver(self, transport, messages):
+        config = settings.EMAIL_OUTBOX
+
+        try:
+            errors = transport.send_messages(messages)
+        except Exception as e:
+            logger.exception('Email transport raised')
+            errors = [f"{type(e).__name__}: {e}"] * len(messages)
+
+        now = timezone.now()
+        sent = failed = 0
+        for message, error in zip(messages, errors):
+            if error is None:
+                message.status = EmailOutbox.STATUS_SENT
+                message.sent_at = now
+                message.last_error = ''
+                sent += 1
+                continue
+
+            failed += 1
+            message.last_error = error
+            delay = retry_delay(
+                message.attempts, config['BACKOFF_BASE'], config['BACKOFF_MAX']
+            )
+            retry_at = now + timedelta(seconds=delay)
+            if (
+                message.attempts >= config['MAX_ATTEMPTS'] or
+                (message.expires_at is not None and retry_at >= message.expires_at)
+            ):
+                message.status = EmailOutbox.STATUS_FAILED
+                logger.error(
+                    f"Giving up on email {message.id} to {message.to_email} "
+                    f"after {message.attempts} attempt(s): {error}"
+                )
+            else:
+                message.next_attempt_at = retry_at
+                logger.warning(
+                    f"Email {message.id} to {message.to_email} failed "
+                    f"(attempt {message.attempts}), retrying in {delay:.0f}s: {error}"
+                )
+
+        EmailOutbox.objects.bulk_update(
+            messages,
+            ['status', 'sent_at', 'last_error', 'next_attempt_at']
+        )
+        self.stdout.write(f"Batch: sent {sent}, failed {failed}")
+        return sent, failed
@@ -23,6 +23,8 @@ class User(AbstractUser):
         db_table = 'auth_user'
 
 class EmailVerificationCode(models.Model):
+    LIFETIME = timedelta(minutes=10)
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -41,7 +43,7 @@ class EmailVerificationCode(models.Model):
         if not self.code:
             self.code = self.generate_code()
         if not self.expires_at:
-            self.expires_at = timezone.now() + timedelta(minutes=10)
+            self.expires_at = timezone.now() + self.LIFETIME
         super().save(*args, **kwargs)
 
     def is_valid(self):
@@ -50,4 +52,76 @@ class EmailVerificationCode(models.Model):
         return True
     
     def __str__(self):
-        return f"{self.user.email} - {self.code}"
\ No newline at end of file
+        return f"{self.user.email} - {self.code}"
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email, queued by request handlers and delivered by the
+    `send_queued_emails` worker so requests never wait on the provider.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    to_name = models.CharField(max_length=150, blank=True)
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time the worker may (re)try; also used as a claim lease
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Not worth sending after this (e.g. the code in it has expired)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} ({self.status})"
+
+    @classmethod
+    def queue(cls, to_email, subject, text_body, html_body='', to_name='', expires_at=None):
+        return cls.objects.create(
+            to_email=to_email,
+            to_name=to_name,
+            subject=subject,
+            text_body=text_body,
+            html_body=html_body,
+            expires_at=expires_at,
+        )
+
+
+class ThrottleCounter(models.Model):
+    """
+    Request counter for one throttle window, shared by all workers.
+    Used by throttling.DatabaseCounterStore when no Redis is configured.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'throttle_counters'
+
+    def __str__(self):
+        return f"{self.key} = {self.count}"
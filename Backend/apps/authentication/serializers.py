@@ -47,3 +47,6 @@ class EmailVerificationCodeSerializer(serializers.Serializer):
         if not all(char in chars for char in value):
             raise serializers.ValidationError("Invalid verification code format.")
         return value
+
+class ResendVerificationSerializer(serializers.Serializer):
+    email = serializers.EmailField(required=True)
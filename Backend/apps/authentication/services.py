@@ -1,67 +1,180 @@
-from mailjet_rest import Client
+import json
+import sys
+
 from django.conf import settings
-import os
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import EmailOutbox, EmailVerificationCode
+
 
 class EmailService:
     def __init__(self):
-        self.api_key = settings.MAILJET_API_KEY
-        self.api_secret = settings.MAILJET_API_SECRET
-        self.client = Client(auth=(self.api_key, self.api_secret), version='v3.1')
-        self.sender_email = "theshahidkhan.2004@gmail.com"
-        self.sender_name = "TOC Simulator"
+        config = settings.EMAIL_OUTBOX
+        self.sender_email = config['SENDER_EMAIL']
+        self.sender_name = config['SENDER_NAME']
 
-    def send_verification_email(self, user_email, user_name, verification_code):
+    def queue_verification_email(self, user_email, user_name, verification_code, expires_at=None):
         """
-        Send verification code to user.
-        
+        Queue the verification code email for the outbox worker.
+
         Args:
             user_email (str): Recipient email
             user_name (str): User's first name for personalization
             verification_code (str): 6-digit code
-            
+            expires_at (datetime): When the code expires; the email is
+                dropped instead of sent after that
+
         Returns:
-            bool: True if sent successfully
+            EmailOutbox: The queued message
         """
+        minutes = int(EmailVerificationCode.LIFETIME.total_seconds() // 60)
+        return EmailOutbox.queue(
+            to_email=user_email,
+            to_name=user_name,
+            subject="Verify Your Email - TOC Simulator",
+            text_body=f"Your verification code is: {verification_code}",
+            html_body=f"""
+                <h3>Welcome to TOC Simulator, {user_name}!</h3>
+                <p>Your verification code is:</p>
+                <h1 style="letter-spacing: 5px; color: #4F46E5;">{verification_code}</h1>
+                <p>This code will expire in {minutes} minutes.</p>
+                <p>If you didn't create an account, please ignore this email.</p>
+            """,
+            expires_at=expires_at
+        )
+
+
+# Transports
+class EmailTransport:
+    """
+    Delivers EmailOutbox messages. One instance is kept open for the life
+    of the worker so connections/clients are reused across batches.
+
+    `send_messages` returns a list with one entry per message: None if it
+    was delivered, otherwise an error string (the message is retried).
+    """
+
+    def __init__(self, sender_email, sender_name):
+        self.sender_email = sender_email
+        self.sender_name = sender_name
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        raise NotImplementedError
+
+
+class MailjetTransport(EmailTransport):
+    """
+    Mailjet Send API v3.1; a batch goes out in a single API call.
+    """
+
+    def open(self):
+        from mailjet_rest import Client
+
+        self.client = Client(
+            auth=(settings.MAILJET_API_KEY, settings.MAILJET_API_SECRET),
+            version='v3.1'
+        )
+
+    def payload(self, message):
         data = {
-            'Messages': [
+            "From": {
+                "Email": self.sender_email,
+                "Name": self.sender_name
+            },
+            "To": [
                 {
-                    "From": {
-                        "Email": self.sender_email,
-                        "Name": self.sender_name
-                    },
-                    "To": [
-                        {
-                            "Email": user_email,
-                            "Name": user_name
-                        }
-                    ],
-                    "Subject": "Verify Your Email - TOC Simulator",
-                    "TextPart": f"Your verification code is: {verification_code}",
-                    "HTMLPart": f"""
-                        <h3>Welcome to TOC Simulator, {user_name}!</h3>
-                        <p>Your verification code is:</p>
-                        <h1 style="letter-spacing: 5px; color: #4F46E5;">{verification_code}</h1>
-                        <p>This code will expire in 15 minutes.</p>
-                        <p>If you didn't create an account, please ignore this email.</p>
-                    """
+                    "Email": message.to_email,
+                    "Name": message.to_name
                 }
-            ]
+            ],
+            "Subject": message.subject,
+            "TextPart": message.text_body,
         }
-        
+        if message.html_body:
+            data["HTMLPart"] = message.html_body
+        return data
+
+    def send_messages(self, messages):
         try:
-            result = self.client.send.create(data=data)
-            print(f"📧 Mailjet Response Status: {result.status_code}")
-            print(f"📧 Mailjet Response: {result.json()}")
-            
-            if result.status_code == 200:
-                print(f"✅ Email sent successfully to {user_email}")
-                return True
-            else:
-                print(f"❌ Mailjet returned status {result.status_code}")
-                print(f"Response: {result.json()}")
-                return False
+            result = self.client.send.create(
+                data={'Messages': [self.payload(message) for message in messages]}
+            )
+            body = result.json()
         except Exception as e:
-            print(f"❌ Error sending email: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return False
\ No newline at end of file
+            return [f"Mailjet request failed: {e}"] * len(messages)
+
+        statuses = body.get('Messages') if isinstance(body, dict) else None
+        if not isinstance(statuses, list) or len(statuses) != len(messages):
+            return [f"Mailjet returned status {result.status_code}: {body}"] * len(messages)
+
+        return [
+            None if status.get('Status') == 'success'
+            else f"Mailjet error: {status.get('Errors')}"
+            for status in statuses
+        ]
+
+
+class ConsoleTransport(EmailTransport):
+    """
+    Local/test stand-in: writes messages to stdout instead of sending.
+    """
+    stream = None
+
+    def write(self, message):
+        stream = self.stream or sys.stdout
+        stream.write(
+            f"From: {self.sender_name} <{self.sender_email}>\n"
+            f"To: {message.to_name} <{message.to_email}>\n"
+            f"Subject: {message.subject}\n\n"
+            f"{message.text_body}\n"
+            f"{'-' * 79}\n"
+        )
+
+    def send_messages(self, messages):
+        for message in messages:
+            self.write(message)
+        stream = self.stream or sys.stdout
+        stream.flush()
+        return [None] * len(messages)
+
+
+class FileTransport(ConsoleTransport):
+    """
+    Local/test stand-in: appends messages as JSON lines to
+    EMAIL_OUTBOX['FILE_PATH'].
+    """
+
+    def open(self):
+        self.stream = open(settings.EMAIL_OUTBOX['FILE_PATH'], 'a', encoding='utf-8')
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def write(self, message):
+        self.stream.write(json.dumps({
+            'id': message.id,
+            'from': self.sender_email,
+            'to': message.to_email,
+            'subject': message.subject,
+            'text': message.text_body,
+            'html': message.html_body,
+            'sent_at': timezone.now().isoformat(),
+        }) + '\n')
+
+
+def get_email_transport():
+    """
+    Instantiate the transport named by EMAIL_OUTBOX['TRANSPORT'].
+    """
+    config = settings.EMAIL_OUTBOX
+    transport_class = import_string(config['TRANSPORT'])
+    return transport_class(config['SENDER_EMAIL'], config['SENDER_NAME'])
@@ -1,3 +1,201 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication
+from .caching import get_cached_user, set_cached_user
+from .models import EmailOutbox, ThrottleCounter
+from .services import EmailService, EmailTransport
+from .throttling import SlidingWindowAnonRateThrottle
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', username='user', password='pw', is_active=True
+        )
+        self.token = AccessToken.for_user(self.user)
+        self.auth = CachedJWTAuthentication()
+
+    def deactivate_elsewhere(self):
+        # A stale copy, as left in another worker's cache by a save there
+        set_cached_user(self.user.pk, get_user_model().objects.get(pk=self.user.pk))
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+    @override_settings(AUTH_USER_CACHE={'ENABLED': False, 'TIMEOUT': 60})
+    def test_disabled_cache_always_loads_the_user(self):
+        self.deactivate_elsewhere()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+    @override_settings(AUTH_USER_CACHE={'ENABLED': True, 'TIMEOUT': 60})
+    def test_enabled_cache_resolves_from_cache(self):
+        self.assertEqual(self.auth.get_user(self.token), self.user)
+        self.assertEqual(get_cached_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.auth.get_user(self.token)
+
+    @override_settings(AUTH_USER_CACHE={'ENABLED': True, 'TIMEOUT': 60})
+    def test_save_drops_the_cached_user(self):
+        self.auth.get_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+
+class SlidingWindowThrottleTests(TestCase):
+    RATE = '3/min'
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        self.request.user = AnonymousUser()
+
+    def allow(self, now):
+        throttle = SlidingWindowAnonRateThrottle()
+        throttle.rate = self.RATE
+        throttle.num_requests, throttle.duration = throttle.parse_rate(self.RATE)
+        throttle.timer = lambda: now
+        return throttle.allow_request(self.request, None), throttle
+
+    def check_sliding_window(self):
+        # Window [600, 660): three allowed, the rejected fourth still counts
+        self.assertEqual([self.allow(600 + i)[0] for i in range(4)], [True] * 3 + [False])
+
+        # Halfway into the next window the previous one weighs 4 * 0.5
+        self.assertTrue(self.allow(690)[0])
+        allowed, throttle = self.allow(690)
+        self.assertFalse(allowed)
+        # (4 * (30 - t) / 60 + 2 <= 3) after t = 15s
+        self.assertEqual(throttle.wait(), 15)
+
+        # Other clients have their own counters
+        self.request.META['REMOTE_ADDR'] = '10.0.0.2'
+        self.assertTrue(self.allow(690)[0])
+
+    @override_settings(THROTTLE={'STORE': 'cache', 'CACHE': 'default'})
+    def test_cache_store(self):
+        self.check_sliding_window()
+
+    @override_settings(THROTTLE={'STORE': 'database', 'CACHE': 'default'})
+    def test_database_store(self):
+        self.check_sliding_window()
+        self.assertEqual(ThrottleCounter.objects.count(), 3)
+
+    @override_settings(THROTTLE={'STORE': 'database', 'CACHE': 'default'})
+    def test_api_returns_429(self):
+        url = f'/simulations/sessions/{uuid.uuid4()}/shared/'
+        with mock.patch.object(SlidingWindowAnonRateThrottle, 'THROTTLE_RATES', {'anon': '2/min'}):
+            statuses = [APIClient().get(url).status_code for _ in range(3)]
+        self.assertEqual(statuses, [404, 404, 429])
+
+
+class RecordingTransport(EmailTransport):
+    """
+    Records every batch; `errors` maps a recipient to its delivery error.
+    """
+    batches = []
+    errors = {}
+    raises = None
+
+    def send_messages(self, messages):
+        if self.raises is not None:
+            raise self.raises
+        RecordingTransport.batches.append([message.to_email for message in messages])
+        return [self.errors.get(message.to_email) for message in messages]
+
+
+@override_settings(EMAIL_OUTBOX={
+    **settings.EMAIL_OUTBOX,
+    'TRANSPORT': 'apps.authentication.tests.RecordingTransport',
+    'MAX_ATTEMPTS': 2,
+})
+class EmailOutboxTests(TestCase):
+    LOGGER = 'apps.authentication.management.commands.send_queued_emails'
+
+    def setUp(self):
+        RecordingTransport.batches = []
+        RecordingTransport.errors = {}
+        RecordingTransport.raises = None
+
+    def queue(self, to_email, **kwargs):
+        return EmailOutbox.queue(to_email, 'Subject', 'Body', **kwargs)
+
+    def send(self):
+        call_command('send_queued_emails', '--once', stdout=StringIO())
+
+    def send_with_warnings(self):
+        with self.assertLogs(self.LOGGER, 'WARNING') as logs:
+            self.send()
+        return logs.output
+
+    def test_queue_verification_email_does_not_send(self):
+        EmailService().queue_verification_email('user@example.com', 'User', '123456')
+        message = EmailOutbox.objects.get()
+        self.assertEqual(message.status, EmailOutbox.STATUS_PENDING)
+        self.assertIn('123456', message.text_body)
+        self.assertEqual(RecordingTransport.batches, [])
+
+    def test_sends_due_messages_in_one_batch(self):
+        for i in range(3):
+            self.queue(f'user{i}@example.com')
+        self.send()
+        self.assertEqual(
+            RecordingTransport.batches,
+            [['user0@example.com', 'user1@example.com', 'user2@example.com']]
+        )
+        self.assertEqual(
+            set(EmailOutbox.objects.values_list('status', flat=True)),
+            {EmailOutbox.STATUS_SENT}
+        )
+
+    def test_failed_message_is_retried_with_backoff_then_given_up(self):
+        RecordingTransport.errors = {'bad@example.com': 'rejected'}
+        message = self.queue('bad@example.com')
+        self.queue('good@example.com')
+        self.send_with_warnings()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.last_error, 'rejected')
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.send()
+        self.assertEqual(len(RecordingTransport.batches), 1)
+
+        EmailOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        self.assertIn('Giving up', self.send_with_warnings()[-1])
+        message.refresh_from_db()
+        self.assertEqual(RecordingTransport.batches[-1], ['bad@example.com'])
+        self.assertEqual(message.status, EmailOutbox.STATUS_FAILED)
+        self.assertEqual(message.attempts, 2)
+
+    def test_transport_error_fails_the_whole_batch(self):
+        RecordingTransport.raises = ConnectionError('provider down')
+        self.queue('user@example.com')
+        self.send_with_warnings()
+        message = EmailOutbox.objects.get()
+        self.assertEqual(message.status, EmailOutbox.STATUS_PENDING)
+        self.assertIn('provider down', message.last_error)
+
+    def test_expired_messages_are_dropped(self):
+        self.queue('late@example.com', expires_at=timezone.now() - timedelta(seconds=1))
+        self.send_with_warnings()
+        self.assertEqual(RecordingTransport.batches, [])
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.STATUS_FAILED)
@@ -0,0 +1,146 @@
+"""
+Sliding-window rate limiting backed by a store shared across workers.
+
+DRF's SimpleRateThrottle keeps a list of timestamps per client in the
+default cache and rewrites it on every request; with a per-process cache
+each worker also enforces the limit separately. These throttles instead
+keep one counter per client per fixed window and estimate the sliding
+window from the current and previous counters:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+Each check is one atomic increment plus one read, in Redis (via the cache)
+or in the throttle_counters table. Rejected requests are counted too, so a
+client that keeps hammering stays limited.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    UserRateThrottle,
+)
+
+from .models import ThrottleCounter
+
+
+class CacheCounterStore:
+    """
+    Counters in a cache alias; atomic with Redis (INCR) and LocMem.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def incr(self, key, ttl):
+        # add() is a no-op if the key exists, incr() is atomic
+        self.cache.add(key, 0, ttl)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.add(key, 1, ttl)
+            return 1
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+class DatabaseCounterStore:
+    """
+    Counters in the throttle_counters table, incremented with a single
+    upsert on the primary (bypasses the replica router).
+    """
+    # Chance per increment of deleting expired rows
+    PURGE_PROBABILITY = 0.001
+
+    def incr(self, key, ttl):
+        now = timezone.now()
+        table = ThrottleCounter._meta.db_table
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{table}" ("key", "count", "expires_at") '
+                f'VALUES (%s, 1, %s) '
+                f'ON CONFLICT ("key") DO UPDATE SET "count" = "{table}"."count" + 1 '
+                f'RETURNING "count"',
+                [key, now + timedelta(seconds=ttl)],
+            )
+            count = cursor.fetchone()[0]
+
+        if random.random() < self.PURGE_PROBABILITY:
+            ThrottleCounter.objects.using(DEFAULT_DB_ALIAS).filter(
+                expires_at__lt=now
+            ).delete()
+        return count
+
+    def get(self, key):
+        count = ThrottleCounter.objects.using(DEFAULT_DB_ALIAS).filter(
+            key=key
+        ).values_list('count', flat=True).first()
+        return count or 0
+
+
+def get_counter_store():
+    config = settings.THROTTLE
+    if config['STORE'] == 'database':
+        return DatabaseCounterStore()
+    return CacheCounterStore(config['CACHE'])
+
+
+class SlidingWindowMixin:
+    """
+    Replaces SimpleRateThrottle's timestamp history with windowed counters.
+    Subclasses keep DRF's scope/rate/get_cache_key handling.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        store = get_counter_store()
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+
+        # Kept for two windows: it is the "previous" counter in the next one
+        self.current = store.incr(f"{self.key}:{window}", 2 * self.duration)
+        self.previous = store.get(f"{self.key}:{window - 1}")
+
+        weight = 1 - self.elapsed / self.duration
+        if self.previous * weight + self.current > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        remaining = self.duration - self.elapsed
+        if self.current > self.num_requests or not self.previous:
+            return remaining
+
+        # Time until the previous window's share decays below the limit
+        excess = self.previous * (remaining / self.duration) + self.current - self.num_requests
+        return min(remaining, excess * self.duration / self.previous)
+
+
+class SlidingWindowAnonRateThrottle(SlidingWindowMixin, AnonRateThrottle):
+    pass
+
+
+class SlidingWindowUserRateThrottle(SlidingWindowMixin, UserRateThrottle):
+    pass
+
+
+class SimulationBatchRateThrottle(SlidingWindowMixin, UserRateThrottle):
+    """
+    Separate, higher-capacity bucket for endpoints clients call in bulk
+    (e.g. saving every run of a batch test), so they neither exhaust nor
+    are limited by the general `user` rate.
+    """
+    scope = 'simulation_batch'
@@ -3,10 +3,16 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserSerializer, EmailVerificationCodeSerializer
+from .serializers import (
+    UserSerializer,
+    EmailVerificationCodeSerializer,
+    ResendVerificationSerializer,
+)
 from .models import EmailVerificationCode
 from django.utils import timezone
+from datetime import timedelta
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from .services import EmailService
 
 User = get_user_model()
@@ -19,19 +25,16 @@ class RegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        code = user.email_verification_codes.create()
-        email_service = EmailService()
-        email_sent = email_service.send_verification_email(
-            user_email=user.email,
-            user_name=user.first_name,
-            verification_code=code.code
-        )
-        if not email_sent:
-            user.delete()
-            return Response(
-                {"error": "Failed to send verification email. Please try again."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        # Delivery happens in the send_queued_emails worker, so registration
+        # never waits on (or fails because of) the email provider
+        with transaction.atomic():
+            user = serializer.save()
+            code = user.email_verification_codes.create()
+            EmailService().queue_verification_email(
+                user_email=user.email,
+                user_name=user.first_name,
+                verification_code=code.code,
+                expires_at=code.expires_at
             )
         res_data = {
             "email": user.email,
@@ -96,4 +99,47 @@ class VerifyEmailView(APIView):
             return Response(
                 {"error": "User not found"},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+class ResendVerificationView(APIView):
+    permission_classes = (AllowAny,)
+
+    # Minimum gap between codes for one account
+    RESEND_INTERVAL = timedelta(minutes=1)
+
+    def post(self, request):
+        serializer = ResendVerificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Same answer whether or not the account exists, so this can't be
+        # used to probe for registered emails
+        response = Response({
+            "message": "If the account is awaiting verification, a new code has been sent."
+        }, status=status.HTTP_200_OK)
+
+        user = User.objects.filter(
+            email=serializer.validated_data['email'],
+            is_email_verified=False
+        ).first()
+        if user is None:
+            return response
+
+        now = timezone.now()
+        with transaction.atomic():
+            codes = EmailVerificationCode.objects.select_for_update().filter(
+                user=user,
+                is_used=False
+            )
+            if codes.filter(created_at__gt=now - self.RESEND_INTERVAL).exists():
+                return response
+
+            # Only the newest code stays valid
+            codes.update(is_used=True)
+            code = user.email_verification_codes.create()
+            EmailService().queue_verification_email(
+                user_email=user.email,
+                user_name=user.first_name,
+                verification_code=code.code,
+                expires_at=code.expires_at
+            )
+        return response
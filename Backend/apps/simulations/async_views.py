@@ -0,0 +1,251 @@
+"""
+Async (ASGI) versions of the hot read endpoints.
+
+Enabled with ASYNC_VIEWS=True (see urls.py). Each view reuses the matching
+viewset for its queryset, filters, pagination, serializers and permissions,
+so responses are identical to the sync ones; only the request plumbing
+differs:
+
+- JWT users are loaded through the async ORM (AsyncJWTAuthentication)
+- queries run via the async queryset API instead of blocking a worker
+- serialization and filter building run in threads via sync_to_async,
+  so a large automaton does not stall the event loop
+
+Writes (POST/PUT/PATCH/DELETE) on the same URLs still go through the sync
+viewsets, see method_dispatch().
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from config.db_routers import primary_reads, replica_reads
+
+from .caching import aget_shared_session, aset_shared_session
+from .views import (
+    SimulationRunViewSet,
+    SimulationSessionsViewSet,
+    build_shared_entry,
+    session_validators,
+    set_validator_headers,
+    shared_response,
+    shared_session_queryset,
+)
+
+
+def run_in_thread(func, *args, **kwargs):
+    """
+    Run CPU-bound, database-free work (serialization) off the event loop.
+    """
+    return sync_to_async(
+        functools.partial(func, *args, **kwargs),
+        thread_sensitive=False
+    )()
+
+
+async def authenticate(request):
+    """
+    Async counterpart of Request._authenticate().
+    """
+    for authenticator in request.authenticators:
+        if hasattr(authenticator, 'aauthenticate'):
+            user_auth_tuple = await authenticator.aauthenticate(request)
+        else:
+            user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+
+    request._authenticator = None
+    request.user, request.auth = AnonymousUser(), None
+
+
+def async_api_view(viewset_class, action, detail=False):
+    """
+    Turn `handler(view, request, **kwargs)` into an async Django view that
+    runs `viewset_class` checks for `action` the way APIView.dispatch does.
+    """
+    # Per-action overrides from @action(...), e.g. permission_classes=[]
+    initkwargs = getattr(getattr(viewset_class, action), 'kwargs', {})
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def async_view(request, *args, **kwargs):
+            view = viewset_class(
+                action=action,
+                detail=detail,
+                args=args,
+                kwargs=kwargs,
+                format_kwarg=None,
+                **initkwargs
+            )
+            view.headers = view.default_response_headers
+            drf_request = Request(
+                request,
+                parsers=view.get_parsers(),
+                authenticators=view.get_authenticators(),
+                negotiator=view.get_content_negotiator(),
+                parser_context={'view': view, 'args': args, 'kwargs': kwargs},
+            )
+            view.request = drf_request
+
+            try:
+                neg = view.perform_content_negotiation(drf_request)
+                drf_request.accepted_renderer, drf_request.accepted_media_type = neg
+                version, scheme = view.determine_version(drf_request, *args, **kwargs)
+                drf_request.version, drf_request.versioning_scheme = version, scheme
+
+                try:
+                    await authenticate(drf_request)
+                except exceptions.APIException:
+                    drf_request._not_authenticated()
+                    raise
+                view.check_permissions(drf_request)
+                await sync_to_async(view.check_throttles)(drf_request)
+
+                with replica_reads():
+                    response = await handler(view, drf_request, **kwargs)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+
+            return view.finalize_response(drf_request, response, *args, **kwargs)
+
+        async_view.csrf_exempt = True
+        return async_view
+    return decorator
+
+
+def method_dispatch(async_view, sync_view):
+    """
+    Route GET/HEAD to `async_view` and every other method to the sync
+    viewset view (run in a thread, as Django does for sync views).
+    """
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+async def paginate(view, request, queryset):
+    """
+    Async counterpart of PageNumberPagination.paginate_queryset(); leaves
+    the paginator ready for get_paginated_response().
+    """
+    paginator = view.paginator
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return [obj async for obj in queryset]
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    # Paginator.count is a cached_property; prime it without a sync query
+    django_paginator.count = await queryset.acount()
+
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        paginator.page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        msg = paginator.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        )
+        raise exceptions.NotFound(msg)
+
+    paginator.request = request
+    return [obj async for obj in paginator.page.object_list]
+
+
+async def list_response(view, request, queryset):
+    objects = await paginate(view, request, queryset)
+    data = await run_in_thread(
+        lambda: view.get_serializer(objects, many=True).data
+    )
+    if view.paginator.get_page_size(request):
+        return view.get_paginated_response(data)
+    return Response(data)
+
+
+async def detail_object(view, queryset):
+    try:
+        obj = await queryset.aget()
+    except queryset.model.DoesNotExist:
+        raise Http404('No %s matches the given query.' % queryset.model._meta.object_name)
+    view.check_object_permissions(view.request, obj)
+    return obj
+
+
+# Sessions
+@async_api_view(SimulationSessionsViewSet, 'list')
+async def session_list(view, request):
+    queryset = await sync_to_async(
+        lambda: view.filter_queryset(view.get_queryset())
+    )()
+    return await list_response(view, request, queryset)
+
+
+@async_api_view(SimulationSessionsViewSet, 'retrieve', detail=True)
+async def session_detail(view, request, public_id):
+    queryset = view.get_queryset().filter(public_id=public_id)
+
+    etag, last_modified = await sync_to_async(session_validators)(
+        queryset, request.user
+    )
+    if etag is not None:
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return set_validator_headers(not_modified, etag, last_modified)
+
+    session = await detail_object(view, queryset)
+    data = await run_in_thread(lambda: view.get_serializer(session).data)
+
+    response = Response(data)
+    if etag is not None:
+        set_validator_headers(response, etag, last_modified)
+    return response
+
+
+@async_api_view(SimulationSessionsViewSet, 'shared', detail=True)
+async def session_shared(view, request, public_id):
+    entry = await aget_shared_session(public_id)
+
+    if entry is None:
+        # From the primary, as in the sync view
+        with primary_reads():
+            session = await shared_session_queryset(public_id).afirst()
+            if session is not None:
+                entry = await sync_to_async(build_shared_entry)(session, request)
+
+        if entry is None:
+            return Response(
+                {'error': 'Session not found or not shared'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        await aset_shared_session(public_id, entry)
+
+    return shared_response(request, public_id, entry)
+
+
+# Runs
+@async_api_view(SimulationRunViewSet, 'list')
+async def run_list(view, request):
+    return await list_response(view, request, view.get_queryset())
+
+
+@async_api_view(SimulationRunViewSet, 'retrieve', detail=True)
+async def run_detail(view, request, pk):
+    run = await detail_object(view, view.get_queryset().filter(pk=pk))
+    data = await run_in_thread(lambda: view.get_serializer(run).data)
+    return Response(data)
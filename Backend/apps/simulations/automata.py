@@ -0,0 +1,87 @@
+"""
+Helpers for reading the `automata_data` JSON stored on SimulationSessions.
+
+The editor stores states as objects ({"id", "name", "x", "y", "isInitial",
+"isFinal"}) and transitions as {"id", "from", "to", "symbol", ...}, with
+Turing machines adding "readSymbol", "writeSymbol" and "direction". Older
+payloads may list states as plain id strings; both shapes are accepted.
+"""
+import hashlib
+import json
+
+# Symbols the editor uses for empty (epsilon) transitions
+EPSILON_SYMBOLS = frozenset(['', 'ε', 'epsilon', 'λ'])
+
+# Bytes per cell of a dense int32 next-state table
+TABLE_CELL_BYTES = 4
+
+
+def state_id(state):
+    return state.get('id') if isinstance(state, dict) else state
+
+
+def transition_symbol(transition, automata_type=None):
+    """
+    Symbol a transition consumes (TMs read `readSymbol` when present).
+    """
+    if automata_type == 'TM' and transition.get('readSymbol') is not None:
+        return transition['readSymbol']
+    return transition.get('symbol', '')
+
+
+def _list(data, key):
+    value = data.get(key) if isinstance(data, dict) else None
+    return value if isinstance(value, list) else []
+
+
+def content_hash(data):
+    """
+    SHA-256 of the canonical JSON encoding (sorted keys, no whitespace).
+    """
+    canonical = json.dumps(
+        data, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def is_deterministic(data, automata_type=None):
+    """
+    True if no state has two transitions on the same symbol and there are
+    no epsilon transitions. Missing transitions are allowed (implicit reject).
+    """
+    seen = set()
+    for transition in _list(data, 'transitions'):
+        if not isinstance(transition, dict):
+            return False
+        symbol = transition_symbol(transition, automata_type)
+        if symbol in EPSILON_SYMBOLS:
+            return False
+        key = (transition.get('from'), symbol)
+        if key in seen:
+            return False
+        seen.add(key)
+    return True
+
+
+def structural_metadata(data, automata_type=None):
+    """
+    Derived values persisted alongside automata_data so they can be
+    filtered and sorted on in SQL without loading the JSON.
+    """
+    states = _list(data, 'states')
+    transitions = _list(data, 'transitions')
+    alphabet = {
+        symbol for symbol in _list(data, 'alphabet')
+        if isinstance(symbol, str)
+    }
+
+    return {
+        'state_count': len(states),
+        'transition_count': len(transitions),
+        'alphabet_size': len(alphabet),
+        'is_deterministic': is_deterministic(data, automata_type),
+        'content_hash': content_hash(data),
+        'compiled_size_estimate': (
+            len(states) * max(len(alphabet), 1) * TABLE_CELL_BYTES
+        ),
+    }
@@ -0,0 +1,6 @@
+"""
+Benchmarks: seeded generators of large and adversarial automata
+(generators.py), the engine timing suite run by `python manage.py
+benchmark_engine` (suite.py), and the HTTP load generator behind
+`python manage.py load_test` (load.py).
+"""
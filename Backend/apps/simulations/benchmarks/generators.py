@@ -0,0 +1,242 @@
+"""
+Synthetic automata for the engine benchmarks, in the editor's
+automata_data shape. Everything is seeded, so a given size and seed
+always produces the same automaton.
+"""
+import random
+
+# Thompson construction operators, tightest binding first
+POSTFIX_OPERATORS = '*+?'
+
+
+def _state(sid, initial=False, final=False):
+    return {
+        'id': sid,
+        'name': sid,
+        'x': 0,
+        'y': 0,
+        'isInitial': initial,
+        'isFinal': final,
+    }
+
+
+def dense_dfa(n, alphabet='ab', final_ratio=0.5, seed=0):
+    """
+    Random complete DFA: every state has a transition on every symbol.
+    """
+    rng = random.Random(seed)
+    states = [
+        _state(f"q{i}", initial=i == 0, final=rng.random() < final_ratio)
+        for i in range(n)
+    ]
+    transitions = [
+        {'id': f"t{i}_{symbol}", 'from': f"q{i}", 'to': f"q{rng.randrange(n)}", 'symbol': symbol}
+        for i in range(n)
+        for symbol in alphabet
+    ]
+    return {'alphabet': list(alphabet), 'states': states, 'transitions': transitions}
+
+
+class _Thompson:
+    """
+    Recursive-descent regex parser building a Thompson NFA. Supports
+    literals, concatenation, |, *, + and ? and parentheses.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.position = 0
+        self.states = 0
+        self.transitions = []
+
+    def new_state(self):
+        self.states += 1
+        return self.states - 1
+
+    def edge(self, source, target, symbol):
+        self.transitions.append((source, target, symbol))
+
+    def peek(self):
+        return self.pattern[self.position] if self.position < len(self.pattern) else None
+
+    def parse(self):
+        fragment = self.alternation()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()!r} at {self.position}")
+        return fragment
+
+    def alternation(self):
+        start, end = self.concatenation()
+        while self.peek() == '|':
+            self.position += 1
+            other_start, other_end = self.concatenation()
+            new_start, new_end = self.new_state(), self.new_state()
+            self.edge(new_start, start, '')
+            self.edge(new_start, other_start, '')
+            self.edge(end, new_end, '')
+            self.edge(other_end, new_end, '')
+            start, end = new_start, new_end
+        return start, end
+
+    def concatenation(self):
+        fragment = None
+        while self.peek() not in (None, '|', ')'):
+            start, end = self.repetition()
+            if fragment is None:
+                fragment = (start, end)
+            else:
+                self.edge(fragment[1], start, '')
+                fragment = (fragment[0], end)
+        if fragment is None:
+            state = self.new_state()
+            fragment = (state, state)
+        return fragment
+
+    def repetition(self):
+        start, end = self.atom()
+        while self.peek() is not None and self.peek() in POSTFIX_OPERATORS:
+            operator = self.peek()
+            self.position += 1
+            new_start, new_end = self.new_state(), self.new_state()
+            self.edge(new_start, start, '')
+            self.edge(end, new_end, '')
+            if operator in '*?':
+                self.edge(new_start, new_end, '')
+            if operator in '*+':
+                self.edge(end, start, '')
+            start, end = new_start, new_end
+        return start, end
+
+    def atom(self):
+        char = self.peek()
+        if char == '(':
+            self.position += 1
+            fragment = self.alternation()
+            if self.peek() != ')':
+                raise ValueError(f"Missing ')' at {self.position}")
+            self.position += 1
+            return fragment
+        if char is None or char in POSTFIX_OPERATORS + '|)':
+            raise ValueError(f"Unexpected {char!r} at {self.position}")
+        self.position += 1
+        start, end = self.new_state(), self.new_state()
+        self.edge(start, end, char)
+        return start, end
+
+
+def regex_nfa(pattern):
+    """
+    Thompson NFA (with epsilon transitions) for `pattern`.
+    """
+    builder = _Thompson(pattern)
+    start, end = builder.parse()
+    states = [
+        _state(f"n{i}", initial=i == start, final=i == end)
+        for i in range(builder.states)
+    ]
+    transitions = [
+        {'id': f"t{i}", 'from': f"n{source}", 'to': f"n{target}", 'symbol': symbol}
+        for i, (source, target, symbol) in enumerate(builder.transitions)
+    ]
+    alphabet = sorted({symbol for _, _, symbol in builder.transitions if symbol})
+    return {'alphabet': alphabet, 'states': states, 'transitions': transitions}
+
+
+def blowup_pattern(k):
+    """
+    (a|b)*a(a|b){k}, "the (k+1)-th symbol from the end is a": a Thompson
+    NFA of O(k) states whose minimal DFA has 2^(k+1) states.
+    """
+    return '(a|b)*a' + '(a|b)' * k
+
+
+def _tm_transition(i, source, read, target, write, direction):
+    return {
+        'id': f"t{i}",
+        'from': source,
+        'to': target,
+        'symbol': read,
+        'readSymbol': read,
+        'writeSymbol': write,
+        'direction': direction,
+    }
+
+
+def sweeping_tm():
+    """
+    Deterministic TM accepting a^n in about n^2 / 2 steps: mark the
+    leftmost unmarked a, sweep right to the blank, sweep back to the
+    marks, repeat.
+    """
+    rules = [
+        ('mark', 'X', 'mark', 'X', 'R'),
+        ('mark', 'a', 'right', 'X', 'R'),
+        ('mark', 'B', 'done', 'B', 'S'),
+        ('right', 'a', 'right', 'a', 'R'),
+        ('right', 'B', 'left', 'B', 'L'),
+        ('left', 'a', 'left', 'a', 'L'),
+        ('left', 'X', 'mark', 'X', 'R'),
+    ]
+    return {
+        'states': [
+            _state('mark', initial=True),
+            _state('right'),
+            _state('left'),
+            _state('done', final=True),
+        ],
+        'transitions': [_tm_transition(i, *rule) for i, rule in enumerate(rules)],
+    }
+
+
+def guessing_tm(alphabet='ab', length=3):
+    """
+    Nondeterministic TM accepting inputs containing some block of
+    `length` symbols twice in a row. It guesses where the block starts
+    and remembers it in its state, so the search branches at every cell.
+    """
+    rules = []
+    for symbol in alphabet:
+        rules.append(('scan', symbol, 'scan', symbol, 'R'))
+        rules.append(('scan', symbol, f"g0_{symbol}", symbol, 'R'))
+    # g{i}_{w}: guessed block w (length i+1) so far, reading the rest of it
+    blocks = list(alphabet)
+    for size in range(1, length):
+        grown = []
+        for block in blocks:
+            for symbol in alphabet:
+                rules.append((f"g{size - 1}_{block}", symbol, f"g{size}_{block}{symbol}", symbol, 'R'))
+                grown.append(block + symbol)
+        blocks = grown
+    # c{i}_{w}: matching the i-th symbol of the repeat of w
+    for block in blocks:
+        rules.append((f"g{length - 1}_{block}", block[0], f"c1_{block}", block[0], 'R'))
+        for i in range(1, length):
+            target = f"c{i + 1}_{block}" if i + 1 < length else 'accept'
+            rules.append((f"c{i}_{block}", block[i], target, block[i], 'R'))
+
+    names = list(dict.fromkeys([rule[0] for rule in rules] + [rule[2] for rule in rules]))
+    states = [
+        _state(name, initial=name == 'scan', final=name == 'accept')
+        for name in names
+    ]
+    return {
+        'states': states,
+        'transitions': [_tm_transition(i, *rule) for i, rule in enumerate(rules)],
+    }
+
+
+def thue_morse(n, alphabet='ab'):
+    """
+    First n symbols of the Thue-Morse word. It has no square ww with
+    |w| other than 2^k or 3 * 2^k, so guessing_tm(length=5) rejects it
+    only after searching every guess.
+    """
+    return ''.join(alphabet[bin(i).count('1') % 2] for i in range(n))
+
+
+def random_inputs(alphabet, count, length, seed=0):
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(alphabet) for _ in range(length))
+        for _ in range(count)
+    ]
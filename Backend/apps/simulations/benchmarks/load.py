@@ -0,0 +1,456 @@
+"""
+HTTP load generator for the REST API.
+
+Virtual users log in with JWT, list and open their sessions, save runs in
+bursts, hit shared sessions anonymously and poll statistics, each picking
+its next action from a weighted mix with an exponential think time in
+between. Accounts come from `python manage.py seed_load_test`.
+
+Standard library only, so it runs wherever there is a Python, with or
+without the backend installed:
+
+    python manage.py load_test --base-url http://127.0.0.1:8000 --users 50
+    python apps/simulations/benchmarks/load.py --base-url ... --users 50
+
+The report has throughput, latency percentiles, error rate and status
+counts per endpoint. The generator is one process with a thread per
+virtual user; if it runs short of CPU, run several copies.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+ACTIONS = ('list', 'retrieve', 'save_run', 'shared', 'statistics')
+DEFAULT_MIX = 'list=3,retrieve=3,save_run=2,shared=2,statistics=1'
+DEFAULT_EMAIL = 'loadtest-{n}@example.com'
+DEFAULT_PASSWORD = 'loadtest-password'
+
+# Sessions each virtual user fetches to pick from
+SESSION_PAGE_SIZE = 100
+
+
+def parse_mix(text):
+    """
+    'list=3,save_run=1' -> {'list': 3.0, 'save_run': 1.0}
+    """
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        action, _, weight = part.partition('=')
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action {action!r} (choose from {', '.join(ACTIONS)})")
+        try:
+            mix[action] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {action}: {weight!r}")
+        if mix[action] < 0:
+            raise ValueError(f"Negative weight for {action}")
+    if not any(mix.values()):
+        raise ValueError('The mix needs at least one positive weight')
+    return mix
+
+
+def percentile(samples, fraction):
+    """
+    Nearest-rank percentile of sorted `samples`.
+    """
+    rank = max(int(-(-fraction * len(samples) // 1)), 1)
+    return samples[min(rank, len(samples)) - 1]
+
+
+class Stats:
+    """
+    Latencies and status codes per endpoint, shared by all virtual users.
+    Status 0 is a connection error or timeout.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint, status, elapsed):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][status] += 1
+
+    def totals(self):
+        with self.lock:
+            return (
+                sum(map(len, self.latencies.values())),
+                sum(
+                    count
+                    for statuses in self.statuses.values()
+                    for status, count in statuses.items()
+                    if not 0 < status < 400
+                ),
+            )
+
+    @staticmethod
+    def summarize(latencies, statuses, elapsed):
+        samples = sorted(latencies)
+        errors = sum(count for status, count in statuses.items() if not 0 < status < 400)
+        summary = {
+            'requests': len(samples),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+            'throughput': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+        if samples:
+            summary.update({
+                'mean_ms': round(sum(samples) / len(samples) * 1000, 2),
+                'p50_ms': round(percentile(samples, 0.5) * 1000, 2),
+                'p90_ms': round(percentile(samples, 0.9) * 1000, 2),
+                'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+                'max_ms': round(samples[-1] * 1000, 2),
+            })
+        return summary
+
+    def report(self, elapsed):
+        with self.lock:
+            endpoints = {
+                endpoint: self.summarize(self.latencies[endpoint], self.statuses[endpoint], elapsed)
+                for endpoint in sorted(self.latencies)
+            }
+            everything = [latency for latencies in self.latencies.values() for latency in latencies]
+            statuses = sum(self.statuses.values(), Counter())
+        return endpoints, self.summarize(everything, statuses, elapsed)
+
+
+class Client:
+    """
+    Keep-alive HTTP connection for one virtual user.
+    """
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None, token=None, parse=False):
+        """
+        (status, JSON body or None). Status 0 on connection errors.
+        """
+        headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        if self.connection is None:
+            self.connection = self.connection_class(self.netloc, timeout=self.timeout)
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return 0, None
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+
+        data = None
+        if parse and content:
+            if response.getheader('Content-Encoding') == 'gzip':
+                content = gzip.decompress(content)
+            try:
+                data = json.loads(content)
+            except ValueError:
+                pass
+        return response.status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, test, number):
+        super().__init__(name=f"vu-{number}", daemon=True)
+        self.test = test
+        self.number = number
+        self.rng = random.Random(test.seed * 100003 + number)
+        self.client = Client(test.base_url, test.timeout)
+        self.email = test.email.format(n=number % test.accounts)
+        self.token = None
+        self.sessions = []
+
+    def call(self, endpoint, method, path, body=None, auth=True, parse=False):
+        started = time.perf_counter()
+        status, data = self.client.request(
+            method, path, body, token=self.token if auth else None, parse=parse
+        )
+        self.test.stats.record(endpoint, status, time.perf_counter() - started)
+        return status, data
+
+    def login(self):
+        status, data = self.call(
+            'login', 'POST', '/auth/login/',
+            {'email': self.email, 'password': self.test.password},
+            auth=False, parse=True,
+        )
+        self.token = data.get('access') if status == 200 and isinstance(data, dict) else None
+        return self.token is not None
+
+    def list_sessions(self):
+        # Only the first listing is parsed; later ones are just load
+        status, data = self.call(
+            'list', 'GET', f"/simulations/sessions/?page_size={SESSION_PAGE_SIZE}",
+            parse=not self.sessions,
+        )
+        if status == 200 and isinstance(data, dict):
+            results = data.get('results', [])
+            self.sessions = [session['public_id'] for session in results]
+            self.test.add_shared(session['public_id'] for session in results if session.get('is_shared'))
+        return status
+
+    def retrieve(self):
+        return self.call('retrieve', 'GET', f"/simulations/sessions/{self.rng.choice(self.sessions)}/")[0]
+
+    def save_run(self):
+        public_id = self.rng.choice(self.sessions)
+        status = None
+        for _ in range(self.test.burst):
+            value = ''.join(self.rng.choice('ab') for _ in range(self.rng.randint(1, 12)))
+            status = self.call('save_run', 'POST', f"/simulations/sessions/{public_id}/save_run/", {
+                'input_string': value,
+                'is_accepted': self.rng.random() < 0.5,
+                'execution_time': round(self.rng.uniform(0.1, 5), 3),
+                'result_steps': [
+                    {'step': i, 'currentState': f"q{i}", 'remainingInput': value[i:]}
+                    for i in range(len(value) + 1)
+                ],
+            })[0]
+        return status
+
+    def shared(self):
+        public_id = self.test.pick_shared(self.rng)
+        if public_id is None:
+            return self.list_sessions()
+        return self.call('shared', 'GET', f"/simulations/sessions/{public_id}/shared/", auth=False)[0]
+
+    def statistics(self):
+        return self.call('statistics', 'GET', '/simulations/sessions/statistics/')[0]
+
+    def run(self):
+        test = self.test
+        time.sleep(test.ramp_up * self.number / test.users)
+        handlers = {
+            'list': self.list_sessions,
+            'retrieve': self.retrieve,
+            'save_run': self.save_run,
+            'shared': self.shared,
+            'statistics': self.statistics,
+        }
+        actions, weights = zip(*test.mix.items())
+        try:
+            while time.monotonic() < test.deadline:
+                if self.token is None and not self.login():
+                    # Bad credentials or throttled: back off rather than spin
+                    time.sleep(1)
+                    continue
+                action = self.rng.choices(actions, weights)[0]
+                if not self.sessions and action in ('retrieve', 'save_run'):
+                    action = 'list'
+                if handlers[action]() == 401:
+                    self.token = None
+                if test.think:
+                    time.sleep(self.rng.expovariate(1 / test.think))
+        finally:
+            self.client.close()
+
+
+class LoadTest:
+    def __init__(self, base_url, users=10, duration=60.0, ramp_up=0.0, think=0.5,
+                 mix=DEFAULT_MIX, burst=5, accounts=None, email=DEFAULT_EMAIL,
+                 password=DEFAULT_PASSWORD, timeout=30.0, seed=0):
+        self.base_url = base_url
+        self.users = users
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think = think
+        self.mix = parse_mix(mix) if isinstance(mix, str) else mix
+        self.burst = burst
+        self.accounts = accounts or users
+        self.email = email
+        self.password = password
+        self.timeout = timeout
+        self.seed = seed
+        self.stats = Stats()
+        self.shared_lock = threading.Lock()
+        self.shared_ids = set()
+        self.shared_list = []
+        self.deadline = None
+
+    def add_shared(self, public_ids):
+        with self.shared_lock:
+            for public_id in public_ids:
+                if public_id not in self.shared_ids:
+                    self.shared_ids.add(public_id)
+                    self.shared_list.append(public_id)
+
+    def pick_shared(self, rng):
+        with self.shared_lock:
+            return rng.choice(self.shared_list) if self.shared_list else None
+
+    def run(self, progress=None, interval=5.0):
+        """
+        Run for `duration` seconds and return the report. `progress` is
+        called every `interval` seconds with (elapsed, requests, errors).
+        """
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        self.deadline = started + self.duration
+        threads = [VirtualUser(self, number) for number in range(self.users)]
+        for thread in threads:
+            thread.start()
+        while threads:
+            threads[0].join(interval)
+            if progress and time.monotonic() < self.deadline:
+                progress(time.monotonic() - started, *self.stats.totals())
+            threads = [thread for thread in threads if thread.is_alive()]
+        elapsed = time.monotonic() - started
+
+        endpoints, total = self.stats.report(elapsed)
+        return {
+            'meta': {
+                'base_url': self.base_url,
+                'users': self.users,
+                'accounts': self.accounts,
+                'duration': self.duration,
+                'ramp_up': self.ramp_up,
+                'think': self.think,
+                'mix': self.mix,
+                'burst': self.burst,
+                'seed': self.seed,
+                'started_at': started_at.isoformat(),
+            },
+            'elapsed': round(elapsed, 3),
+            'endpoints': endpoints,
+            'total': total,
+        }
+
+
+def add_arguments(parser):
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=10, help='Virtual users (threads)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds to run')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='Seconds over which users start')
+    parser.add_argument(
+        '--think',
+        type=float,
+        default=0.5,
+        help='Mean seconds between a user\'s actions (0: no pause)',
+    )
+    parser.add_argument(
+        '--mix',
+        default=DEFAULT_MIX,
+        help=f"Action weights (default: {DEFAULT_MIX})",
+    )
+    parser.add_argument('--burst', type=int, default=5, help='Runs saved per save_run action')
+    parser.add_argument(
+        '--accounts',
+        type=int,
+        default=None,
+        help='Seeded accounts to log in as, shared round-robin (default: one per user)',
+    )
+    parser.add_argument(
+        '--email',
+        default=DEFAULT_EMAIL,
+        help='Account email template, {n} is the account number (default: %(default)s)',
+    )
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds per request')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='JSON report file to write')
+
+
+def validate(options):
+    """
+    LoadTest keyword arguments from parsed options. Raises ValueError.
+    """
+    if options['users'] < 1:
+        raise ValueError('--users must be at least 1')
+    if options['duration'] <= 0 or options['ramp_up'] < 0 or options['think'] < 0:
+        raise ValueError('--duration must be positive; --ramp-up and --think not negative')
+    if options['burst'] < 1:
+        raise ValueError('--burst must be at least 1')
+    if '{n}' not in options['email']:
+        raise ValueError('--email must contain {n}')
+    if urlsplit(options['base_url']).scheme not in ('http', 'https'):
+        raise ValueError('--base-url must be an http(s) URL')
+    return {
+        'base_url': options['base_url'],
+        'users': options['users'],
+        'duration': options['duration'],
+        'ramp_up': options['ramp_up'],
+        'think': options['think'],
+        'mix': parse_mix(options['mix']),
+        'burst': options['burst'],
+        'accounts': options['accounts'],
+        'email': options['email'],
+        'password': options['password'],
+        'timeout': options['timeout'],
+        'seed': options['seed'],
+    }
+
+
+def format_report(report):
+    """
+    Plain-text table of a report, one line per endpoint.
+    """
+    lines = [
+        f"{'endpoint':<12} {'requests':>9} {'req/s':>9} {'errors':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses"
+    ]
+    rows = list(report['endpoints'].items()) + [('total', report['total'])]
+    for endpoint, summary in rows:
+        statuses = ' '.join(f"{status}:{count}" for status, count in summary['statuses'].items())
+        lines.append(
+            f"{endpoint:<12} {summary['requests']:>9} {summary['throughput']:>9.1f} "
+            f"{summary['error_rate']:>8.1%} "
+            f"{summary.get('p50_ms', 0):>9.1f} {summary.get('p95_ms', 0):>9.1f} "
+            f"{summary.get('p99_ms', 0):>9.1f} {summary.get('max_ms', 0):>9.1f}  {statuses}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the TOC-Simulator REST API.')
+    add_arguments(parser)
+    options = vars(parser.parse_args(argv))
+    try:
+        test = LoadTest(**validate(options))
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = test.run(progress=lambda elapsed, requests, errors: print(
+        f"{elapsed:6.0f}s  {requests} requests, {errors} errors", file=sys.stderr
+    ))
+    print(format_report(report), file=sys.stderr)
+    content = json.dumps(report, indent=2)
+    if options['output']:
+        with open(options['output'], 'w') as f:
+            f.write(content + '\n')
+    else:
+        print(content)
+
+
+if __name__ == '__main__':
+    main()
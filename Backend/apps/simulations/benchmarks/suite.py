@@ -0,0 +1,287 @@
+"""
+Engine benchmark suite (`python manage.py benchmark_engine`).
+
+Each case builds one synthetic automaton (see generators.py) and times a
+set of operations on it. Every operation is run `repeat` times, or until
+its time budget is spent, and then once more under tracemalloc for peak
+memory, so the timings aren't skewed by tracing. Results are plain dicts
+that serialize straight to JSON and can be compared with compare().
+"""
+import gc
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+
+from ..engine import CompiledAutomaton, run
+from ..engine.grading import equivalence
+from ..engine.minimize import minimize
+from . import generators
+
+# Sizes per scale. Full scale goes up to 10^5 DFA states and 2^15 DFA
+# states out of the subset construction.
+SCALES = {
+    'quick': {
+        'dfa_states': [1000, 10000],
+        'blowup': [6, 10],
+        'tm_length': [50, 100],
+        'ntm_length': [200, 1000],
+        'inputs': 100,
+        'input_length': 1000,
+    },
+    'full': {
+        'dfa_states': [1000, 10000, 100000],
+        'blowup': [6, 10, 14],
+        'tm_length': [100, 200, 400],
+        'ntm_length': [1000, 5000],
+        'inputs': 100,
+        'input_length': 10000,
+    },
+}
+
+# Long TM runs are the point, so the per-request caps are lifted
+BENCHMARK_ENGINE_SETTINGS = {
+    'TM_MAX_STEPS': 10 ** 7,
+    'TM_MAX_CONFIGURATIONS': 10 ** 7,
+    'TM_MAX_FRONTIER': 10 ** 7,
+    'TM_MEMORY_LIMIT': 4 * 1024 ** 3,
+}
+
+# Seconds spent repeating one operation before settling for fewer samples
+DEFAULT_BUDGET = 10.0
+
+
+def percentile(samples, fraction):
+    """
+    Nearest-rank percentile of sorted `samples`.
+    """
+    rank = max(int(-(-fraction * len(samples) // 1)), 1)
+    return samples[min(rank, len(samples)) - 1]
+
+
+def measure(fn, repeat, budget=DEFAULT_BUDGET):
+    """
+    (durations, peak_memory_bytes) for calling `fn`.
+    """
+    durations = []
+    spent = 0.0
+    gc.collect()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        durations.append(elapsed)
+        spent += elapsed
+        if spent >= budget:
+            break
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return durations, peak
+
+
+def summarize(durations, peak, items):
+    """
+    Timing statistics in milliseconds; throughput is items per second at
+    the median.
+    """
+    samples = sorted(durations)
+    p50 = percentile(samples, 0.5)
+    return {
+        'samples': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4),
+        'p50_ms': round(p50 * 1000, 4),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 4),
+        'min_ms': round(samples[0] * 1000, 4),
+        'max_ms': round(samples[-1] * 1000, 4),
+        'throughput': round(items / p50, 1) if p50 else None,
+        'peak_memory_bytes': peak,
+    }
+
+
+class Case:
+    """
+    One automaton and the operations timed on it. Operations are
+    (name, unit, items, fn) with `items` counted in `unit` for the
+    throughput figure.
+    """
+
+    def __init__(self, family, name, automata_type, automata_data, params):
+        self.family = family
+        self.name = name
+        self.automata_type = automata_type
+        self.automata_data = automata_data
+        self.params = params
+        self.operations = []
+
+    def add(self, name, unit, items, fn):
+        self.operations.append((name, unit, items, fn))
+
+    def compile(self):
+        return CompiledAutomaton.compile(self.automata_data, self.automata_type)
+
+
+def _finite_case(family, name, automata_type, automata_data, params, inputs, patch=False):
+    case = Case(family, name, automata_type, automata_data, params)
+    engine = case.compile()
+    states = len(automata_data['states'])
+    case.add('compile', 'states', states, case.compile)
+
+    longest = max(inputs, key=len)
+    case.add('simulate', 'symbols', len(longest), lambda: run(engine, longest))
+    case.add(
+        'batch', 'symbols', sum(map(len, inputs)),
+        lambda: [run(engine, value, trace=False) for value in inputs]
+    )
+
+    minimal = minimize(engine)
+    params['minimal_states'] = len(minimal['states'])
+    case.add('minimize', 'states', states, lambda: minimize(engine))
+    minimal_engine = CompiledAutomaton.compile(minimal, 'DFA')
+    case.add(
+        'equivalence', 'states', states,
+        lambda: equivalence(engine, minimal_engine, max_pairs=10 ** 7)
+    )
+
+    if patch:
+        transition = dict(automata_data['transitions'][0], id='benchmark')
+
+        def edit():
+            engine.add_transition('benchmark', transition)
+            engine.remove_transition('benchmark')
+        case.add('patch', 'edits', 2, edit)
+    return case
+
+
+def build_cases(scale, seed=0, only=None):
+    config = SCALES[scale]
+    families = set(only or ('dfa', 'nfa', 'tm'))
+    cases = []
+
+    if 'dfa' in families:
+        for n in config['dfa_states']:
+            inputs = generators.random_inputs('ab', config['inputs'], config['input_length'], seed)
+            cases.append(_finite_case(
+                'dfa', f"dense_dfa_{n}", 'DFA',
+                generators.dense_dfa(n, seed=seed),
+                {'states': n, 'alphabet': 2},
+                inputs, patch=True,
+            ))
+
+    if 'nfa' in families:
+        for k in config['blowup']:
+            pattern = generators.blowup_pattern(k)
+            data = generators.regex_nfa(pattern)
+            inputs = generators.random_inputs('ab', config['inputs'], config['input_length'], seed)
+            cases.append(_finite_case(
+                'nfa', f"blowup_nfa_{k}", 'NFA', data,
+                {'pattern': pattern, 'states': len(data['states'])},
+                inputs,
+            ))
+
+    if 'tm' in families:
+        for n in config['tm_length']:
+            case = Case('tm', f"sweeping_tm_{n}", 'TM', generators.sweeping_tm(), {'input_length': n})
+            engine = case.compile()
+            value = 'a' * n
+            steps = run(engine, value, trace=False)['search']['depth']
+            case.params['steps'] = steps
+            case.add('simulate', 'steps', steps, lambda engine=engine, value=value: run(engine, value))
+            cases.append(case)
+        for n in config['ntm_length']:
+            value = generators.thue_morse(n)
+            case = Case('tm', f"guessing_tm_{n}", 'TM', generators.guessing_tm(length=5), {'input_length': n})
+            engine = case.compile()
+            result = run(engine, value, trace=False)
+            search = result['search']
+            case.params.update(configurations=search['configurations'], accepted=result['isAccepted'])
+            case.add(
+                'simulate', 'configurations', search['configurations'],
+                lambda engine=engine, value=value: run(engine, value, trace=False)
+            )
+            cases.append(case)
+    return cases
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(scale='quick', repeat=5, seed=0, only=None, budget=DEFAULT_BUDGET, progress=None):
+    """
+    {'meta': ..., 'results': [...]} for every case and operation.
+    """
+    engine_settings = {**settings.SIMULATION_ENGINE, **BENCHMARK_ENGINE_SETTINGS}
+    results = []
+    with override_settings(SIMULATION_ENGINE=engine_settings):
+        for case in build_cases(scale, seed, only):
+            for name, unit, items, fn in case.operations:
+                durations, peak = measure(fn, repeat, budget)
+                result = {
+                    'case': case.name,
+                    'family': case.family,
+                    'operation': name,
+                    'params': case.params,
+                    'unit': unit,
+                    'items': items,
+                    **summarize(durations, peak, items),
+                }
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scale': scale,
+            'repeat': repeat,
+            'seed': seed,
+            'created_at': timezone.now().isoformat(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    """
+    p50 and peak memory of `current` relative to `baseline`, per case and
+    operation present in both. Ratios above 1 are slower or bigger.
+    """
+    previous = {(r['case'], r['operation']): r for r in baseline.get('results', [])}
+    changes = []
+    for result in current['results']:
+        before = previous.get((result['case'], result['operation']))
+        if before is None:
+            continue
+        changes.append({
+            'case': result['case'],
+            'operation': result['operation'],
+            'p50_ms': result['p50_ms'],
+            'baseline_p50_ms': before['p50_ms'],
+            'p50_ratio': round(result['p50_ms'] / before['p50_ms'], 3) if before['p50_ms'] else None,
+            'memory_ratio': (
+                round(result['peak_memory_bytes'] / before['peak_memory_bytes'], 3)
+                if before['peak_memory_bytes'] else None
+            ),
+        })
+    return changes
@@ -0,0 +1,42 @@
+"""
+Cache for public shared-session payloads.
+
+Entries hold the viewer-independent part of the `shared` response plus the
+values its ETag is built from, keyed by public_id. They are dropped from
+signals whenever the session or one of its runs is saved, and expire after
+SHARED_SESSION_CACHE['TIMEOUT'] seconds as a backstop.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def shared_session_key(public_id):
+    return f"simulations:shared:{public_id}"
+
+
+def get_shared_session(public_id):
+    return cache.get(shared_session_key(public_id))
+
+
+def set_shared_session(public_id, entry):
+    cache.set(
+        shared_session_key(public_id),
+        entry,
+        settings.SHARED_SESSION_CACHE['TIMEOUT']
+    )
+
+
+def invalidate_shared_session(public_id):
+    cache.delete(shared_session_key(public_id))
+
+
+async def aget_shared_session(public_id):
+    return await cache.aget(shared_session_key(public_id))
+
+
+async def aset_shared_session(public_id, entry):
+    await cache.aset(
+        shared_session_key(public_id),
+        entry,
+        settings.SHARED_SESSION_CACHE['TIMEOUT']
+    )
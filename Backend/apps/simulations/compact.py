@@ -0,0 +1,260 @@
+"""
+Compact, indexed encoding of automata_data.
+
+The editor's JSON repeats every key name per state and transition and
+spells out state ids in each transition. The compact form stores states
+and transitions column by column, with transition endpoints as indices
+into the state list and symbols as indices into one interned table:
+
+    {
+        "v": 1,
+        "symbols": ["a", "b"],
+        "alphabet": 2,                       # alphabet == symbols[:2]
+        "states": {
+            "n": 3,
+            "cols": {
+                "id": ["q0", "q1", "q2"],
+                "name": {"same": "id"},
+                "x": [100, 250, 400], ...
+            },
+            "absent": {}                     # field -> indices missing it
+        },
+        "transitions": {
+            "n": 4,
+            "cols": {
+                "from": {"ref": [0, 0, 1, 2]},  # -1: field absent
+                "to": {"ref": [1, 2, 2, 2]},
+                "symbol": {"sym": [0, 1, 0, 1]}, ...
+            },
+            "absent": {}
+        },
+        "extra": {...}                       # any other top-level keys
+    }
+
+decode(encode(data)) serializes to the same JSON as data for any JSON
+object (so False, 0 and 0.0 stay distinct); parts that don't fit
+the columnar shape (e.g. states given as plain strings) are kept verbatim
+under "extra". The msgpack-packed form is stored in
+SimulationSessions.automata_compact and served by `?format=compact`.
+"""
+import msgpack
+import orjson
+
+COMPACT_VERSION = 1
+
+# Transition fields holding state ids / symbols
+REF_FIELDS = ('from', 'to')
+SYMBOL_FIELDS = ('symbol', 'readSymbol', 'writeSymbol')
+
+
+class CompactError(ValueError):
+    pass
+
+
+def _is_table(value):
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def _column_key(column):
+    """
+    JSON form of a column for type-strict comparison (Python's == has
+    False == 0 == 0.0). None if orjson can't encode it, e.g. ints over
+    64 bits; such columns are never shared.
+    """
+    try:
+        return orjson.dumps(column)
+    except TypeError:
+        return None
+
+
+def _encode_table(items, encoders):
+    """
+    Column-wise encoding of a list of dicts. `encoders` maps a field to a
+    function returning an encoded column, or None to keep it as-is.
+    """
+    fields = []
+    seen = set()
+    for item in items:
+        for field in item:
+            if field not in seen:
+                seen.add(field)
+                fields.append(field)
+
+    cols = {}
+    absent = {}
+    keys = {}
+    for field in fields:
+        missing = [i for i, item in enumerate(items) if field not in item]
+        if missing:
+            absent[field] = missing
+        column = [item.get(field) for item in items]
+
+        encoder = encoders.get(field)
+        encoded = encoder(column, set(missing)) if encoder else None
+        if encoded is not None:
+            cols[field] = encoded
+            continue
+        # e.g. state names that repeat the ids
+        key = keys[field] = _column_key(column)
+        same = next(
+            (
+                other for other in fields[:fields.index(field)]
+                if key is not None and keys.get(other) == key
+                and absent.get(other) == absent.get(field)
+                and isinstance(cols[other], list)
+            ),
+            None
+        )
+        cols[field] = {'same': same} if same is not None else column
+
+    return {'n': len(items), 'cols': cols, 'absent': absent}
+
+
+def _decode_table(table, decoders):
+    n = table['n']
+    columns = {}
+    for field, column in table['cols'].items():
+        if isinstance(column, dict):
+            if 'same' in column:
+                column = columns[column['same']]
+            else:
+                kind, values = next(iter(column.items()))
+                column = decoders[kind](values)
+        if len(column) != n:
+            raise CompactError(f"Column '{field}' has {len(column)} values, expected {n}")
+        columns[field] = column
+
+    absent = {field: set(indices) for field, indices in table.get('absent', {}).items()}
+    items = []
+    for i in range(n):
+        item = {}
+        for field, column in columns.items():
+            if i not in absent.get(field, ()):
+                item[field] = column[i]
+        items.append(item)
+    return items
+
+
+def encode(data):
+    """
+    automata_data -> compact dict.
+    """
+    if not isinstance(data, dict):
+        raise CompactError('automata_data must be a JSON object')
+
+    compact = {'v': COMPACT_VERSION}
+    extra = {}
+
+    symbols = []
+    symbol_index = {}
+
+    def intern(symbol):
+        if symbol not in symbol_index:
+            symbol_index[symbol] = len(symbols)
+            symbols.append(symbol)
+        return symbol_index[symbol]
+
+    alphabet = data.get('alphabet')
+    if (
+        isinstance(alphabet, list) and
+        all(isinstance(symbol, str) for symbol in alphabet) and
+        len(set(alphabet)) == len(alphabet)
+    ):
+        for symbol in alphabet:
+            intern(symbol)
+        compact['alphabet'] = len(alphabet)
+    elif 'alphabet' in data:
+        extra['alphabet'] = alphabet
+
+    states = data.get('states')
+    state_index = None
+    if _is_table(states):
+        compact['states'] = _encode_table(states, {})
+        ids = [state.get('id') for state in states]
+        if (
+            all(isinstance(sid, str) for sid in ids) and
+            len(set(ids)) == len(ids)
+        ):
+            state_index = {sid: i for i, sid in enumerate(ids)}
+    elif 'states' in data:
+        extra['states'] = states
+
+    def ref_column(column, missing):
+        if state_index is None:
+            return None
+        values = [
+            -1 if i in missing else state_index.get(value) if isinstance(value, str) else None
+            for i, value in enumerate(column)
+        ]
+        if None in values:
+            return None
+        return {'ref': values}
+
+    def symbol_column(column, missing):
+        if not all(
+            isinstance(value, str) for i, value in enumerate(column) if i not in missing
+        ):
+            return None
+        return {'sym': [-1 if i in missing else intern(value) for i, value in enumerate(column)]}
+
+    transitions = data.get('transitions')
+    if _is_table(transitions):
+        encoders = {field: ref_column for field in REF_FIELDS}
+        encoders.update({field: symbol_column for field in SYMBOL_FIELDS})
+        compact['transitions'] = _encode_table(transitions, encoders)
+    elif 'transitions' in data:
+        extra['transitions'] = transitions
+
+    if symbols:
+        compact['symbols'] = symbols
+    for key, value in data.items():
+        if key not in ('alphabet', 'states', 'transitions'):
+            extra[key] = value
+    if extra:
+        compact['extra'] = extra
+    return compact
+
+
+def decode(compact):
+    """
+    Compact dict -> automata_data. Raises CompactError if malformed.
+    """
+    if not isinstance(compact, dict) or compact.get('v') != COMPACT_VERSION:
+        raise CompactError(f"Expected a compact automaton with v={COMPACT_VERSION}")
+
+    try:
+        symbols = compact.get('symbols', [])
+        data = {}
+        if 'alphabet' in compact:
+            data['alphabet'] = symbols[:compact['alphabet']]
+
+        state_ids = []
+        if 'states' in compact:
+            data['states'] = _decode_table(compact['states'], {})
+            state_ids = [state.get('id') for state in data['states']]
+
+        if 'transitions' in compact:
+            # -1 marks a transition without that field
+            data['transitions'] = _decode_table(compact['transitions'], {
+                'ref': lambda values: [state_ids[i] if i >= 0 else None for i in values],
+                'sym': lambda values: [symbols[i] if i >= 0 else None for i in values],
+            })
+
+        data.update(compact.get('extra', {}))
+    except (KeyError, IndexError, TypeError, AttributeError, StopIteration) as e:
+        raise CompactError(f"Malformed compact automaton: {e!r}")
+    return data
+
+
+def pack(data):
+    """
+    automata_data -> bytes for the automata_compact column.
+    """
+    return msgpack.packb(encode(data), use_bin_type=True)
+
+
+def unpack(blob):
+    """
+    automata_compact column -> compact dict.
+    """
+    return msgpack.unpackb(bytes(blob), raw=False, strict_map_key=False)
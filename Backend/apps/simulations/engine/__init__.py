@@ -0,0 +1,9 @@
+"""
+Server-side simulation engine: sessions compiled to an indexed table
+(compiled.py), run by runner.py, and cached per process with incremental
+patching on save (cache.py).
+"""
+from .cache import forget, get_engine, note_change
+from .compiled import CompiledAutomaton, EngineError
+from .runner import accepts, run
+
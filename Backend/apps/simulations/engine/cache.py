@@ -0,0 +1,135 @@
+"""
+Per-process cache of compiled automata, keyed by session id.
+
+Each entry remembers the session version it was compiled at. Saving a
+session patches its cached entry in place (note_change(), called from
+SimulationSessionsUpdateSerializer and update_automata_data()), so the
+next run starts from an up-to-date table without recompiling. An entry
+left behind by another worker's edit catches up from the stored revision
+deltas instead (or, if those were pruned, by syncing against the stored
+automata_data); only a cold cache or an automata_type change pays for a
+full compile.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from ..revisions import diff
+from .compiled import CompiledAutomaton, EngineError
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# session id -> (version, CompiledAutomaton), least recently used first
+_entries = OrderedDict()
+
+
+def _get(session_id):
+    with _lock:
+        entry = _entries.get(session_id)
+        if entry is not None:
+            _entries.move_to_end(session_id)
+        return entry
+
+
+def _put(session_id, version, engine):
+    with _lock:
+        _entries[session_id] = (version, engine)
+        _entries.move_to_end(session_id)
+        while len(_entries) > settings.SIMULATION_ENGINE['CACHE_SIZE']:
+            _entries.popitem(last=False)
+
+
+def forget(session_id):
+    with _lock:
+        _entries.pop(session_id, None)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def _catch_up(engine, session, version):
+    """
+    Replay stored revisions after `version` onto `engine`; snapshots are
+    synced rather than rebuilt. False if a revision is missing or can't
+    be replayed; the caller then syncs against the current data.
+    """
+    from ..models import SessionRevision
+
+    revisions = list(
+        SessionRevision.objects.filter(
+            session_id=session.pk,
+            version__gt=version,
+            version__lte=session.version
+        ).order_by('version').values_list('version', 'kind', 'data')
+    )
+    if [revision[0] for revision in revisions] != list(range(version + 1, session.version + 1)):
+        return False
+    for _, kind, data in revisions:
+        if kind == SessionRevision.KIND_SNAPSHOT:
+            engine.sync(data)
+            continue
+        try:
+            engine.apply_delta(data)
+        except EngineError:
+            return False
+    return True
+
+
+def get_engine(session):
+    """
+    CompiledAutomaton for `session` at its current version. Hold its
+    `lock` while using it.
+    """
+    entry = _get(session.pk)
+    if entry is not None:
+        version, engine = entry
+        if engine.automata_type == session.automata_type and version <= session.version:
+            if version == session.version:
+                return engine
+            with engine.lock:
+                try:
+                    if not _catch_up(engine, session, version):
+                        engine.sync(session.automata_data)
+                    _put(session.pk, session.version, engine)
+                    return engine
+                except (EngineError, KeyError) as e:
+                    logger.warning(f"Recompiling session {session.pk}: {e!r}")
+
+    engine = CompiledAutomaton.compile(session.automata_data, session.automata_type)
+    _put(session.pk, session.version, engine)
+    return engine
+
+
+def note_change(session, previous_version, previous_data, delta=None):
+    """
+    `session` was saved at a new version; patch its cached engine if it
+    was at `previous_version`. `delta` is diff(previous_data, new data)
+    when the caller already has it.
+    """
+    entry = _get(session.pk)
+    if entry is None:
+        return
+    version, engine = entry
+    if version != previous_version or engine.automata_type != session.automata_type:
+        forget(session.pk)
+        return
+
+    with engine.lock:
+        try:
+            if delta is None:
+                delta = diff(previous_data, session.automata_data)
+            try:
+                engine.apply_delta(delta)
+            except EngineError:
+                # States or transitions without ids: compare against the data
+                engine.sync(session.automata_data)
+        except (EngineError, KeyError) as e:
+            logger.warning(f"Dropping compiled session {session.pk}: {e!r}")
+            forget(session.pk)
+            return
+    _put(session.pk, session.version, engine)
@@ -0,0 +1,457 @@
+"""
+Compiled form of a session's automaton.
+
+States are numbered densely (a removed state's slot is reused by the next
+added one) and transitions are indexed by source state and symbol:
+
+    delta[s][symbol] -> {transition key: target}   (epsilon moves under EPSILON)
+    incoming[t]      -> {transition key: source}
+
+Transition keys are the editor's transition ids, or "#<position>" for
+payloads without unique ids. Each key also has a rank that orders it like
+the editor's transitions list, so a "DFA" with several transitions on one
+symbol picks the same one (the first listed) however the table was built.
+A transition whose endpoint doesn't exist
+(yet) is kept aside and attached when that state is added, so patching
+and compiling from scratch always agree.
+
+Next to the table the automaton tracks two state sets:
+
+- reachable: states reachable from an initial state;
+- live: states from which a final state is reachable. The rest are dead:
+  no run that enters only dead states can still accept.
+
+Every edit (add/remove a state or transition, flip a flag) touches only
+the table entries involved. Additions grow reachable/live with a search
+from the new edge or state that visits only newly reached states.
+Removals can't be handled that cheaply in general (a cycle may have kept
+a state reachable only through itself), so they mark the set stale and it
+is recomputed on the next read; runs themselves only need the table.
+
+apply_delta() replays a revisions.diff() delta and sync() diffs against
+new automata_data directly; both go through the same edit operations.
+"""
+import threading
+from collections import deque
+from typing import NamedTuple, Optional
+
+from ..automata import EPSILON_SYMBOLS, state_id, transition_symbol
+
+# delta key for epsilon moves
+EPSILON = None
+
+# Transition fields the engine reads; edits to anything else (label, ...)
+# leave the table untouched
+TRANSITION_FIELDS = ('from', 'to', 'symbol', 'readSymbol', 'writeSymbol', 'direction')
+
+
+class EngineError(ValueError):
+    pass
+
+
+class Transition(NamedTuple):
+    source: Optional[str]
+    target: Optional[str]
+    symbol: Optional[str]      # EPSILON for epsilon moves
+    write: Optional[str]       # TM only
+    move: Optional[str]        # TM only: 'L', 'R' or 'S'
+    data: dict                 # the editor's transition, for traces
+
+
+def _transition_keys(transitions):
+    """
+    Keys for a transitions list: ids when they are unique strings.
+    """
+    ids = [t.get('id') if isinstance(t, dict) else None for t in transitions]
+    if all(isinstance(tid, str) for tid in ids) and len(set(ids)) == len(ids):
+        return ids
+    return [f"#{i}" for i in range(len(transitions))]
+
+
+def _state_flags(state):
+    if isinstance(state, dict):
+        return bool(state.get('isInitial')), bool(state.get('isFinal'))
+    return False, False
+
+
+class CompiledAutomaton:
+    """
+    Mutable compiled automaton; see the module docstring. `lock` must be
+    held while patching or running it from several threads.
+    """
+
+    def __init__(self, automata_type):
+        self.automata_type = automata_type
+        self.lock = threading.RLock()
+
+        self.state_ids = []     # slot -> id (None when free)
+        self.index = {}         # id -> slot
+        self.free = []
+        self.delta = []
+        self.incoming = []
+        self.initial = set()
+        self.finals = set()
+        self.alphabet = []
+
+        self.transitions = {}   # key -> Transition
+        self.rank = {}          # key -> position-like order in the editor's list
+        self._next_rank = 0
+        self.attached = set()
+        self.pending = {}       # missing state id -> {key}
+
+        self._reachable = set()
+        self._live = set()
+        self._reachable_stale = False
+        self._live_stale = False
+
+    def __getstate__(self):
+        # Sent to grading workers; locks don't pickle
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    @classmethod
+    def compile(cls, automata_data, automata_type):
+        engine = cls(automata_type)
+        # Searched once on first read instead of edge by edge
+        engine._reachable_stale = engine._live_stale = True
+        engine.load(automata_data)
+        return engine
+
+    def load(self, automata_data):
+        alphabet = automata_data.get('alphabet')
+        self.alphabet = list(alphabet) if isinstance(alphabet, list) else []
+        for state in automata_data.get('states') or []:
+            sid = state_id(state)
+            if sid not in self.index:
+                self.add_state(sid, *_state_flags(state))
+        transitions = [
+            t for t in automata_data.get('transitions') or [] if isinstance(t, dict)
+        ]
+        for key, transition in zip(_transition_keys(transitions), transitions):
+            self.add_transition(key, transition)
+
+    # Queries
+    @property
+    def size(self):
+        return len(self.index)
+
+    @property
+    def is_deterministic(self):
+        for slot in self.index.values():
+            for symbol, targets in self.delta[slot].items():
+                if symbol is EPSILON or len(targets) > 1:
+                    return False
+        return len(self.initial) <= 1
+
+    def first_move(self, moves):
+        """
+        (key, target) of the first listed transition among `moves`, a
+        delta[slot][symbol] dict.
+        """
+        if len(moves) == 1:
+            return next(iter(moves.items()))
+        rank = self.rank
+        return min(moves.items(), key=lambda move: rank[move[0]])
+
+    @property
+    def reachable(self):
+        if self._reachable_stale:
+            self._reachable = set()
+            self._search(self.initial, self._reachable, forward=True)
+            self._reachable_stale = False
+        return self._reachable
+
+    @property
+    def live(self):
+        if self._live_stale:
+            self._live = set()
+            self._search(self.finals, self._live, forward=False)
+            self._live_stale = False
+        return self._live
+
+    @property
+    def dead_states(self):
+        live = self.live
+        return sorted(sid for sid, slot in self.index.items() if slot not in live)
+
+    @property
+    def unreachable_states(self):
+        reachable = self.reachable
+        return sorted(sid for sid, slot in self.index.items() if slot not in reachable)
+
+    def _search(self, roots, seen, forward):
+        """
+        Add everything reachable from `roots` (backwards if not `forward`)
+        to `seen`; states already in it are not revisited.
+        """
+        edges = self.delta if forward else self.incoming
+        queue = deque(slot for slot in roots if slot not in seen)
+        seen.update(queue)
+        while queue:
+            slot = queue.popleft()
+            if forward:
+                neighbours = (t for targets in edges[slot].values() for t in targets.values())
+            else:
+                neighbours = edges[slot].values()
+            for neighbour in neighbours:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+
+    def _grow_reachable(self, slot):
+        if not self._reachable_stale:
+            self._search([slot], self._reachable, forward=True)
+
+    def _grow_live(self, slot):
+        if not self._live_stale:
+            self._search([slot], self._live, forward=False)
+
+    # States
+    def add_state(self, sid, initial=False, final=False):
+        if sid in self.index:
+            raise EngineError(f"Duplicate state {sid!r}")
+        if self.free:
+            slot = self.free.pop()
+            self.state_ids[slot] = sid
+        else:
+            slot = len(self.state_ids)
+            self.state_ids.append(sid)
+            self.delta.append(None)
+            self.incoming.append(None)
+        self.delta[slot] = {}
+        self.incoming[slot] = {}
+        self.index[sid] = slot
+
+        self.set_flags(sid, initial, final)
+        for key in self.pending.pop(sid, ()):
+            self._attach(key)
+        return slot
+
+    def remove_state(self, sid):
+        slot = self.index.get(sid)
+        if slot is None:
+            raise EngineError(f"Unknown state {sid!r}")
+        # Its transitions stay known, waiting for the state to come back
+        keys = [key for targets in self.delta[slot].values() for key in targets]
+        keys.extend(self.incoming[slot])
+        detached = [key for key in dict.fromkeys(keys) if key in self.attached]
+        for key in detached:
+            self._detach(key)
+        del self.index[sid]
+        for key in detached:
+            self._park(key)
+
+        self.initial.discard(slot)
+        self.finals.discard(slot)
+        if slot in self._reachable:
+            self._reachable.discard(slot)
+            self._reachable_stale = True
+        if slot in self._live:
+            self._live.discard(slot)
+            self._live_stale = True
+        self.state_ids[slot] = None
+        self.delta[slot] = self.incoming[slot] = None
+        self.free.append(slot)
+
+    def set_flags(self, sid, initial, final):
+        slot = self.index.get(sid)
+        if slot is None:
+            raise EngineError(f"Unknown state {sid!r}")
+        if initial and slot not in self.initial:
+            self.initial.add(slot)
+            self._grow_reachable(slot)
+        elif not initial and slot in self.initial:
+            self.initial.discard(slot)
+            self._reachable_stale = True
+        if final and slot not in self.finals:
+            self.finals.add(slot)
+            self._grow_live(slot)
+        elif not final and slot in self.finals:
+            self.finals.discard(slot)
+            self._live_stale = True
+
+    # Transitions
+    def add_transition(self, key, transition, rank=None):
+        """
+        Add a transition, by default after every existing one in order.
+        """
+        if key in self.transitions:
+            raise EngineError(f"Duplicate transition {key!r}")
+        if rank is None:
+            rank = self._next_rank
+        self.rank[key] = rank
+        self._next_rank = max(self._next_rank, rank + 1)
+        symbol = transition_symbol(transition, self.automata_type)
+        if self.automata_type != 'TM' and symbol in EPSILON_SYMBOLS:
+            symbol = EPSILON
+        self.transitions[key] = Transition(
+            transition.get('from'),
+            transition.get('to'),
+            symbol,
+            transition.get('writeSymbol'),
+            transition.get('direction'),
+            transition,
+        )
+        self._attach(key)
+
+    def remove_transition(self, key):
+        if key not in self.transitions:
+            raise EngineError(f"Unknown transition {key!r}")
+        if key in self.attached:
+            self._detach(key)
+        else:
+            self._unpark(key)
+        del self.transitions[key]
+        del self.rank[key]
+
+    def _reorder(self, keys):
+        """
+        Rank transitions by their position in `keys` (all current keys).
+        """
+        self.rank = {key: position for position, key in enumerate(keys)}
+        self._next_rank = len(self.rank)
+
+    def _attach(self, key):
+        transition = self.transitions[key]
+        source = self.index.get(transition.source)
+        target = self.index.get(transition.target)
+        if source is None or target is None:
+            self._park(key)
+            return
+        self.delta[source].setdefault(transition.symbol, {})[key] = target
+        self.incoming[target][key] = source
+        self.attached.add(key)
+
+        if source in self._reachable and target not in self._reachable:
+            self._grow_reachable(target)
+        if target in self._live and source not in self._live:
+            self._grow_live(source)
+
+    def _detach(self, key):
+        transition = self.transitions[key]
+        source = self.index[transition.source]
+        target = self.index[transition.target]
+        targets = self.delta[source][transition.symbol]
+        del targets[key]
+        if not targets:
+            del self.delta[source][transition.symbol]
+        del self.incoming[target][key]
+        self.attached.discard(key)
+
+        # The edge may have been what kept these in the sets
+        if source in self._reachable and target not in self.initial:
+            self._reachable_stale = True
+        if target in self._live and source not in self.finals:
+            self._live_stale = True
+
+    def _park(self, key):
+        # Filed under one missing endpoint; _attach re-parks it under the
+        # other if that is missing too when the first one turns up
+        transition = self.transitions[key]
+        sid = transition.source if transition.source not in self.index else transition.target
+        self.pending.setdefault(sid, set()).add(key)
+
+    def _unpark(self, key):
+        transition = self.transitions[key]
+        for sid in (transition.source, transition.target):
+            waiting = self.pending.get(sid)
+            if waiting is not None:
+                waiting.discard(key)
+                if not waiting:
+                    del self.pending[sid]
+
+    def _replace_transition(self, key, transition):
+        current = self.transitions[key].data
+        if any(current.get(f) != transition.get(f) for f in TRANSITION_FIELDS):
+            rank = self.rank[key]
+            self.remove_transition(key)
+            self.add_transition(key, transition, rank)
+        else:
+            # Label-only edit: keep the table, refresh what traces show
+            self.transitions[key] = self.transitions[key]._replace(data=transition)
+
+    # Patching
+    def apply_delta(self, delta):
+        """
+        Apply a revisions.diff() delta. Raises EngineError when the delta
+        rewrites states or transitions wholesale (unkeyed lists); compile
+        from scratch instead.
+        """
+        changed = delta.get('set', {})
+        if {'states', 'transitions'} & (changed.keys() | set(delta.get('unset', ()))):
+            raise EngineError('States or transitions were replaced wholesale')
+        if 'alphabet' in changed:
+            alphabet = changed['alphabet']
+            self.alphabet = list(alphabet) if isinstance(alphabet, list) else []
+        elif 'alphabet' in delta.get('unset', ()):
+            self.alphabet = []
+
+        lists = delta.get('lists', {})
+        states = lists.get('states', {})
+        transitions = lists.get('transitions', {})
+
+        # Transitions first so removed states have none left to park
+        for key in transitions.get('remove', ()):
+            self.remove_transition(key)
+        for sid in states.get('remove', ()):
+            self.remove_state(sid)
+
+        for sid, fields in states.get('update', {}).items():
+            if {'isInitial', 'isFinal'} & fields.keys():
+                slot = self.index[sid]
+                self.set_flags(
+                    sid,
+                    bool(fields.get('isInitial', slot in self.initial)),
+                    bool(fields.get('isFinal', slot in self.finals)),
+                )
+        for sid, state in states.get('replace', {}).items():
+            self.set_flags(sid, *_state_flags(state))
+        for state in states.get('add', ()):
+            self.add_state(state_id(state), *_state_flags(state))
+
+        for key, fields in transitions.get('update', {}).items():
+            self._replace_transition(key, {**self.transitions[key].data, **fields})
+        for key, transition in transitions.get('replace', {}).items():
+            self._replace_transition(key, transition)
+        for transition in transitions.get('add', ()):
+            self.add_transition(transition['id'], transition)
+        # Without 'order', removals and appended additions kept the order
+        if 'order' in transitions:
+            self._reorder(transitions['order'])
+
+    def sync(self, automata_data):
+        """
+        Bring the engine in line with `automata_data`, editing only what
+        differs. Costs a scan of the data but no rebuild.
+        """
+        alphabet = automata_data.get('alphabet')
+        self.alphabet = list(alphabet) if isinstance(alphabet, list) else []
+
+        states = {}
+        for state in automata_data.get('states') or []:
+            states.setdefault(state_id(state), _state_flags(state))
+        transitions = [
+            t for t in automata_data.get('transitions') or [] if isinstance(t, dict)
+        ]
+        transitions = dict(zip(_transition_keys(transitions), transitions))
+
+        for key in [key for key in self.transitions if key not in transitions]:
+            self.remove_transition(key)
+        for sid in [sid for sid in self.index if sid not in states]:
+            self.remove_state(sid)
+        for sid, flags in states.items():
+            if sid in self.index:
+                self.set_flags(sid, *flags)
+            else:
+                self.add_state(sid, *flags)
+        for key, transition in transitions.items():
+            if key in self.transitions:
+                self._replace_transition(key, transition)
+            else:
+                self.add_transition(key, transition)
+        self._reorder(transitions)
@@ -0,0 +1,169 @@
+"""
+Grading submissions against a reference automaton.
+
+Finite automata are checked for language equivalence by a breadth-first
+walk of the product of their subset constructions (over live states, see
+runner.step_subset), so the counterexample found is a shortest one.
+Turing machines can't be compared that way and are graded on the test
+vectors only.
+
+grade_all() fans submissions out over a process pool. The compiled
+reference is sent to each worker once, in the pool initializer; the
+workers never touch the database.
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .compiled import CompiledAutomaton, EngineError
+from .runner import input_alphabet, run, start_subset, step_subset
+
+FINITE_TYPES = ('DFA', 'NFA', 'REGEX')
+
+# Failed test vectors listed per submission
+MAX_REPORTED_FAILURES = 10
+
+
+def equivalence(reference, submission, max_pairs):
+    """
+    (equivalent, counterexample). `equivalent` is None when more than
+    `max_pairs` product states would be needed.
+    """
+    alphabet = input_alphabet(reference, submission)
+    start = (start_subset(reference), start_subset(submission))
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        left, right = pair
+        if bool(left & reference.finals) != bool(right & submission.finals):
+            symbols = []
+            while parents[pair] is not None:
+                pair, symbol = parents[pair]
+                symbols.append(symbol)
+            return False, ''.join(reversed(symbols))
+
+        for symbol in alphabet:
+            following = (
+                step_subset(reference, left, symbol),
+                step_subset(submission, right, symbol)
+            )
+            if following not in parents:
+                if len(parents) >= max_pairs:
+                    return None, None
+                parents[following] = (pair, symbol)
+                queue.append(following)
+    return True, None
+
+
+def expected_results(reference, tests):
+    """
+    Normalize test vectors to [(input, expected)], taking the reference's
+    verdict where none is given. Inputs the reference can't decide (TM
+    caps) get expected None and are skipped.
+    """
+    vectors = []
+    for test in tests:
+        if isinstance(test, str):
+            test = {'input': test}
+        expected = test.get('expected')
+        if expected is None:
+            result = run(reference, test['input'], trace=False)
+            decided = result.get('search', {}).get('limit') is None
+            expected = result['isAccepted'] if decided else None
+        vectors.append((test['input'], expected))
+    return vectors
+
+
+def grade(reference, submission, vectors, check_equivalence=True, max_pairs=100000):
+    """
+    Verdict for one compiled submission.
+    """
+    verdict = {}
+    if check_equivalence and (
+        reference.automata_type in FINITE_TYPES and
+        submission.automata_type in FINITE_TYPES
+    ):
+        equivalent, counterexample = equivalence(reference, submission, max_pairs)
+        verdict['equivalent'] = equivalent
+        if equivalent is False:
+            verdict['counterexample'] = {
+                'input': counterexample,
+                'expected': run(reference, counterexample, trace=False)['isAccepted'],
+            }
+        elif equivalent is None:
+            verdict['limit'] = 'product'
+
+    passed = 0
+    total = 0
+    failures = []
+    for value, expected in vectors:
+        if expected is None:
+            continue
+        total += 1
+        result = run(submission, value, trace=False)
+        if result['isAccepted'] == expected:
+            passed += 1
+        elif len(failures) < MAX_REPORTED_FAILURES:
+            failure = {'input': value, 'expected': expected, 'actual': result['isAccepted']}
+            if result.get('search', {}).get('limit'):
+                failure['limit'] = result['search']['limit']
+            failures.append(failure)
+    if vectors:
+        verdict['tests'] = {'passed': passed, 'total': total, 'failures': failures}
+    return verdict
+
+
+# Process pool
+_worker = {}
+
+
+def _init_worker(reference, vectors, check_equivalence, max_pairs):
+    _worker.update(
+        reference=reference,
+        vectors=vectors,
+        check_equivalence=check_equivalence,
+        max_pairs=max_pairs,
+    )
+
+
+def _grade_submission(submission):
+    """
+    Worker entry point: submission is (key, automata_type, automata_data).
+    """
+    key, automata_type, automata_data = submission
+    try:
+        compiled = CompiledAutomaton.compile(automata_data, automata_type)
+        verdict = grade(
+            _worker['reference'], compiled, _worker['vectors'],
+            _worker['check_equivalence'], _worker['max_pairs']
+        )
+    except (EngineError, TypeError, AttributeError, KeyError) as e:
+        verdict = {'error': f"Could not grade: {e}"}
+    return key, verdict
+
+
+def grade_all(reference, submissions, vectors, check_equivalence=True,
+              max_pairs=100000, workers=1, chunk_size=8, start_method='spawn'):
+    """
+    Yield (key, verdict) for each (key, automata_type, automata_data) in
+    `submissions`, in order. With workers <= 1 everything runs inline.
+    """
+    init_args = (reference, vectors, check_equivalence, max_pairs)
+    if workers <= 1:
+        _init_worker(*init_args)
+        for submission in submissions:
+            yield _grade_submission(submission)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_worker,
+        initargs=init_args,
+    )
+    try:
+        yield from executor.map(_grade_submission, submissions, chunksize=chunk_size)
+    finally:
+        # Also reached when the client stops reading the stream
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,159 @@
+"""
+Minimal DFA for a compiled finite automaton.
+
+determinize() runs the subset construction from the start subset over
+live states only (runner.step_subset), so every DFA state it produces can
+still accept and missing transitions mean reject. minimize() then merges
+equivalent states with Hopcroft's partition refinement, treating missing
+transitions as going to an implicit sink, and returns editor-shaped
+automata_data with states numbered in breadth-first order. Equal
+languages therefore give identical output.
+"""
+from collections import deque
+
+from .compiled import EngineError
+from .runner import input_alphabet, start_subset, step_subset
+
+
+def determinize(engine, max_states=None):
+    """
+    (alphabet, table, finals): table[i] maps symbol -> j for DFA state i
+    (0 is the start), finals is a set of states. Empty when the automaton
+    accepts nothing.
+    """
+    if engine.automata_type == 'TM':
+        raise EngineError('Turing machines cannot be minimized')
+    alphabet = input_alphabet(engine)
+    start = start_subset(engine)
+    if not start:
+        return alphabet, [], set()
+
+    index = {start: 0}
+    subsets = [start]
+    table = []
+    finals = set()
+    for i, subset in enumerate(subsets):
+        if subset & engine.finals:
+            finals.add(i)
+        row = {}
+        for symbol in alphabet:
+            target = step_subset(engine, subset, symbol)
+            if not target:
+                continue
+            j = index.get(target)
+            if j is None:
+                if max_states is not None and len(subsets) >= max_states:
+                    raise EngineError(f"More than {max_states} DFA states")
+                j = index[target] = len(subsets)
+                subsets.append(target)
+            row[symbol] = j
+        table.append(row)
+    return alphabet, table, finals
+
+
+def _hopcroft(n, alphabet, table, finals):
+    """
+    Block number of each of the n states (plus the sink at index n).
+    """
+    sink = n
+    inverse = {symbol: [[] for _ in range(n + 1)] for symbol in alphabet}
+    for source, row in enumerate(table):
+        for symbol in alphabet:
+            inverse[symbol][row.get(symbol, sink)].append(source)
+    for symbol in alphabet:
+        inverse[symbol][sink].append(sink)
+
+    accepting = set(finals)
+    rejecting = set(range(n + 1)) - accepting
+    blocks = [block for block in (accepting, rejecting) if block]
+    block_of = [0] * (n + 1)
+    for b, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = b
+
+    smaller = min(range(len(blocks)), key=lambda b: len(blocks[b]))
+    work = deque((smaller, symbol) for symbol in alphabet)
+    while work:
+        splitter, symbol = work.popleft()
+        predecessors = set()
+        for state in blocks[splitter]:
+            predecessors.update(inverse[symbol][state])
+
+        touched = {}
+        for state in predecessors:
+            touched.setdefault(block_of[state], set()).add(state)
+        for b, inside in touched.items():
+            block = blocks[b]
+            if len(inside) == len(block):
+                continue
+            outside = block - inside
+            # Keep the larger half in place, split off the smaller
+            moved, kept = (inside, outside) if len(inside) <= len(outside) else (outside, inside)
+            blocks[b] = kept
+            new = len(blocks)
+            blocks.append(moved)
+            for state in moved:
+                block_of[state] = new
+            for other in alphabet:
+                work.append((new, other))
+    return block_of
+
+
+def minimize(engine, max_states=None):
+    """
+    automata_data of the minimal (partial) DFA accepting engine's language.
+    """
+    alphabet, table, finals = determinize(engine, max_states)
+    n = len(table)
+    if not n:
+        return {
+            'alphabet': alphabet,
+            'states': [_state('m0', initial=True, final=False)],
+            'transitions': [],
+        }
+
+    block_of = _hopcroft(n, alphabet, table, finals)
+    sink_block = block_of[n]
+
+    # Number blocks breadth-first from the start for a canonical result
+    representative = {}
+    for state in range(n):
+        representative.setdefault(block_of[state], state)
+    order = {block_of[0]: 0}
+    queue = deque([block_of[0]])
+    transitions = []
+    while queue:
+        block = queue.popleft()
+        row = table[representative[block]]
+        for symbol in alphabet:
+            if symbol not in row or block_of[row[symbol]] == sink_block:
+                continue
+            target = block_of[row[symbol]]
+            if target not in order:
+                order[target] = len(order)
+                queue.append(target)
+            transitions.append((order[block], symbol, order[target]))
+
+    final_blocks = {block_of[state] for state in finals}
+    states = [None] * len(order)
+    for block, number in order.items():
+        states[number] = _state(f"m{number}", number == 0, block in final_blocks)
+    return {
+        'alphabet': alphabet,
+        'states': states,
+        'transitions': [
+            {'id': f"t{i}", 'from': f"m{source}", 'to': f"m{target}", 'symbol': symbol}
+            for i, (source, symbol, target) in enumerate(transitions)
+        ],
+    }
+
+
+def _state(sid, initial, final):
+    return {
+        'id': sid,
+        'name': sid,
+        'x': 0,
+        'y': 0,
+        'isInitial': initial,
+        'isFinal': final,
+    }
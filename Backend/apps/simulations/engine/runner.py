@@ -0,0 +1,188 @@
+"""
+Runs of compiled automata. Finite automata (DFA, NFA, REGEX) are run
+here; Turing machines by the configuration search in turing.py.
+
+run() returns the frontend SimulationEngine's result shape ({input,
+steps, isAccepted, executionTime} with executionTime in ms), so runs look
+the same whichever side computed them. NFAs also follow epsilon moves,
+which the frontend doesn't. accepts() skips the trace and gives up as
+soon as only dead states are left.
+
+A "DFA" with several transitions on one symbol follows the first one in
+the editor's list (CompiledAutomaton.first_move), whether the engine was
+compiled fresh or patched.
+"""
+import time
+
+from . import turing
+from .compiled import EPSILON
+
+
+def _closure(engine, slots):
+    closure = set(slots)
+    stack = list(closure)
+    while stack:
+        slot = stack.pop()
+        for target in engine.delta[slot].get(EPSILON, {}).values():
+            if target not in closure:
+                closure.add(target)
+                stack.append(target)
+    return closure
+
+
+def _move(engine, slots, symbol):
+    targets = set()
+    for slot in slots:
+        moves = engine.delta[slot].get(symbol)
+        if moves:
+            targets.update(moves.values())
+    return _closure(engine, targets)
+
+
+def _step(number, current, remaining, accepted=False, transition=None):
+    step = {
+        'step': number,
+        'currentState': current,
+        'remainingInput': remaining,
+        'isAccepted': accepted,
+    }
+    if transition is not None:
+        step['transition'] = transition
+    return step
+
+
+def _run_dfa(engine, input_string):
+    # Like the editor: the first matching transition wins
+    current = min(engine.initial)
+    name = engine.state_ids
+    steps = [_step(0, name[current], input_string)]
+    consumed = 0
+    for i, symbol in enumerate(input_string):
+        moves = engine.delta[current].get(symbol)
+        if not moves:
+            steps.append(_step(len(steps), name[current], input_string[i + 1:]))
+            break
+        key, current = engine.first_move(moves)
+        consumed = i + 1
+        steps.append(_step(
+            len(steps), name[current], input_string[consumed:],
+            transition=engine.transitions[key].data
+        ))
+
+    accepted = current in engine.finals and consumed == len(input_string)
+    steps.append(_step(len(steps), name[current], input_string[consumed:], accepted))
+    return steps, accepted
+
+
+def _run_nfa(engine, input_string):
+    def label(slots):
+        return ', '.join(engine.state_ids[slot] for slot in sorted(slots))
+
+    current = _closure(engine, engine.initial)
+    steps = [_step(0, label(current), input_string)]
+    consumed = 0
+    for i, symbol in enumerate(input_string):
+        targets = _move(engine, current, symbol)
+        if not targets:
+            steps.append(_step(len(steps), label(current), input_string[i + 1:]))
+            break
+        current = targets
+        consumed = i + 1
+        steps.append(_step(len(steps), label(current), input_string[consumed:]))
+
+    accepted = bool(current & engine.finals) and consumed == len(input_string)
+    steps.append(_step(len(steps), label(current), input_string[consumed:], accepted))
+    return steps, accepted
+
+
+def run(engine, input_string, trace=True):
+    """
+    Simulate `input_string`. Without `trace` only input and isAccepted
+    are returned (plus the search statistics for TMs).
+    """
+    if engine.automata_type == 'TM':
+        return turing.search(engine, input_string, with_trace=trace)
+    if not trace:
+        return {'input': input_string, 'isAccepted': accepts(engine, input_string)}
+
+    start = time.perf_counter()
+    if not engine.initial:
+        steps = [_step(0, 'No initial state', input_string)]
+        accepted = False
+    elif engine.automata_type == 'DFA':
+        steps, accepted = _run_dfa(engine, input_string)
+    else:
+        steps, accepted = _run_nfa(engine, input_string)
+
+    return {
+        'input': input_string,
+        'steps': steps,
+        'isAccepted': accepted,
+        'executionTime': (time.perf_counter() - start) * 1000,
+    }
+
+
+def accepts(engine, input_string):
+    """
+    Acceptance only; agrees with run()['isAccepted'].
+    """
+    if engine.automata_type == 'TM':
+        return turing.search(engine, input_string, with_trace=False)['isAccepted']
+    if not engine.initial:
+        return False
+
+    live = engine.live
+    if engine.automata_type == 'DFA':
+        current = min(engine.initial)
+        for symbol in input_string:
+            if current not in live:
+                return False
+            moves = engine.delta[current].get(symbol)
+            if not moves:
+                return False
+            current = engine.first_move(moves)[1]
+        return current in engine.finals
+
+    current = _closure(engine, engine.initial) & live
+    for symbol in input_string:
+        if not current:
+            return False
+        current = _move(engine, current, symbol) & live
+    return bool(current & engine.finals)
+
+
+# Subset construction over live states, shared by equivalence checks and
+# minimization. Dropping dead states keeps the subsets small and changes
+# no verdict; the empty subset is the implicit reject state.
+def start_subset(engine):
+    if not engine.initial:
+        return frozenset()
+    if engine.automata_type == 'DFA':
+        return frozenset([min(engine.initial)]) & engine.live
+    return frozenset(_closure(engine, engine.initial) & engine.live)
+
+
+def step_subset(engine, subset, symbol):
+    if engine.automata_type == 'DFA':
+        # First matching transition, as in _run_dfa
+        targets = set()
+        for slot in subset:
+            moves = engine.delta[slot].get(symbol)
+            if moves:
+                targets.add(engine.first_move(moves)[1])
+        return frozenset(targets & engine.live)
+    return frozenset(_move(engine, subset, symbol) & engine.live)
+
+
+def input_alphabet(*engines):
+    """
+    Single-character symbols the automata can read; inputs are read one
+    character at a time, so longer symbols never match.
+    """
+    symbols = set()
+    for engine in engines:
+        for key in engine.attached:
+            symbol = engine.transitions[key].symbol
+            if isinstance(symbol, str) and len(symbol) == 1:
+                symbols.add(symbol)
+    return sorted(symbols)
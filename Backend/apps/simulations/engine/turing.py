@@ -0,0 +1,246 @@
+"""
+Breadth-first search over Turing machine configurations.
+
+Every transition matching the scanned symbol is followed, so
+nondeterministic machines work and deterministic ones behave like the
+editor's simulator (blank 'B', a left move at cell 0 stays put, halting
+in a final state accepts). The input is accepted as soon as any branch
+reaches a final state, and that branch's steps are returned.
+
+A configuration is (state slot, head, tape) with the tape encoded as
+bytes, one interned symbol per cell and trailing blanks stripped, so
+equal configurations reached along different branches (or by a loop)
+hash equal and are expanded once. The search stops, undecided, at the
+first of SIMULATION_ENGINE's TM caps: steps (depth), visited
+configurations, frontier width, or the estimated memory of the visited
+set.
+
+The returned trace counts against the same memory limit. When a full
+tape per step would not fit in what the search left over, each step
+carries only TM_TRACE_WINDOW cells either side of the head, starting at
+cell `tapeOffset`.
+"""
+import time
+
+from django.conf import settings
+
+from .compiled import EngineError
+
+BLANK = 'B'
+
+# Rough bytes per visited configuration besides its tape: the dict entry,
+# key tuple, parent link and bytes object header
+CONFIGURATION_OVERHEAD = 200
+
+# Rough bytes per tape cell in a trace step (list slot and JSON output)
+TRACE_CELL_BYTES = 16
+
+MOVES = {'L': -1, 'R': 1}
+
+
+class _Tapes:
+    """
+    Interning of tape symbols to byte values; 0 is the blank.
+    """
+
+    def __init__(self):
+        self.symbols = [BLANK]
+        self.ids = {BLANK: 0}
+
+    def id(self, symbol):
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            if len(self.symbols) == 256:
+                raise EngineError('Tapes are limited to 256 distinct symbols')
+            symbol_id = self.ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def encode(self, cells):
+        return bytes(self.id(cell) for cell in cells).rstrip(b'\0')
+
+    def decode(self, tape):
+        return [self.symbols[cell] for cell in tape]
+
+
+def _moves(engine, tapes):
+    """
+    (slot, scanned symbol id) -> [(target, written id or None, head delta, key)],
+    built on first use.
+    """
+    table = {}
+
+    def moves(slot, scanned):
+        entry = table.get((slot, scanned))
+        if entry is None:
+            entry = []
+            # In list order, so the branch reported doesn't depend on how
+            # the engine was built (see CompiledAutomaton.rank)
+            candidates = sorted(
+                engine.delta[slot].get(tapes.symbols[scanned], {}).items(),
+                key=lambda move: engine.rank[move[0]]
+            )
+            for key, target in candidates:
+                transition = engine.transitions[key]
+                write = tapes.id(transition.write) if transition.write is not None else None
+                entry.append((target, write, MOVES.get(transition.move, 0), key))
+            table[(slot, scanned)] = entry
+        return entry
+
+    return moves
+
+
+def _trace(engine, tapes, visited, input_string, final_key, memory_left, window):
+    """
+    Steps along the branch ending at `final_key`, with windowed tapes if
+    full ones would exceed `memory_left` bytes. Returns (steps, windowed).
+    """
+    keys = []
+    key = final_key
+    while key is not None:
+        keys.append(key)
+        key = visited[key][0]
+    keys.reverse()
+
+    cells_total = sum(len(tape) + 1 for _, _, tape in keys)
+    windowed = cells_total * TRACE_CELL_BYTES > memory_left
+
+    steps = []
+    for number, key in enumerate(keys):
+        slot, head, tape = key
+        offset = max(head - window, 0) if windowed else 0
+        cells = tapes.decode(tape[offset:head + window + 1] if windowed else tape)
+        scanned = head - offset
+        step = {
+            'step': number,
+            'currentState': engine.state_ids[slot],
+            'remainingInput': input_string if number == 0 else '',
+            'isAccepted': slot in engine.finals,
+        }
+        transition_key = visited[key][1]
+        if transition_key is not None:
+            step['transition'] = engine.transitions[transition_key].data
+        step.update({
+            'tapePosition': head,
+            'tape': cells,
+            'tapeHead': cells[scanned] if scanned < len(cells) else BLANK,
+        })
+        if windowed:
+            step['tapeOffset'] = offset
+        steps.append(step)
+    return steps, windowed
+
+
+def search(engine, input_string, with_trace=True):
+    """
+    Run a (possibly nondeterministic) TM on `input_string`.
+
+    Returns the editor's result shape (steps only `with_trace`) plus
+    "search" statistics; when a cap is hit first, isAccepted is False and
+    search["limit"] names the cap.
+    """
+    start = time.perf_counter()
+    config = settings.SIMULATION_ENGINE
+    if not engine.initial:
+        result = {
+            'input': input_string,
+            'isAccepted': False,
+            'executionTime': (time.perf_counter() - start) * 1000,
+            'search': {'configurations': 0, 'depth': 0, 'maxFrontier': 0, 'limit': None},
+        }
+        if with_trace:
+            result['steps'] = [{
+                'step': 0,
+                'currentState': 'No initial state',
+                'remainingInput': input_string,
+                'isAccepted': False,
+            }]
+        return result
+
+    tapes = _Tapes()
+    moves = _moves(engine, tapes)
+    tape = tapes.encode(input_string)
+
+    # configuration -> (parent configuration, transition key)
+    visited = {}
+    frontier = []
+    memory = 0
+    for slot in sorted(engine.initial):
+        key = (slot, 0, tape)
+        if key not in visited:
+            visited[key] = (None, None)
+            frontier.append(key)
+            memory += len(tape) + CONFIGURATION_OVERHEAD
+
+    accepted_key = next((key for key in frontier if key[0] in engine.finals), None)
+    depth = 0
+    max_frontier = len(frontier)
+    limit = None
+    last_key = frontier[-1]
+
+    while frontier and accepted_key is None:
+        if depth >= config['TM_MAX_STEPS']:
+            limit = 'steps'
+            break
+        depth += 1
+        next_frontier = []
+        for key in frontier:
+            slot, head, tape = key
+            scanned = tape[head] if head < len(tape) else 0
+            for target, write, move, transition_key in moves(slot, scanned):
+                new_tape = tape
+                if write is not None and write != scanned:
+                    if head < len(tape):
+                        new_tape = tape[:head] + bytes((write,)) + tape[head + 1:]
+                    else:
+                        new_tape = tape + bytes(head - len(tape)) + bytes((write,))
+                    new_tape = new_tape.rstrip(b'\0')
+                child = (target, max(head + move, 0), new_tape)
+                if child in visited:
+                    continue
+
+                visited[child] = (key, transition_key)
+                memory += len(new_tape) + CONFIGURATION_OVERHEAD
+                last_key = child
+                if target in engine.finals:
+                    accepted_key = child
+                    break
+                next_frontier.append(child)
+            if accepted_key is not None:
+                break
+            if len(visited) > config['TM_MAX_CONFIGURATIONS']:
+                limit = 'configurations'
+            elif memory > config['TM_MEMORY_LIMIT']:
+                limit = 'memory'
+            elif len(next_frontier) > config['TM_MAX_FRONTIER']:
+                limit = 'frontier'
+            if limit:
+                break
+        if limit:
+            break
+        frontier = next_frontier
+        max_frontier = max(max_frontier, len(frontier))
+
+    accepted = accepted_key is not None
+    if accepted:
+        limit = None
+    result = {
+        'input': input_string,
+        'isAccepted': accepted,
+        'executionTime': (time.perf_counter() - start) * 1000,
+        'search': {
+            'configurations': len(visited),
+            'depth': depth,
+            'maxFrontier': max_frontier,
+            'limit': limit,
+        },
+    }
+    if with_trace:
+        # Without an accepting branch, the last one reached
+        result['steps'], windowed = _trace(
+            engine, tapes, visited, input_string, accepted_key or last_key,
+            memory_left=config['TM_MEMORY_LIMIT'] - memory,
+            window=config['TM_TRACE_WINDOW'],
+        )
+        result['search']['traceWindow'] = config['TM_TRACE_WINDOW'] if windowed else None
+    return result
@@ -0,0 +1,73 @@
+"""
+Sparse fieldsets: `?fields=` and `?omit=` on session and run endpoints.
+
+Both take comma-separated field names; nested fields use a dot, e.g.
+`?fields=id,session_name,runs.input_string` or `?omit=runs.result_steps`.
+Viewsets pass the parsed Fieldset to serializers through the context (see
+SparseFieldsetMixin) and use it to skip joins, prefetches and columns for
+fields that won't be rendered.
+"""
+
+
+def _parse(value):
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class Fieldset:
+    """
+    Which fields to render. `fields=None` means all of them.
+    """
+
+    def __init__(self, fields=None, omit=None):
+        self.fields = fields
+        self.omit = omit or set()
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        return cls(_parse(params.get('fields')), _parse(params.get('omit')))
+
+    @property
+    def is_default(self):
+        return self.fields is None and not self.omit
+
+    def includes(self, name):
+        if name in self.omit:
+            return False
+        if self.fields is None:
+            return True
+        prefix = f"{name}."
+        return name in self.fields or any(f.startswith(prefix) for f in self.fields)
+
+    def nested(self, name):
+        """
+        Fieldset for the serializer nested under `name`.
+        """
+        prefix = f"{name}."
+
+        def children(names):
+            return {n[len(prefix):] for n in names if n.startswith(prefix)}
+
+        fields = children(self.fields) if self.fields is not None else set()
+        return Fieldset(fields or None, children(self.omit))
+
+    def filter_fields(self, fields):
+        """
+        Drop excluded entries from a serializer's `fields` in place.
+        """
+        for name in list(fields):
+            if not self.includes(name):
+                fields.pop(name)
+
+    def filter_data(self, data, nested=()):
+        """
+        Apply to already-serialized data (cached payloads).
+        """
+        data = {key: value for key, value in data.items() if self.includes(key)}
+        for name in nested:
+            child = self.nested(name)
+            if name in data and not child.is_default:
+                data[name] = [child.filter_data(item) for item in data[name]]
+        return data
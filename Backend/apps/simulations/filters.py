@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import filters
+
+
+class SessionSearchFilter(filters.SearchFilter):
+    """
+    Index-backed search for SimulationSessions.
+
+    On PostgreSQL, `?search=` matches the GIN-indexed `search_vector`
+    (websearch syntax) or fuzzily matches `session_name` through the trigram
+    index, and annotates `search_rank` / `name_similarity` for ordering.
+    Other databases fall back to DRF's icontains search over `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        text = ' '.join(terms)
+        query = SearchQuery(
+            text,
+            search_type='websearch',
+            config=settings.SESSION_SEARCH['CONFIG']
+        )
+
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            name_similarity=TrigramWordSimilarity(text, 'session_name'),
+        ).filter(
+            Q(search_vector=query) | Q(session_name__trigram_word_similar=text)
+        )
+
+
+class SessionOrderingFilter(filters.OrderingFilter):
+    """
+    Order ranked search results by relevance unless `?ordering=` is given.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            not request.query_params.get(self.ordering_param)
+            and 'search_rank' in queryset.query.annotations
+        ):
+            return ['-search_rank', '-name_similarity']
+        return super().get_ordering(request, queryset, view)
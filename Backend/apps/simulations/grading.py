@@ -0,0 +1,119 @@
+"""
+Bulk grading of sessions against a reference session (the `grade`
+session action and `python manage.py grade_sessions`).
+
+The reference is compiled once; submissions are compiled and checked in
+a process pool (see engine/grading.py). Verdicts are streamed as NDJSON,
+one line per submission in the order selected:
+
+    {"type": "grading", "reference": ..., "submissions": 300, "tests": 12}
+    {"type": "verdict", "public_id": ..., "session_name": ..., "owner": ...,
+     "equivalent": false, "counterexample": {"input": "ab", "expected": true},
+     "tests": {"passed": 11, "total": 12, "failures": [...]}}
+    {"type": "summary", "graded": 300, "equivalent": 271, "passed_all_tests": 280,
+     "errors": 0, "elapsed": 2.4}
+"""
+import logging
+import math
+import time
+
+import orjson
+from django.conf import settings
+from django.utils import timezone
+
+from config import metrics
+
+from .engine import CompiledAutomaton
+from .engine.grading import expected_results, grade_all
+
+logger = logging.getLogger(__name__)
+
+
+def _line(record):
+    return orjson.dumps(record) + b'\n'
+
+
+def select_submissions(queryset, public_ids=None, name=None, automata_type=None):
+    """
+    Narrow `queryset` to the requested submissions, oldest first.
+    """
+    if public_ids:
+        queryset = queryset.filter(public_id__in=public_ids)
+    if name:
+        queryset = queryset.filter(session_name__icontains=name)
+    if automata_type:
+        queryset = queryset.filter(automata_type=automata_type.upper())
+    return queryset.order_by('created_at', 'id')
+
+
+def verdict_lines(reference, submissions, tests=(), check_equivalence=True, workers=None):
+    """
+    Grade `submissions` (a SimulationSessions queryset) against the
+    `reference` session, yielding NDJSON lines.
+    """
+    config = settings.GRADING
+    started = time.perf_counter()
+
+    with metrics.timed('engine_compile'):
+        compiled = CompiledAutomaton.compile(reference.automata_data, reference.automata_type)
+    with metrics.timed('engine_run'):
+        vectors = expected_results(compiled, tests)
+
+    rows = list(
+        submissions.exclude(pk=reference.pk).values_list(
+            'public_id', 'session_name', 'user__username', 'automata_type', 'automata_data'
+        )
+    )
+    yield _line({
+        'type': 'grading',
+        'reference': reference.public_id,
+        'submissions': len(rows),
+        'tests': sum(expected is not None for _, expected in vectors),
+        'started_at': timezone.now(),
+    })
+
+    workers = workers if workers is not None else config['WORKERS']
+    # Not worth starting processes for a handful of submissions
+    workers = min(workers, math.ceil(len(rows) / config['CHUNK_SIZE']))
+
+    summary = {
+        'type': 'summary',
+        'graded': 0,
+        'equivalent': 0,
+        'passed_all_tests': 0,
+        'errors': 0,
+    }
+    results = grade_all(
+        compiled,
+        ((i, row[3], row[4]) for i, row in enumerate(rows)),
+        vectors,
+        check_equivalence=check_equivalence,
+        max_pairs=config['MAX_PRODUCT_STATES'],
+        workers=workers,
+        chunk_size=config['CHUNK_SIZE'],
+        start_method=config['START_METHOD'],
+    )
+    for i, verdict in results:
+        public_id, session_name, owner = rows[i][:3]
+        summary['graded'] += 1
+        if 'error' in verdict:
+            summary['errors'] += 1
+        if verdict.get('equivalent'):
+            summary['equivalent'] += 1
+        tests_result = verdict.get('tests')
+        if tests_result and tests_result['passed'] == tests_result['total']:
+            summary['passed_all_tests'] += 1
+        yield _line({
+            'type': 'verdict',
+            'public_id': public_id,
+            'session_name': session_name,
+            'owner': owner,
+            **verdict,
+        })
+
+    summary['elapsed'] = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Graded {summary['graded']} session(s) against session {reference.id} "
+        f"in {summary['elapsed']}s with {max(workers, 1)} worker(s)"
+    )
+    yield _line(summary)
@@ -0,0 +1,152 @@
+"""
+Minimal RFC 6902 JSON Patch implementation for automata_data edits.
+
+Only what the editor needs: add, remove, replace, move, copy and test on
+dicts and lists, addressed with RFC 6901 JSON pointers. Patches are applied
+to a copy, so a failing operation leaves the original document untouched.
+"""
+import copy
+
+OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class JSONPatchError(ValueError):
+    pass
+
+
+def parse_pointer(pointer):
+    """
+    Split a JSON pointer into unescaped reference tokens.
+    """
+    if not isinstance(pointer, str):
+        raise JSONPatchError(f"Path must be a string, got {pointer!r}")
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JSONPatchError(f"Path '{pointer}' must start with '/'")
+    return [
+        token.replace('~1', '/').replace('~0', '~')
+        for token in pointer[1:].split('/')
+    ]
+
+
+def _index(container, token, pointer, allow_end=False):
+    if token == '-' and allow_end:
+        return len(container)
+    # isdigit() alone accepts e.g. '²', which int() rejects
+    if not (token.isascii() and token.isdigit()) or (len(token) > 1 and token.startswith('0')):
+        raise JSONPatchError(f"Invalid array index '{token}' in '{pointer}'")
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise JSONPatchError(f"Array index {index} out of range in '{pointer}'")
+    return index
+
+
+def _resolve(document, tokens, pointer):
+    node = document
+    for token in tokens:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JSONPatchError(f"Path '{pointer}' does not exist")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token, pointer)]
+        else:
+            raise JSONPatchError(f"Path '{pointer}' does not exist")
+    return node
+
+
+def _get(document, pointer):
+    return _resolve(document, parse_pointer(pointer), pointer)
+
+
+def _add(document, pointer, value):
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1], pointer)
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, key, pointer, allow_end=True), value)
+    else:
+        raise JSONPatchError(f"Cannot add at '{pointer}'")
+    return document
+
+
+def _remove(document, pointer):
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        raise JSONPatchError("Cannot remove the whole document")
+    parent = _resolve(document, tokens[:-1], pointer)
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JSONPatchError(f"Path '{pointer}' does not exist")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key, pointer))
+    raise JSONPatchError(f"Path '{pointer}' does not exist")
+
+
+def apply_patch(document, operations):
+    """
+    Apply `operations` to a copy of `document`.
+
+    Returns (patched_document, touched) where `touched` is the set of
+    top-level keys the patch wrote to, so callers can validate only those.
+    Raises JSONPatchError on malformed or failing operations.
+    """
+    if not isinstance(operations, list):
+        raise JSONPatchError("Patch must be a list of operations")
+
+    document = copy.deepcopy(document)
+    touched = set()
+
+    for position, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            raise JSONPatchError(
+                f"Operation {position} must have an 'op' in {', '.join(OPERATIONS)}"
+            )
+        op = operation['op']
+        path = operation.get('path')
+        tokens = parse_pointer(path)
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JSONPatchError(f"Operation {position} ({op}) requires 'value'")
+        if op in ('move', 'copy'):
+            if 'from' not in operation:
+                raise JSONPatchError(f"Operation {position} ({op}) requires 'from'")
+            parse_pointer(operation['from'])
+
+        if op == 'test':
+            if _get(document, path) != operation['value']:
+                raise JSONPatchError(f"Test failed at '{path}'")
+            continue
+
+        if op == 'add':
+            document = _add(document, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(document, path)
+        elif op == 'replace':
+            _get(document, path)
+            if tokens:
+                _remove(document, path)
+            document = _add(document, path, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            source = operation['from']
+            if path != source and path.startswith(source + '/'):
+                raise JSONPatchError(f"Cannot move '{source}' into its own child")
+            value = _remove(document, source)
+            document = _add(document, path, value)
+            touched.update(parse_pointer(source)[:1])
+        elif op == 'copy':
+            value = copy.deepcopy(_get(document, operation['from']))
+            document = _add(document, path, value)
+
+        # An empty path rewrites the whole document
+        touched.update(tokens[:1] or [None])
+
+    return document, touched
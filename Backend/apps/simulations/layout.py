@@ -0,0 +1,260 @@
+"""
+Server-side auto-layout of automata states (the `layout` session action).
+
+Two algorithms, both vectorized with NumPy:
+
+- layered: states ranked by BFS distance from the initial state, left to
+  right, with a few barycenter sweeps to reduce crossings within ranks.
+- force: Fruchterman-Reingold. Repulsion is exact (all pairs) up to
+  AUTOMATA_LAYOUT['EXACT_REPULSION_LIMIT'] states; above that, states are
+  binned into a grid and repel each other's cell centroids, with exact
+  forces only inside a cell (O(n * sqrt(n)) per step instead of O(n^2)).
+
+Coordinates are in editor pixels, with the top-left state at (MARGIN, MARGIN).
+"""
+from collections import deque
+
+import numpy as np
+from django.conf import settings
+
+from .automata import state_id
+
+# Editor node size is 80px; these leave room for edge labels
+RANK_SPACING = 180
+NODE_SPACING = 120
+MARGIN = 60
+
+ALGORITHMS = ('layered', 'force')
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def graph_arrays(automata_data):
+    """
+    (state ids, initial flags, edge array of shape (m, 2)) from automata_data.
+    Transitions to unknown states and self-loops are left out.
+    """
+    states = automata_data.get('states') or []
+    if not all(isinstance(state, dict) for state in states):
+        raise LayoutError('States must be objects to hold coordinates')
+
+    ids = [state_id(state) for state in states]
+    index = {sid: i for i, sid in enumerate(ids)}
+    if len(index) != len(ids):
+        raise LayoutError('State ids must be unique')
+
+    initial = np.array([bool(state.get('isInitial')) for state in states])
+
+    edges = []
+    for transition in automata_data.get('transitions') or []:
+        if not isinstance(transition, dict):
+            continue
+        source = index.get(transition.get('from'))
+        target = index.get(transition.get('to'))
+        if source is not None and target is not None and source != target:
+            edges.append((source, target))
+    edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+    return ids, initial, edges
+
+
+# Layered
+def _ranks(n, initial, edges):
+    """
+    BFS distance from the initial states; unreachable components are
+    placed after the reachable ones, each from its lowest-index state.
+    """
+    adjacency = [[] for _ in range(n)]
+    for source, target in edges.tolist():
+        adjacency[source].append(target)
+        adjacency[target].append(source)
+
+    rank = np.full(n, -1, dtype=np.int64)
+    roots = list(np.flatnonzero(initial)) or [0]
+    offset = 0
+    while True:
+        queue = deque()
+        for root in roots:
+            if rank[root] < 0:
+                rank[root] = offset
+                queue.append(root)
+        while queue:
+            node = queue.popleft()
+            for neighbour in adjacency[node]:
+                if rank[neighbour] < 0:
+                    rank[neighbour] = rank[node] + 1
+                    queue.append(neighbour)
+
+        unplaced = np.flatnonzero(rank < 0)
+        if not len(unplaced):
+            return rank
+        offset = rank.max() + 1
+        roots = [unplaced[0]]
+
+
+def _order_within_ranks(rank, key):
+    """
+    Position of each node inside its rank, sorted by `key`.
+    """
+    order = np.lexsort((np.arange(len(rank)), key, rank))
+    sorted_rank = rank[order]
+    starts = np.searchsorted(sorted_rank, sorted_rank, side='left')
+    position = np.empty(len(rank), dtype=np.float64)
+    position[order] = np.arange(len(rank)) - starts
+    return position
+
+
+def layered_layout(ids, initial, edges, sweeps=4):
+    n = len(ids)
+    rank = _ranks(n, initial, edges)
+    position = _order_within_ranks(rank, np.zeros(n))
+
+    if len(edges):
+        source, target = edges[:, 0], edges[:, 1]
+        # Edges between adjacent ranks, oriented from lower to higher rank
+        forward = rank[target] == rank[source] + 1
+        backward = rank[source] == rank[target] + 1
+        upper = np.concatenate([source[forward], target[backward]])
+        lower = np.concatenate([target[forward], source[backward]])
+
+        for sweep in range(sweeps):
+            # Alternate: place lower ranks by their parents, then upper by children
+            fixed, moving = (upper, lower) if sweep % 2 == 0 else (lower, upper)
+            weight = np.bincount(moving, minlength=n)
+            total = np.bincount(moving, weights=position[fixed], minlength=n)
+            barycenter = np.where(weight > 0, total / np.maximum(weight, 1), position)
+            position = _order_within_ranks(rank, barycenter)
+
+    # Center each rank vertically
+    rank_size = np.bincount(rank)
+    offset = (rank_size.max() - rank_size[rank]) / 2
+    x = rank * RANK_SPACING
+    y = (position + offset) * NODE_SPACING
+    return np.column_stack([x, y]).astype(np.float64)
+
+
+# Force-directed
+def _exact_repulsion(pos, k2):
+    delta = pos[:, None, :] - pos[None, :, :]
+    dist2 = np.einsum('ijk,ijk->ij', delta, delta)
+    np.fill_diagonal(dist2, np.inf)
+    np.maximum(dist2, 1e-2, out=dist2)
+    return np.einsum('ijk,ij->ik', delta, k2 / dist2)
+
+
+def _grid_repulsion(pos, k2):
+    """
+    Approximate repulsion: each cell acts on other cells' states as one
+    weighted body at its centroid; states in the same cell repel exactly.
+    """
+    n = len(pos)
+    cells_per_side = max(int(np.sqrt(np.sqrt(n))), 2)
+    low = pos.min(axis=0)
+    size = np.maximum(pos.max(axis=0) - low, 1e-9) / cells_per_side
+    cell_xy = np.minimum(((pos - low) / size).astype(np.int64), cells_per_side - 1)
+    cell = cell_xy[:, 0] * cells_per_side + cell_xy[:, 1]
+
+    cell_count = np.bincount(cell, minlength=cells_per_side ** 2).astype(np.float64)
+    occupied = np.flatnonzero(cell_count)
+    centroid = np.column_stack([
+        np.bincount(cell, weights=pos[:, 0], minlength=len(cell_count))[occupied],
+        np.bincount(cell, weights=pos[:, 1], minlength=len(cell_count))[occupied],
+    ]) / cell_count[occupied, None]
+    mass = np.broadcast_to(cell_count[occupied], (n, len(occupied))).copy()
+    # A state's own cell is handled exactly below
+    own = np.searchsorted(occupied, cell)
+    mass[np.arange(n), own] = 0
+
+    delta = pos[:, None, :] - centroid[None, :, :]
+    dist2 = np.maximum(np.einsum('ijk,ijk->ij', delta, delta), 1e-2)
+    force = np.einsum('ijk,ij->ik', delta, k2 * mass / dist2)
+
+    order = np.argsort(cell, kind='stable')
+    bounds = np.searchsorted(cell[order], occupied, side='left').tolist() + [n]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        members = order[start:end]
+        if len(members) > 1:
+            force[members] += _exact_repulsion(pos[members], k2)
+    return force
+
+
+def force_layout(ids, initial, edges, iterations=None, seed=0):
+    config = settings.AUTOMATA_LAYOUT
+    iterations = iterations or config['ITERATIONS']
+    n = len(ids)
+    if n == 1:
+        return np.zeros((1, 2))
+
+    k = NODE_SPACING
+    k2 = k * k
+    rng = np.random.default_rng(seed)
+    radius = k * np.sqrt(n) / 2
+    pos = rng.uniform(-radius, radius, size=(n, 2))
+    repulsion = (
+        _exact_repulsion if n <= config['EXACT_REPULSION_LIMIT']
+        else _grid_repulsion
+    )
+
+    temperature = radius / 4
+    cooling = temperature / (iterations + 1)
+    source, target = (edges[:, 0], edges[:, 1]) if len(edges) else ([], [])
+    for _ in range(iterations):
+        displacement = repulsion(pos, k2)
+
+        if len(edges):
+            delta = pos[source] - pos[target]
+            dist = np.sqrt(np.einsum('ij,ij->i', delta, delta))[:, None]
+            pull = delta * dist / k
+            for axis in (0, 1):
+                displacement[:, axis] -= np.bincount(source, weights=pull[:, axis], minlength=n)
+                displacement[:, axis] += np.bincount(target, weights=pull[:, axis], minlength=n)
+
+        # Weak pull to the center keeps disconnected parts together
+        displacement -= pos * (0.01 * k / radius)
+
+        length = np.maximum(np.sqrt(np.einsum('ij,ij->i', displacement, displacement)), 1e-9)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    return pos
+
+
+def max_iterations(n):
+    """
+    Force-directed steps allowed for `n` states: the work budget
+    (states x steps) spread over the states, between 1 and MAX_ITERATIONS.
+    """
+    config = settings.AUTOMATA_LAYOUT
+    return max(min(config['MAX_STATE_ITERATIONS'] // n, config['MAX_ITERATIONS']), 1)
+
+
+def compute_layout(automata_data, algorithm='layered', iterations=None, seed=0):
+    """
+    New automata_data with every state's x/y replaced by the layout.
+    """
+    if algorithm not in ALGORITHMS:
+        raise LayoutError(f"algorithm must be one of: {', '.join(ALGORITHMS)}")
+
+    ids, initial, edges = graph_arrays(automata_data)
+    if not ids:
+        raise LayoutError('Automaton has no states')
+    max_states = settings.AUTOMATA_LAYOUT['MAX_STATES']
+    if len(ids) > max_states:
+        raise LayoutError(f"Layout is limited to {max_states} states")
+
+    if algorithm == 'layered':
+        pos = layered_layout(ids, initial, edges)
+    else:
+        limit = max_iterations(len(ids))
+        if iterations is not None and iterations > limit:
+            raise LayoutError(f"At most {limit} iterations for {len(ids)} states")
+        iterations = min(iterations or settings.AUTOMATA_LAYOUT['ITERATIONS'], limit)
+        pos = force_layout(ids, initial, edges, iterations, seed)
+
+    pos = np.rint(pos - pos.min(axis=0) + MARGIN).astype(np.int64).tolist()
+    states = [
+        {**state, 'x': x, 'y': y}
+        for state, (x, y) in zip(automata_data['states'], pos)
+    ]
+    return {**automata_data, 'states': states}
@@ -0,0 +1,96 @@
+import sys
+
+import orjson
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.simulations.benchmarks.suite import DEFAULT_BUDGET, SCALES, compare, run_suite
+
+FAMILIES = ('dfa', 'nfa', 'tm')
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the simulation engine (compile, simulate, batch, minimize, "
+        "equivalence) on synthetic automata and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='quick')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per operation')
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=DEFAULT_BUDGET,
+            help='Seconds per operation before stopping short of --repeat',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--only',
+            action='append',
+            choices=FAMILIES,
+            help='Run only this family of cases (repeatable)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='JSON file to write (default: stdout)',
+        )
+        parser.add_argument(
+            '--compare',
+            default=None,
+            help='JSON results of an earlier run to compare against',
+        )
+
+    def load_baseline(self, path):
+        try:
+            with open(path, 'rb') as f:
+                baseline = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            raise CommandError(f"Could not read baseline {path}: {e}")
+        if not isinstance(baseline, dict) or 'results' not in baseline:
+            raise CommandError(f"{path} is not a benchmark_engine result file")
+        return baseline
+
+    def progress(self, result):
+        self.stderr.write(
+            f"{result['case']:<20} {result['operation']:<12} "
+            f"p50 {result['p50_ms']:>12.3f} ms  p99 {result['p99_ms']:>12.3f} ms  "
+            f"{result['throughput'] or 0:>14,.0f} {result['unit']}/s  "
+            f"peak {result['peak_memory_bytes'] / 1024 ** 2:>8.1f} MiB"
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        baseline = self.load_baseline(options['compare']) if options['compare'] else None
+
+        report = run_suite(
+            scale=options['scale'],
+            repeat=options['repeat'],
+            seed=options['seed'],
+            only=options['only'],
+            budget=options['budget'],
+            progress=self.progress,
+        )
+
+        if baseline is not None:
+            report['comparison'] = {
+                'baseline_commit': baseline.get('meta', {}).get('commit'),
+                'changes': compare(report, baseline),
+            }
+            for change in report['comparison']['changes']:
+                ratio = change['p50_ratio']
+                self.stderr.write(
+                    f"{change['case']:<20} {change['operation']:<12} "
+                    f"{change['baseline_p50_ms']:>12.3f} -> {change['p50_ms']:>12.3f} ms  "
+                    f"x{ratio if ratio is not None else '?'}"
+                )
+
+        content = orjson.dumps(report, option=orjson.OPT_INDENT_2) + b'\n'
+        output = options['output']
+        if output:
+            with open(output, 'wb') as f:
+                f.write(content)
+            self.stderr.write(self.style.SUCCESS(f"Results written to {output}"))
+        else:
+            sys.stdout.buffer.write(content)
@@ -0,0 +1,49 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.simulations.transfer import export_lines
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a user's sessions and runs as NDJSON (same format as "
+        "GET /sessions/export/), streamed in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Owner of the sessions')
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='File to write (default: stdout)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help="Rows fetched per query (default: SESSION_TRANSFER['CHUNK_SIZE'])",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        output = options['output']
+        stream = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for chunk in export_lines(user, options['chunk_size']):
+                stream.write(chunk)
+        finally:
+            if output:
+                stream.close()
+            else:
+                stream.flush()
+
+        if output:
+            self.stderr.write(self.style.SUCCESS(f"Exported to {output}"))
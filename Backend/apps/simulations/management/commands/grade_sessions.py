@@ -0,0 +1,106 @@
+import sys
+
+import orjson
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from apps.simulations.grading import select_submissions, verdict_lines
+from apps.simulations.models import SimulationSessions
+from apps.simulations.serializers import GradingRequestSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade sessions against a reference session and write NDJSON "
+        "verdicts (same format as POST /sessions/{id}/grade/)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('reference', help='public_id of the reference session')
+        parser.add_argument(
+            'submissions',
+            nargs='*',
+            help='public_ids to grade (default: every session matching the filters)',
+        )
+        parser.add_argument('--name', default=None, help='Session name contains')
+        parser.add_argument('--type', default=None, help='Automata type')
+        parser.add_argument(
+            '--tests',
+            default=None,
+            help='JSON file with a list of test vectors, or a text file with one input per line',
+        )
+        parser.add_argument(
+            '--no-equivalence',
+            action='store_true',
+            help='Only run the test vectors',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help="Worker processes (default: GRADING['WORKERS'])",
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='File to write (default: stdout)',
+        )
+
+    def load_tests(self, path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        if path.endswith('.json'):
+            try:
+                tests = orjson.loads(content)
+            except orjson.JSONDecodeError as e:
+                raise CommandError(f"Invalid tests file: {e}")
+            if not isinstance(tests, list):
+                raise CommandError('Tests file must hold a JSON list')
+            return tests
+        return content.decode('utf-8').splitlines()
+
+    def handle(self, *args, **options):
+        try:
+            reference = SimulationSessions.objects.get(public_id=options['reference'])
+        except (SimulationSessions.DoesNotExist, ValidationError):
+            raise CommandError(f"No session {options['reference']}")
+
+        submissions = options['submissions']
+        if not (submissions or options['name'] or options['type']):
+            raise CommandError('Give submission public_ids, --name or --type')
+        tests = self.load_tests(options['tests']) if options['tests'] else []
+        try:
+            tests = GradingRequestSerializer().validate_tests(tests)
+        except serializers.ValidationError as e:
+            raise CommandError(f"Invalid tests: {e.detail}")
+        if options['no_equivalence'] and not tests:
+            raise CommandError('--no-equivalence needs --tests')
+
+        try:
+            queryset = select_submissions(
+                SimulationSessions.objects.all(),
+                public_ids=submissions,
+                name=options['name'],
+                automata_type=options['type'],
+            )
+            lines = verdict_lines(
+                reference, queryset, tests,
+                check_equivalence=not options['no_equivalence'],
+                workers=options['workers'],
+            )
+
+            output = options['output']
+            stream = open(output, 'wb') if output else sys.stdout.buffer
+            try:
+                for line in lines:
+                    stream.write(line)
+                    stream.flush()
+            finally:
+                if output:
+                    stream.close()
+        except ValidationError as e:
+            raise CommandError(f"Invalid public_id: {e.messages[0]}")
+
+        if output:
+            self.stderr.write(self.style.SUCCESS(f"Verdicts written to {output}"))
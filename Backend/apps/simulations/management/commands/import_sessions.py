@@ -0,0 +1,58 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.simulations.transfer import (
+    CONFLICT_POLICIES,
+    SessionImporter,
+    TransferError,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Import an NDJSON session export into a user account with '
+        'chunked validation and bulk inserts. All-or-nothing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='User the sessions are imported for')
+        parser.add_argument('path', help='NDJSON file (.gz is decompressed)')
+        parser.add_argument(
+            '--on-conflict',
+            choices=CONFLICT_POLICIES,
+            default='rename',
+            help='What to do with sessions whose name is already taken',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help="Records validated and inserted per batch (default: SESSION_TRANSFER['CHUNK_SIZE'])",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        path = options['path']
+        opener = gzip.open if path.endswith('.gz') else open
+        importer = SessionImporter(
+            user, options['on_conflict'], options['chunk_size']
+        )
+        try:
+            with opener(path, 'rb') as lines:
+                stats = importer.run(lines)
+        except TransferError as e:
+            for error in e.errors:
+                self.stderr.write(f"Line {error['line']}: {error['error']}")
+            raise CommandError('Import failed, nothing was saved')
+
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{key}={value}" for key, value in stats.items())
+        ))
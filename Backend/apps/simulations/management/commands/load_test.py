@@ -0,0 +1,42 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.simulations.benchmarks.load import LoadTest, add_arguments, format_report, validate
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with virtual users (login, list, retrieve, "
+        "save_run bursts, shared, statistics) and report per-endpoint "
+        "throughput, latency percentiles and error rates. Seed accounts "
+        "first with seed_load_test, and raise the server's rate limits "
+        "(see its help) or most requests get 429."
+    )
+
+    def add_arguments(self, parser):
+        add_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            test = LoadTest(**validate(options))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stderr.write(
+            f"{test.users} virtual user(s) against {test.base_url} for {test.duration:g}s"
+        )
+        report = test.run(progress=lambda elapsed, requests, errors: self.stderr.write(
+            f"{elapsed:6.0f}s  {requests} requests, {errors} errors"
+        ))
+        self.stderr.write(format_report(report))
+
+        content = json.dumps(report, indent=2) + '\n'
+        output = options['output']
+        if output:
+            with open(output, 'w') as f:
+                f.write(content)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {output}"))
+        else:
+            sys.stdout.write(content)
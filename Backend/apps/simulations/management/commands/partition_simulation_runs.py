@@ -0,0 +1,177 @@
+import logging
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.simulations.models import SimulationRun
+
+logger = logging.getLogger(__name__)
+
+TABLE = SimulationRun._meta.db_table
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f"{TABLE}_y{start.year}m{start.month:02d}"
+
+
+class Command(BaseCommand):
+    help = (
+        'PostgreSQL only: manage monthly RANGE partitions of simulation_runs '
+        'on created_at. Use --convert once to turn the existing table into a '
+        'partitioned one, then run regularly to create upcoming partitions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild simulation_runs as a partitioned table (locks the table)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.SIMULATION_RUN_RETENTION['PARTITION_MONTHS_AHEAD'],
+            help='Monthly partitions to create beyond the current month',
+        )
+        parser.add_argument(
+            '--drop-empty',
+            action='store_true',
+            help='Drop past partitions left empty by prune_simulation_runs',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning is only supported on PostgreSQL')
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                partitioned = self.is_partitioned(cursor)
+
+                if options['convert']:
+                    if partitioned:
+                        self.stdout.write(f"{TABLE} is already partitioned")
+                    else:
+                        self.convert(cursor, options['months_ahead'])
+                        partitioned = True
+                elif not partitioned:
+                    raise CommandError(
+                        f"{TABLE} is not partitioned; run with --convert first"
+                    )
+
+                current = month_start(timezone.now())
+                self.ensure_partitions(
+                    cursor, current, add_months(current, options['months_ahead'])
+                )
+
+                if options['drop_empty']:
+                    self.drop_empty_partitions(cursor, current)
+
+        self.stdout.write(self.style.SUCCESS(f"{TABLE} partitions are up to date"))
+
+    def is_partitioned(self, cursor):
+        cursor.execute(
+            """
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+            """,
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+    def convert(self, cursor, months_ahead):
+        """
+        Copy simulation_runs into a table partitioned by created_at.
+
+        PostgreSQL requires the partition key in the primary key, so the new
+        key is (id, created_at); ids still come from a single sequence.
+        """
+        old = f"{TABLE}_unpartitioned"
+        sequence = f"{TABLE}_id_seq"
+        sessions_table = SimulationRun._meta.get_field('session').related_model._meta.db_table
+
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT MIN(created_at), MAX(id) FROM "{TABLE}"')
+        oldest, max_id = cursor.fetchone()
+
+        # Free the id sequence name (identity or serial) for the new table
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'DROP SEQUENCE IF EXISTS "{sequence}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{TABLE}".id')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{sequence}"\')'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, created_at)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_session_id_fk" '
+            f'FOREIGN KEY (session_id) REFERENCES "{sessions_table}" (id) '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(
+            f'CREATE INDEX "{TABLE}_session_created_idx" '
+            f'ON "{TABLE}" (session_id, created_at DESC)'
+        )
+        # Catches rows whose month has no partition yet instead of failing inserts
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        current = month_start(timezone.now())
+        first = month_start(oldest) if oldest else current
+        self.ensure_partitions(cursor, first, add_months(current, months_ahead))
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+        cursor.execute(f'DROP TABLE "{old}"')
+        cursor.execute('SELECT setval(%s, %s, %s)', [sequence, max_id or 1, max_id is not None])
+
+        logger.info(f"Converted {TABLE} to a partitioned table")
+        self.stdout.write(f"Converted {TABLE} to a partitioned table")
+
+    def ensure_partitions(self, cursor, first, last):
+        start = first
+        while start <= last:
+            end = add_months(start, 1)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{partition_name(start)}" '
+                f'PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') "
+                f"TO ('{end.isoformat()} 00:00:00+00')"
+            )
+            start = end
+
+    def drop_empty_partitions(self, cursor, current):
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)
+            """,
+            [TABLE],
+        )
+        current_name = partition_name(current)
+        prefix = f"{TABLE}_y"
+        for (name,) in cursor.fetchall():
+            # Names sort chronologically; never touch current or future months
+            if not name.startswith(prefix) or name >= current_name:
+                continue
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{name}")')
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'DROP TABLE "{name}"')
+                self.stdout.write(f"Dropped empty partition {name}")
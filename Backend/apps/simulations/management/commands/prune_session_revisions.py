@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.simulations.models import SessionRevision
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete automata_data revisions older than the retention window, '
+        'keeping the latest N per session reconstructible.'
+    )
+
+    def add_arguments(self, parser):
+        config = settings.SESSION_REVISIONS
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=config['KEEP_DAYS'],
+            help='Keep revisions created within this many days',
+        )
+        parser.add_argument(
+            '--keep-latest',
+            type=int,
+            default=config['KEEP_LATEST'],
+            help='Always keep this many revisions per session',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many revisions would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        keep_latest = options['keep_latest']
+        if keep_latest < 1:
+            raise CommandError('--keep-latest must be positive')
+        if options['keep_days'] < 0:
+            raise CommandError('--keep-days must be zero or positive')
+
+        cutoff = timezone.now() - timedelta(days=options['keep_days'])
+        session_ids = (
+            SessionRevision.objects.filter(created_at__lt=cutoff)
+            .order_by('session_id')
+            .values_list('session_id', flat=True)
+            .distinct()
+        )
+
+        total = sessions = 0
+        for session_id in session_ids.iterator():
+            deleted = self.prune_session(
+                session_id, cutoff, keep_latest, options['dry_run']
+            )
+            if deleted:
+                total += deleted
+                sessions += 1
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"{total} revision(s) in {sessions} session(s) would be deleted"
+            )
+            return
+
+        logger.info(
+            f"Pruned {total} session revision(s) from {sessions} session(s), "
+            f"keep_days={options['keep_days']} keep_latest={keep_latest}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {total} revision(s) from {sessions} session(s)"
+        ))
+
+    @staticmethod
+    def prune_session(session_id, cutoff, keep_latest, dry_run=False):
+        """
+        Delete the session's revisions below the oldest one kept, after
+        turning that one into a snapshot if it is a delta.
+        """
+        revisions = SessionRevision.objects.filter(session_id=session_id)
+        versions = list(
+            revisions.order_by('-version').values_list('version', 'created_at')
+        )
+        kept = [
+            version for index, (version, created_at) in enumerate(versions)
+            if index < keep_latest or created_at >= cutoff
+        ]
+        oldest_kept = min(kept)
+        expired = revisions.filter(version__lt=oldest_kept)
+        if dry_run:
+            return expired.count()
+
+        with transaction.atomic():
+            revisions.get(version=oldest_kept).make_snapshot()
+            deleted, _ = expired.delete()
+        return deleted
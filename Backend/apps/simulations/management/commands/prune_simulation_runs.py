@@ -0,0 +1,123 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from apps.simulations.models import SimulationRun, SimulationRunArchive
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep the latest N full runs per session and move older runs to '
+        'simulation_runs_archive, in bounded batches.'
+    )
+
+    def add_arguments(self, parser):
+        retention = settings.SIMULATION_RUN_RETENTION
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=retention['KEEP_LATEST'],
+            help='Full runs to keep per session',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=retention['BATCH_SIZE'],
+            help='Runs archived and deleted per transaction',
+        )
+        parser.add_argument(
+            '--traces',
+            choices=['compress', 'drop'],
+            default=retention['ARCHIVE_TRACES'],
+            help='Keep a compressed copy of result_steps or drop it',
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Delete expired runs without writing archive rows',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches (default: until done)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many runs would be pruned',
+        )
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        batch_size = options['batch_size']
+        if keep < 0:
+            raise CommandError('--keep must be zero or positive')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        expired = self.expired_runs(keep)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"{expired.count()} run(s) exceed the latest {keep} per session"
+            )
+            return
+
+        archive = not options['no_archive']
+        keep_trace = options['traces'] == 'compress'
+        max_batches = options['max_batches']
+
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            # Oldest first, so an interrupted prune leaves a consistent tail
+            ids = list(
+                expired.order_by('created_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                runs = SimulationRun.objects.filter(id__in=ids)
+                if archive:
+                    SimulationRunArchive.objects.bulk_create(
+                        [
+                            SimulationRunArchive.from_run(run, keep_trace=keep_trace)
+                            for run in runs.iterator()
+                        ],
+                        batch_size=batch_size,
+                    )
+                deleted, _ = runs.delete()
+
+            total += deleted
+            batches += 1
+            self.stdout.write(f"Batch {batches}: pruned {deleted} run(s)")
+
+        logger.info(
+            f"Pruned {total} simulation run(s) in {batches} batch(es), "
+            f"keep={keep} archive={archive} traces={options['traces']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {total} run(s) in {batches} batch(es)"
+        ))
+
+    @staticmethod
+    def expired_runs(keep):
+        """
+        Runs older than the latest `keep` of their session.
+        """
+        return SimulationRun.objects.annotate(
+            session_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('session_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(session_rank__gt=keep)
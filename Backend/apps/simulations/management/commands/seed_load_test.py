@@ -0,0 +1,129 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.simulations import engine
+from apps.simulations.benchmarks.generators import dense_dfa, random_inputs
+from apps.simulations.models import SimulationRun, SimulationSessions
+
+User = get_user_model()
+
+DEFAULT_EMAIL = 'loadtest-{n}@example.com'
+DEFAULT_PASSWORD = 'loadtest-password'
+
+# Without these the default rate limits reject most load-test traffic
+THROTTLE_OVERRIDES = (
+    'ANON_THROTTLE_RATE=1000000/day USER_THROTTLE_RATE=1000000/day '
+    'SIMULATION_BATCH_THROTTLE_RATE=1000000/day'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N users x M sessions x K runs for load testing. Users are "
+        "active and verified and share one password (see load_test). Start "
+        f"the server under test with the rate limits raised: {THROTTLE_OVERRIDES}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--sessions', type=int, default=20, help='Sessions per user')
+        parser.add_argument('--runs', type=int, default=10, help='Runs per session')
+        parser.add_argument(
+            '--email',
+            default=DEFAULT_EMAIL,
+            help='Email template, {n} is the user number (default: %(default)s)',
+        )
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--states', type=int, default=8, help='DFA states per session')
+        parser.add_argument(
+            '--shared',
+            type=float,
+            default=0.25,
+            help='Fraction of sessions that are shared',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete existing users matching --email first (with their sessions)',
+        )
+
+    def handle(self, *args, **options):
+        if '{n}' not in options['email']:
+            raise CommandError('--email must contain {n}')
+        if options['users'] < 1 or options['states'] < 1:
+            raise CommandError('--users and --states must be at least 1')
+        if options['sessions'] < 0 or options['runs'] < 0:
+            raise CommandError('--sessions and --runs cannot be negative')
+
+        emails = [options['email'].format(n=n) for n in range(options['users'])]
+        existing = User.objects.filter(email__in=emails)
+        if options['clear']:
+            deleted, _ = existing.delete()
+            if deleted:
+                self.stderr.write(f"Deleted {deleted} existing row(s)")
+        elif existing.exists():
+            raise CommandError(
+                f"{existing.count()} of these users already exist; use --clear to replace them"
+            )
+
+        rng = random.Random(options['seed'])
+        password = make_password(options['password'])
+        totals = {'users': 0, 'sessions': 0, 'runs': 0}
+        for n, email in enumerate(emails):
+            # One transaction per user keeps memory flat for large seeds
+            with transaction.atomic():
+                user = User.objects.create(
+                    username=email.split('@')[0],
+                    email=email,
+                    password=password,
+                    is_active=True,
+                    is_email_verified=True,
+                )
+                sessions = self.create_sessions(user, n, rng, options)
+                totals['runs'] += self.create_runs(sessions, rng, options)
+            totals['users'] += 1
+            totals['sessions'] += len(sessions)
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Seeded {totals['users']} user(s), {totals['sessions']} session(s) "
+            f"and {totals['runs']} run(s); password '{options['password']}'"
+        ))
+        self.stderr.write(f"Start the server with the rate limits raised: {THROTTLE_OVERRIDES}")
+
+    def create_sessions(self, user, n, rng, options):
+        to_create = []
+        for m in range(options['sessions']):
+            session = SimulationSessions(
+                user=user,
+                session_name=f"Load test {m}",
+                description=f"Seeded for load testing (user {n})",
+                automata_type='DFA',
+                automata_data=dense_dfa(options['states'], seed=rng.randrange(2 ** 32)),
+                is_shared=rng.random() < options['shared'],
+            )
+            session.refresh_metadata()
+            to_create.append(session)
+
+        return SimulationSessions.objects.bulk_create_indexed(to_create)
+
+    def create_runs(self, sessions, rng, options):
+        to_create = []
+        for session in sessions:
+            compiled = engine.CompiledAutomaton.compile(session.automata_data, session.automata_type)
+            inputs = random_inputs('ab', options['runs'], 8, seed=rng.randrange(2 ** 32))
+            for value in inputs:
+                result = engine.run(compiled, value)
+                to_create.append(SimulationRun(
+                    session=session,
+                    input_string=value,
+                    is_accepted=result['isAccepted'],
+                    execution_time=result['executionTime'],
+                    result_steps=result['steps'],
+                ))
+        SimulationRun.objects.bulk_create(to_create, batch_size=1000)
+        return len(to_create)
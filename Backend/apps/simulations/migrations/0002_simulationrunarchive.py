@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationRunArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.BigIntegerField(help_text='Primary key the run had in simulation_runs')),
+                ('input_string', models.CharField(max_length=1000)),
+                ('is_accepted', models.BooleanField()),
+                ('execution_time', models.FloatField(help_text='Execution time in milliseconds')),
+                ('step_count', models.PositiveIntegerField(default=0)),
+                ('compressed_steps', models.BinaryField(blank=True, help_text='zlib-compressed JSON trace, empty when traces are dropped', null=True)),
+                ('created_at', models.DateTimeField(help_text='When the original run was created')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_runs', to='simulations.simulationsessions')),
+            ],
+            options={
+                'verbose_name': 'Archived Simulation Run',
+                'verbose_name_plural': 'Archived Simulation Runs',
+                'db_table': 'simulation_runs_archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['session', '-created_at'], name='simulation__session_9c0a6a_idx')],
+            },
+        ),
+    ]
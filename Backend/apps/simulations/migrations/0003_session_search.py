@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:16
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F
+
+
+class PostgresTrigramExtension(TrigramExtension):
+    """TrigramExtension that only touches the database on PostgreSQL, both ways."""
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+# Kept out of the model state: on SQLite, table rebuilds (e.g. AddField)
+# recreate every index in the state, which would bring these back
+SEARCH_INDEXES = [
+    GinIndex(fields=['search_vector'], name='simulation_search_vector_gin'),
+    GinIndex(fields=['session_name'], name='simulation_name_trgm_gin', opclasses=['gin_trgm_ops']),
+]
+
+
+def add_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    SimulationSessions = apps.get_model('simulations', 'SimulationSessions')
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(SimulationSessions, index)
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    SimulationSessions = apps.get_model('simulations', 'SimulationSessions')
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(SimulationSessions, index)
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    SimulationSessions = apps.get_model('simulations', 'SimulationSessions')
+    config = settings.SESSION_SEARCH['CONFIG']
+    SimulationSessions.objects.using(schema_editor.connection.alias).update(
+        search_vector=(
+            SearchVector(F('session_name'), weight='A', config=config) +
+            SearchVector(F('description'), weight='B', config=config)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0002_simulationrunarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        PostgresTrigramExtension(),
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, help_text='Weighted tsvector of session_name and description', null=True),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
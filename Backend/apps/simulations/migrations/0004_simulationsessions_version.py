@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0003_session_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented on every automata_data change (optimistic concurrency)'),
+        ),
+    ]
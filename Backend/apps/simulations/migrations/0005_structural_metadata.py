@@ -0,0 +1,130 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:20
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of apps.simulations.automata.structural_metadata as of this
+# migration, so later changes to it don't alter what this backfill does
+EPSILON_SYMBOLS = frozenset(['', 'ε', 'epsilon', 'λ'])
+TABLE_CELL_BYTES = 4
+
+
+def _list(data, key):
+    value = data.get(key) if isinstance(data, dict) else None
+    return value if isinstance(value, list) else []
+
+
+def _is_deterministic(data, automata_type):
+    seen = set()
+    for transition in _list(data, 'transitions'):
+        if not isinstance(transition, dict):
+            return False
+        if automata_type == 'TM' and transition.get('readSymbol') is not None:
+            symbol = transition['readSymbol']
+        else:
+            symbol = transition.get('symbol', '')
+        if symbol in EPSILON_SYMBOLS:
+            return False
+        key = (transition.get('from'), symbol)
+        if key in seen:
+            return False
+        seen.add(key)
+    return True
+
+
+def structural_metadata(data, automata_type):
+    states = _list(data, 'states')
+    transitions = _list(data, 'transitions')
+    alphabet = {
+        symbol for symbol in _list(data, 'alphabet')
+        if isinstance(symbol, str)
+    }
+    canonical = json.dumps(
+        data, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    )
+    return {
+        'state_count': len(states),
+        'transition_count': len(transitions),
+        'alphabet_size': len(alphabet),
+        'is_deterministic': _is_deterministic(data, automata_type),
+        'content_hash': hashlib.sha256(canonical.encode('utf-8')).hexdigest(),
+        'compiled_size_estimate': (
+            len(states) * max(len(alphabet), 1) * TABLE_CELL_BYTES
+        ),
+    }
+
+
+def populate_metadata(apps, schema_editor):
+    SimulationSessions = apps.get_model('simulations', 'SimulationSessions')
+    db = schema_editor.connection.alias
+    sessions = SimulationSessions.objects.using(db).only(
+        'id', 'automata_type', 'automata_data'
+    )
+
+    fields = None
+    batch = []
+    for session in sessions.iterator(chunk_size=500):
+        metadata = structural_metadata(session.automata_data, session.automata_type)
+        for field, value in metadata.items():
+            setattr(session, field, value)
+        fields = list(metadata)
+        batch.append(session)
+        if len(batch) >= 500:
+            SimulationSessions.objects.using(db).bulk_update(batch, fields)
+            batch = []
+    if batch:
+        SimulationSessions.objects.using(db).bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0004_simulationsessions_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='alphabet_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='compiled_size_estimate',
+            field=models.PositiveBigIntegerField(default=0, help_text='Approximate bytes of a dense compiled transition table'),
+        ),
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 of the canonical automata_data JSON', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='is_deterministic',
+            field=models.BooleanField(default=False, help_text='No state has two transitions on one symbol and no epsilon moves'),
+        ),
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='state_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='transition_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='simulationsessions',
+            index=models.Index(fields=['user', 'state_count'], name='simulation__user_id_421fbe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simulationsessions',
+            index=models.Index(fields=['user', 'transition_count'], name='simulation__user_id_005d4f_idx'),
+        ),
+        migrations.RunPython(populate_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0005_structural_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(help_text='SimulationSessions.version this revision holds')),
+                ('kind', models.CharField(choices=[('snapshot', 'Snapshot'), ('delta', 'Delta')], max_length=10)),
+                ('snapshot_version', models.PositiveIntegerField(help_text='Version of the snapshot this revision is rebuilt from')),
+                ('automata_type', models.CharField(choices=[('DFA', 'Deterministic Finite Automaton'), ('NFA', 'Nondeterministic Finite Automaton'), ('TM', 'Turing Machine'), ('REGEX', 'Regular Expression')], max_length=10)),
+                ('data', models.JSONField(help_text='Full automata_data (snapshot) or delta from the previous version')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='simulations.simulationsessions')),
+            ],
+            options={
+                'verbose_name': 'Session Revision',
+                'verbose_name_plural': 'Session Revisions',
+                'db_table': 'simulation_session_revisions',
+                'ordering': ['-version'],
+                'constraints': [models.UniqueConstraint(fields=('session', 'version'), name='unique_revision_per_session_version')],
+            },
+        ),
+    ]
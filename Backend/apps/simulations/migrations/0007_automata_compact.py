@@ -0,0 +1,187 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:46
+
+import msgpack
+import orjson
+from django.db import migrations, models
+
+
+# Frozen copy of apps.simulations.compact.pack as of this migration, so
+# later changes to the encoding don't alter what this backfill writes
+COMPACT_VERSION = 1
+REF_FIELDS = ('from', 'to')
+SYMBOL_FIELDS = ('symbol', 'readSymbol', 'writeSymbol')
+
+
+def _is_table(value):
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def _column_key(column):
+    """
+    JSON form of a column for type-strict comparison (Python's == has
+    False == 0 == 0.0). None if orjson can't encode it, e.g. ints over
+    64 bits; such columns are never shared.
+    """
+    try:
+        return orjson.dumps(column)
+    except TypeError:
+        return None
+
+
+def _encode_table(items, encoders):
+    """
+    Column-wise encoding of a list of dicts. `encoders` maps a field to a
+    function returning an encoded column, or None to keep it as-is.
+    """
+    fields = []
+    seen = set()
+    for item in items:
+        for field in item:
+            if field not in seen:
+                seen.add(field)
+                fields.append(field)
+
+    cols = {}
+    absent = {}
+    keys = {}
+    for field in fields:
+        missing = [i for i, item in enumerate(items) if field not in item]
+        if missing:
+            absent[field] = missing
+        column = [item.get(field) for item in items]
+
+        encoder = encoders.get(field)
+        encoded = encoder(column, set(missing)) if encoder else None
+        if encoded is not None:
+            cols[field] = encoded
+            continue
+        # e.g. state names that repeat the ids
+        key = keys[field] = _column_key(column)
+        same = next(
+            (
+                other for other in fields[:fields.index(field)]
+                if key is not None and keys.get(other) == key
+                and absent.get(other) == absent.get(field)
+                and isinstance(cols[other], list)
+            ),
+            None
+        )
+        cols[field] = {'same': same} if same is not None else column
+
+    return {'n': len(items), 'cols': cols, 'absent': absent}
+
+
+def encode(data):
+    if not isinstance(data, dict):
+        raise ValueError('automata_data must be a JSON object')
+
+    compact = {'v': COMPACT_VERSION}
+    extra = {}
+
+    symbols = []
+    symbol_index = {}
+
+    def intern(symbol):
+        if symbol not in symbol_index:
+            symbol_index[symbol] = len(symbols)
+            symbols.append(symbol)
+        return symbol_index[symbol]
+
+    alphabet = data.get('alphabet')
+    if (
+        isinstance(alphabet, list) and
+        all(isinstance(symbol, str) for symbol in alphabet) and
+        len(set(alphabet)) == len(alphabet)
+    ):
+        for symbol in alphabet:
+            intern(symbol)
+        compact['alphabet'] = len(alphabet)
+    elif 'alphabet' in data:
+        extra['alphabet'] = alphabet
+
+    states = data.get('states')
+    state_index = None
+    if _is_table(states):
+        compact['states'] = _encode_table(states, {})
+        ids = [state.get('id') for state in states]
+        if (
+            all(isinstance(sid, str) for sid in ids) and
+            len(set(ids)) == len(ids)
+        ):
+            state_index = {sid: i for i, sid in enumerate(ids)}
+    elif 'states' in data:
+        extra['states'] = states
+
+    def ref_column(column, missing):
+        if state_index is None:
+            return None
+        values = [
+            -1 if i in missing else state_index.get(value) if isinstance(value, str) else None
+            for i, value in enumerate(column)
+        ]
+        if None in values:
+            return None
+        return {'ref': values}
+
+    def symbol_column(column, missing):
+        if not all(
+            isinstance(value, str) for i, value in enumerate(column) if i not in missing
+        ):
+            return None
+        return {'sym': [-1 if i in missing else intern(value) for i, value in enumerate(column)]}
+
+    transitions = data.get('transitions')
+    if _is_table(transitions):
+        encoders = {field: ref_column for field in REF_FIELDS}
+        encoders.update({field: symbol_column for field in SYMBOL_FIELDS})
+        compact['transitions'] = _encode_table(transitions, encoders)
+    elif 'transitions' in data:
+        extra['transitions'] = transitions
+
+    if symbols:
+        compact['symbols'] = symbols
+    for key, value in data.items():
+        if key not in ('alphabet', 'states', 'transitions'):
+            extra[key] = value
+    if extra:
+        compact['extra'] = extra
+    return compact
+
+
+def pack(data):
+    return msgpack.packb(encode(data), use_bin_type=True)
+
+
+def populate_compact(apps, schema_editor):
+    SimulationSessions = apps.get_model('simulations', 'SimulationSessions')
+    db = schema_editor.connection.alias
+    sessions = SimulationSessions.objects.using(db).only('id', 'automata_data')
+
+    batch = []
+    for session in sessions.iterator(chunk_size=500):
+        try:
+            session.automata_compact = pack(session.automata_data)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        batch.append(session)
+        if len(batch) >= 500:
+            SimulationSessions.objects.using(db).bulk_update(batch, ['automata_compact'])
+            batch = []
+    if batch:
+        SimulationSessions.objects.using(db).bulk_update(batch, ['automata_compact'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0006_session_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationsessions',
+            name='automata_compact',
+            field=models.BinaryField(blank=True, help_text='automata_data in the msgpack-packed compact encoding (compact.py)', null=True),
+        ),
+        migrations.RunPython(populate_compact, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:10
+
+from django.db import migrations
+
+SEARCH_INDEX_NAMES = ['simulation_search_vector_gin', 'simulation_name_trgm_gin']
+
+
+def drop_stray_search_indexes(apps, schema_editor):
+    """
+    Databases migrated before 0003 kept its GIN indexes out of the model
+    state can carry plain copies of them outside PostgreSQL; drop those.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    SimulationSessions = apps.get_model('simulations', 'SimulationSessions')
+    table = SimulationSessions._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        constraints = schema_editor.connection.introspection.get_constraints(cursor, table)
+    for name in SEARCH_INDEX_NAMES:
+        if name in constraints:
+            schema_editor.execute(
+                schema_editor._delete_index_sql(SimulationSessions, name)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulations', '0007_automata_compact'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_stray_search_indexes, migrations.RunPython.noop),
+    ]
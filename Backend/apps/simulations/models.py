@@ -1,13 +1,63 @@
+import json
 import logging
 import uuid
-from django.db import models
+import zlib
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Value
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.forms import ValidationError
 from django.utils import timezone
 from datetime import timedelta
 
+from . import engine
+from .automata import structural_metadata
+from .caching import invalidate_shared_session
+from .compact import pack as pack_compact
+from .revisions import apply_delta, diff
+
 User = get_user_model()
 
+class VersionConflict(Exception):
+    """
+    automata_data changed since the version a write was based on.
+    `version` is the session's current version.
+    """
+
+    def __init__(self, version):
+        super().__init__(f"Session is at version {version}")
+        self.version = version
+
+class SimulationSessionManager(models.Manager):
+    def recent(self, days=7):
+        """Get sessions created in last N days"""
+        cutoff = timezone.now() - timedelta(days=days)
+        return self.filter(created_at__gte=cutoff)
+    
+    def by_type(self, automata_type):
+        """Get sessions of specific type"""
+        return self.filter(automata_type=automata_type)
+    
+    def favorites(self, user):
+        """Get user's favorite sessions"""
+        return self.filter(user=user, is_favorite=True)
+
+    def bulk_create_indexed(self, sessions, **kwargs):
+        """
+        bulk_create() that also fills in the search vector, which save()
+        would normally maintain. Call refresh_metadata() on each session
+        first.
+        """
+        created = self.bulk_create(sessions, **kwargs)
+        if connection.vendor == 'postgresql' and created:
+            self.filter(pk__in=[session.pk for session in created]).update(
+                search_vector=self.model.build_search_vector(
+                    models.F('session_name'), models.F('description')
+                )
+            )
+        return created
+
 class SimulationSessions(models.Model):
     user = models.ForeignKey(
         User,
@@ -42,6 +92,36 @@ class SimulationSessions(models.Model):
     automata_data = models.JSONField(
         help_text='JSON representation of the automata configuration'
     )
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text='Incremented on every automata_data change (optimistic concurrency)'
+    )
+
+    # Structural metadata derived from automata_data in save()
+    state_count = models.PositiveIntegerField(default=0)
+    transition_count = models.PositiveIntegerField(default=0)
+    alphabet_size = models.PositiveIntegerField(default=0)
+    is_deterministic = models.BooleanField(
+        default=False,
+        help_text='No state has two transitions on one symbol and no epsilon moves'
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text='SHA-256 of the canonical automata_data JSON'
+    )
+    compiled_size_estimate = models.PositiveBigIntegerField(
+        default=0,
+        help_text='Approximate bytes of a dense compiled transition table'
+    )
+    automata_compact = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='automata_data in the msgpack-packed compact encoding (compact.py)'
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -59,6 +139,20 @@ class SimulationSessions(models.Model):
         editable=False,
         help_text='Public identifier for sharing sessions'
     )
+
+    # Full-text search (PostgreSQL only, maintained in save())
+    search_vector = SearchVectorField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Weighted tsvector of session_name and description'
+    )
+
+    # Fields the search vector is built from
+    SEARCH_FIELDS = ('session_name', 'description')
+
+    objects = SimulationSessionManager()
+
     class Meta:
         db_table = 'simulation_sessions'
         ordering = ['-last_accessed_at']
@@ -67,6 +161,11 @@ class SimulationSessions(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['is_favorite']),
+            models.Index(fields=['user', 'state_count']),
+            models.Index(fields=['user', 'transition_count']),
+            # GIN indexes on search_vector and session_name (trigram) are
+            # PostgreSQL only and created outside the model state by
+            # migration 0003, so SQLite table rebuilds don't recreate them
         ]
         constraints = [
             models.UniqueConstraint(
@@ -94,21 +193,119 @@ class SimulationSessions(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'automata_data', 'automata_type'} & set(update_fields):
+            metadata = self.refresh_metadata()
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = [*update_fields, *metadata]
+        if connection.vendor == 'postgresql' and (
+            update_fields is None or set(self.SEARCH_FIELDS) & set(update_fields)
+        ):
+            self.search_vector = self.build_search_vector(
+                Value(self.session_name), Value(self.description)
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'search_vector']
+
         super().save(*args, **kwargs)
     
+    def refresh_metadata(self):
+        """
+        Recompute the structural metadata and compact columns from automata_data.
+        Returns the values that were set.
+        """
+        metadata = self.derived_fields(self.automata_data, self.automata_type)
+        for field, value in metadata.items():
+            setattr(self, field, value)
+        return metadata
+
+    @staticmethod
+    def derived_fields(automata_data, automata_type):
+        """
+        Structural metadata plus the compact encoding of automata_data.
+        """
+        metadata = structural_metadata(automata_data, automata_type)
+        try:
+            metadata['automata_compact'] = pack_compact(automata_data)
+        except (ValueError, TypeError, OverflowError):
+            # Not encodable (e.g. integers beyond 64 bits); JSON only
+            metadata['automata_compact'] = None
+        return metadata
+
+    @staticmethod
+    def build_search_vector(session_name, description):
+        """
+        Weighted tsvector expression: names rank above descriptions.
+        Arguments are expressions (column references or Values).
+        """
+        config = settings.SESSION_SEARCH['CONFIG']
+        return (
+            SearchVector(session_name, weight='A', config=config) +
+            SearchVector(description, weight='B', config=config)
+        )
+    
     def delete(self, *args, **kwargs):
         logger = logging.getLogger(__name__)
-        logger.info(f"Deleting SimulationSession id={self.id} user={self.user.email}")
+        logger.info(f"Deleting SimulationSession id={self.id} user={self.user_id}")
         super().delete(*args, **kwargs)
     
     # Business logic methods
 
+    def update_automata_data(self, automata_data, expected_version):
+        """
+        Store already-validated automata_data if the row is still at
+        `expected_version`. Skips save()/full_clean(); returns False on a
+        version conflict.
+
+        `automata_data` is assumed to be derived from this instance's
+        copy, so that copy must also be at `expected_version`: otherwise
+        the edit was made against a different base than it would replace.
+        """
+        if self.version != expected_version:
+            return False
+
+        now = timezone.now()
+        metadata = self.derived_fields(automata_data, self.automata_type)
+        updated = SimulationSessions.objects.filter(
+            pk=self.pk,
+            version=expected_version
+        ).update(
+            automata_data=automata_data,
+            version=models.F('version') + 1,
+            updated_at=now,
+            last_accessed_at=now,
+            **metadata
+        )
+        if not updated:
+            return False
+
+        revision = SessionRevision.record(
+            self, automata_data, expected_version + 1,
+            previous_data=self.automata_data
+        )
+        previous_data = self.automata_data
+        self.automata_data = automata_data
+        for field, value in metadata.items():
+            setattr(self, field, value)
+        self.version = expected_version + 1
+        self.updated_at = self.last_accessed_at = now
+
+        engine.note_change(
+            self, expected_version, previous_data,
+            delta=revision.delta if revision is not None else None
+        )
+
+        # .update() bypasses the post_save signal
+        invalidate_shared_session(self.public_id)
+        return True
+
     def duplicate(self, new_name=None):
         """
         Create a duplicate of the current simulation session.
         """
         duplicate_session = SimulationSessions.objects.create(
-            user=self.user,
+            user_id=self.user_id,
             session_name=new_name or f"{self.session_name} (Copy)",
             description=self.description,
             automata_type=self.automata_type,
@@ -118,20 +315,6 @@ class SimulationSessions(models.Model):
         )
         return duplicate_session
     @property
-    def state_count(self):
-        """
-        Return the number of states in the automata.
-        """
-        return len(self.automata_data.get('states', []))
-    
-    @property
-    def transition_count(self):
-        """
-        Return the number of transitions in the automata.
-        """
-        return len(self.automata_data.get('transitions', []))
-    
-    @property
     def is_recent(self):
         """
         Check if the session was accessed in the last 7 days.
@@ -177,16 +360,257 @@ class SimulationRun(models.Model):
         status = "✓" if self.is_accepted else "✗"
         return f"{status} '{self.input_string}' on {self.session.session_name}"
     
-class SimulationSessionManager(models.Manager):
-    def recent(self, days=7):
-        """Get sessions created in last N days"""
-        cutoff = timezone.now() - timedelta(days=days)
-        return self.filter(created_at__gte=cutoff)
-    
-    def by_type(self, automata_type):
-        """Get sessions of specific type"""
-        return self.filter(automata_type=automata_type)
-    
-    def favorites(self, user):
-        """Get user's favorite sessions"""
-        return self.filter(user=user, is_favorite=True)
\ No newline at end of file
+class SimulationRunArchive(models.Model):
+    """
+    Summary of a SimulationRun pruned by the retention policy.
+
+    The full trace is either dropped or kept zlib-compressed, so old runs
+    stay countable without keeping `simulation_runs` (and its indexes) large.
+    """
+    session = models.ForeignKey(
+        SimulationSessions,
+        on_delete=models.CASCADE,
+        related_name='archived_runs'
+    )
+    run_id = models.BigIntegerField(
+        help_text='Primary key the run had in simulation_runs'
+    )
+    input_string = models.CharField(max_length=1000)
+    is_accepted = models.BooleanField()
+    execution_time = models.FloatField(
+        help_text='Execution time in milliseconds'
+    )
+    step_count = models.PositiveIntegerField(default=0)
+    compressed_steps = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text='zlib-compressed JSON trace, empty when traces are dropped'
+    )
+
+    created_at = models.DateTimeField(
+        help_text='When the original run was created'
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'simulation_runs_archive'
+        ordering = ['-created_at']
+        verbose_name = 'Archived Simulation Run'
+        verbose_name_plural = 'Archived Simulation Runs'
+        indexes = [
+            models.Index(fields=['session', '-created_at'])
+        ]
+
+    def __str__(self):
+        status = "✓" if self.is_accepted else "✗"
+        return f"{status} '{self.input_string}' (archived run {self.run_id})"
+
+    @classmethod
+    def from_run(cls, run, keep_trace=True):
+        """
+        Build (without saving) an archive row for a SimulationRun.
+        """
+        steps = run.result_steps
+        compressed = None
+        if keep_trace and steps is not None:
+            compressed = zlib.compress(
+                json.dumps(steps, separators=(',', ':')).encode('utf-8')
+            )
+        return cls(
+            session_id=run.session_id,
+            run_id=run.id,
+            input_string=run.input_string,
+            is_accepted=run.is_accepted,
+            execution_time=run.execution_time,
+            step_count=len(steps) if isinstance(steps, list) else 0,
+            compressed_steps=compressed,
+            created_at=run.created_at,
+        )
+
+    @property
+    def result_steps(self):
+        """
+        Decompressed trace, or None if it was dropped on archival.
+        """
+        if not self.compressed_steps:
+            return None
+        return json.loads(zlib.decompress(bytes(self.compressed_steps)))
+
+
+class SessionRevision(models.Model):
+    """
+    One version of a session's automata_data.
+
+    Every SESSION_REVISIONS['SNAPSHOT_INTERVAL'] versions (or when a delta
+    would not be much smaller) the full document is stored; in between only
+    a structural delta from the previous version (see revisions.py). Any
+    version is rebuilt from at most one snapshot plus SNAPSHOT_INTERVAL - 1
+    deltas.
+    """
+    KIND_SNAPSHOT = 'snapshot'
+    KIND_DELTA = 'delta'
+    KINDS = [
+        (KIND_SNAPSHOT, 'Snapshot'),
+        (KIND_DELTA, 'Delta'),
+    ]
+
+    session = models.ForeignKey(
+        SimulationSessions,
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+    version = models.PositiveIntegerField(
+        help_text='SimulationSessions.version this revision holds'
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    snapshot_version = models.PositiveIntegerField(
+        help_text='Version of the snapshot this revision is rebuilt from'
+    )
+    automata_type = models.CharField(
+        max_length=10,
+        choices=SimulationSessions.AUTOMATA_TYPES
+    )
+    data = models.JSONField(
+        help_text='Full automata_data (snapshot) or delta from the previous version'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'simulation_session_revisions'
+        ordering = ['-version']
+        verbose_name = 'Session Revision'
+        verbose_name_plural = 'Session Revisions'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['session', 'version'],
+                name='unique_revision_per_session_version'
+            )
+        ]
+
+    def __str__(self):
+        return f"Session {self.session_id} v{self.version} ({self.kind})"
+
+    @classmethod
+    def record(cls, session, automata_data, version, previous_data=None):
+        """
+        Store `automata_data` as `version` of `session`.
+
+        A delta is written when the previous version is already stored and
+        `previous_data` (its automata_data) is given; otherwise a snapshot.
+        Sessions without history get `previous_data` snapshotted first so
+        the change itself can be undone.
+        """
+        config = settings.SESSION_REVISIONS
+        latest = cls.objects.filter(session=session).order_by('-version').values(
+            'version', 'snapshot_version'
+        ).first()
+
+        if latest is None and previous_data is not None and version > 1:
+            cls._store(
+                session, version - 1, cls.KIND_SNAPSHOT, version - 1,
+                previous_data, previous_data
+            )
+            latest = {'version': version - 1, 'snapshot_version': version - 1}
+
+        if (
+            latest is not None and
+            previous_data is not None and
+            latest['version'] == version - 1 and
+            version - latest['snapshot_version'] < config['SNAPSHOT_INTERVAL']
+        ):
+            delta = diff(previous_data, automata_data)
+            # A delta close to the document's size saves nothing
+            if (
+                len(json.dumps(delta, separators=(',', ':'))) <=
+                config['MAX_DELTA_RATIO'] *
+                len(json.dumps(automata_data, separators=(',', ':')))
+            ):
+                return cls._store(
+                    session, version, cls.KIND_DELTA,
+                    latest['snapshot_version'], delta, automata_data
+                )
+
+        return cls._store(
+            session, version, cls.KIND_SNAPSHOT, version,
+            automata_data, automata_data
+        )
+
+    @classmethod
+    def _store(cls, session, version, kind, snapshot_version, data, automata_data):
+        """
+        Create the revision. If a row for `version` already exists (left
+        by a writer whose base differed), it is replaced with a snapshot
+        of `automata_data` so the chain can't rebuild the wrong document.
+        """
+        try:
+            # Savepoint so the table stays usable after a duplicate
+            with transaction.atomic():
+                return cls.objects.create(
+                    session=session,
+                    version=version,
+                    kind=kind,
+                    snapshot_version=snapshot_version,
+                    automata_type=session.automata_type,
+                    data=data,
+                )
+        except IntegrityError:
+            logging.getLogger(__name__).warning(
+                f"Revision {version} of session {session.id} already stored; "
+                f"replacing it with a snapshot"
+            )
+            cls.objects.filter(session=session, version=version).update(
+                kind=cls.KIND_SNAPSHOT,
+                snapshot_version=version,
+                automata_type=session.automata_type,
+                data=automata_data,
+            )
+            return cls.objects.get(session=session, version=version)
+
+    @classmethod
+    def reconstruct(cls, session, version):
+        """
+        automata_data as of `version`, or None if it is not stored.
+        """
+        target = cls.objects.filter(session=session, version=version).values(
+            'snapshot_version'
+        ).first()
+        if target is None:
+            return None
+
+        chain = cls.objects.filter(
+            session=session,
+            version__gte=target['snapshot_version'],
+            version__lte=version
+        ).order_by('version').values_list('kind', 'data')
+
+        data = None
+        for kind, revision_data in chain:
+            if kind == cls.KIND_SNAPSHOT:
+                data = revision_data
+            else:
+                data = apply_delta(data, revision_data)
+        return data
+
+    @property
+    def delta(self):
+        """
+        Delta from the previous version, or None for snapshots.
+        """
+        return self.data if self.kind == self.KIND_DELTA else None
+
+    def make_snapshot(self):
+        """
+        Turn this revision into a snapshot so older ones can be deleted.
+        """
+        if self.kind == self.KIND_SNAPSHOT:
+            return
+        data = SessionRevision.reconstruct(self.session_id, self.version)
+        SessionRevision.objects.filter(
+            session=self.session_id,
+            snapshot_version=self.snapshot_version,
+            version__gt=self.version
+        ).update(snapshot_version=self.version)
+        self.kind = self.KIND_SNAPSHOT
+        self.snapshot_version = self.version
+        self.data = data
+        self.save(update_fields=['kind', 'snapshot_version', 'data'])
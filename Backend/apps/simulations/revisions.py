@@ -0,0 +1,149 @@
+"""
+Structural deltas between two versions of automata_data.
+
+Top-level lists of objects with unique string ids (the editor's "states"
+and "transitions") are diffed element by element; any other top-level key
+is stored whole when it changes. A delta looks like:
+
+    {
+        "lists": {
+            "states": {
+                "add": [{"id": "q4", ...}],
+                "remove": ["q2"],
+                "update": {"q1": {"x": 120, "y": 80}},
+                "replace": {"q3": {...}},   # element lost a field
+                "order": ["q0", "q1", ...]  # only if not the natural order
+            }
+        },
+        "set": {"alphabet": ["a", "b"]},
+        "unset": ["notes"]
+    }
+
+Moving a state therefore costs its id and two coordinates instead of a
+copy of the whole automaton. apply_delta(old, diff(old, new)) == new.
+"""
+
+
+def _keyed(value):
+    """
+    {id: element} for a list of dicts with unique string ids, else None.
+    """
+    if not isinstance(value, list):
+        return None
+    elements = {}
+    for element in value:
+        if not isinstance(element, dict):
+            return None
+        element_id = element.get('id')
+        if not isinstance(element_id, str) or element_id in elements:
+            return None
+        elements[element_id] = element
+    return elements
+
+
+def _diff_elements(old, new):
+    """
+    Element-wise delta between two keyed lists, or None if equal.
+    """
+    old_ids = list(old)
+    new_ids = list(new)
+
+    delta = {}
+    added = [element_id for element_id in new_ids if element_id not in old]
+    removed = [element_id for element_id in old_ids if element_id not in new]
+    if added:
+        delta['add'] = [new[element_id] for element_id in added]
+    if removed:
+        delta['remove'] = removed
+
+    update = {}
+    replace = {}
+    for element_id in new_ids:
+        before = old.get(element_id)
+        after = new[element_id]
+        if before is None or before == after:
+            continue
+        if before.keys() - after.keys():
+            replace[element_id] = after
+        else:
+            update[element_id] = {
+                field: value for field, value in after.items()
+                if field not in before or before[field] != value
+            }
+    if update:
+        delta['update'] = update
+    if replace:
+        delta['replace'] = replace
+
+    removed_ids = set(removed)
+    natural = [i for i in old_ids if i not in removed_ids] + added
+    if natural != new_ids:
+        delta['order'] = new_ids
+
+    return delta or None
+
+
+def _apply_elements(old, delta):
+    elements = dict(_keyed(old))
+    removed = set(delta.get('remove', ()))
+    for element_id in removed:
+        elements.pop(element_id, None)
+    for element_id, fields in delta.get('update', {}).items():
+        elements[element_id] = {**elements[element_id], **fields}
+    for element_id, element in delta.get('replace', {}).items():
+        elements[element_id] = element
+
+    added = delta.get('add', [])
+    for element in added:
+        elements[element['id']] = element
+
+    order = delta.get('order')
+    if order is None:
+        order = [
+            element['id'] for element in old
+            if element['id'] not in removed
+        ] + [element['id'] for element in added]
+    return [elements[element_id] for element_id in order]
+
+
+def diff(old, new):
+    """
+    Delta that turns automata_data `old` into `new` ({} if equal).
+    """
+    delta = {}
+    lists = {}
+    changed = {}
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+            continue
+        if old[key] == value:
+            continue
+        old_elements = _keyed(old[key])
+        new_elements = _keyed(value)
+        if old_elements is not None and new_elements is not None:
+            lists[key] = _diff_elements(old_elements, new_elements)
+        else:
+            changed[key] = value
+
+    if lists:
+        delta['lists'] = lists
+    if changed:
+        delta['set'] = changed
+    unset = [key for key in old if key not in new]
+    if unset:
+        delta['unset'] = unset
+    return delta
+
+
+def apply_delta(old, delta):
+    """
+    Apply a delta from diff(). `old` is not modified.
+    """
+    data = dict(old)
+    for key, element_delta in delta.get('lists', {}).items():
+        data[key] = _apply_elements(data[key], element_delta)
+    data.update(delta.get('set', {}))
+    for key in delta.get('unset', ()):
+        data.pop(key, None)
+    return data
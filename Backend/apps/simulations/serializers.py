@@ -1,11 +1,90 @@
 from rest_framework import serializers
-from .models import SimulationSessions, SimulationRun
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from . import compact, engine
+from .fieldsets import Fieldset
+from .jsonpatch import JSONPatchError, apply_patch
+from .layout import ALGORITHMS
+from .models import SessionRevision, SimulationSessions, SimulationRun, VersionConflict
 from django.contrib.auth import get_user_model
 import logging
 
 User = get_user_model()
 
-class SimulationRunSerializer(serializers.ModelSerializer):
+# Runs embedded in session details
+RECENT_RUNS = 5
+
+def recent_runs_prefetch(with_steps=True):
+    """
+    Prefetch only the runs SimulationSessionsDetailSerializer embeds.
+    """
+    queryset = SimulationRun.objects.order_by('-created_at')
+    if not with_steps:
+        queryset = queryset.defer('result_steps')
+    return Prefetch(
+        'runs',
+        queryset=queryset[:RECENT_RUNS],
+        to_attr='recent_runs'
+    )
+
+class SparseFieldsetMixin:
+    """
+    Render only the fields allowed by the Fieldset in context['fieldset']
+    (set by the viewsets from ?fields= / ?omit=). Dropped fields are never
+    evaluated, so their method fields and lookups don't run.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get('fieldset')
+        if fieldset is not None and not fieldset.is_default:
+            fieldset.filter_fields(self.fields)
+
+class CompactAutomataInputMixin:
+    """
+    Accept `automata_compact` (the ?format=compact encoding, see compact.py)
+    in place of automata_data.
+    """
+    def to_internal_value(self, data):
+        if 'automata_compact' in data and 'automata_data' not in data:
+            try:
+                automata_data = compact.decode(data['automata_compact'])
+            except compact.CompactError as e:
+                raise serializers.ValidationError({'automata_compact': [str(e)]})
+            data = data.copy()
+            data.pop('automata_compact')
+            data['automata_data'] = automata_data
+        return super().to_internal_value(data)
+
+AUTOMATA_REQUIRED_KEYS = ['states', 'transitions', 'alphabet']
+
+def validate_automata_structure(value, keys=None):
+    """
+    Validate automata_data structure.
+
+    `keys` limits the checks to those top-level keys (used for patches,
+    where only the touched parts need re-validating).
+    """
+    if not isinstance(value, dict):
+        raise serializers.ValidationError("Automata data must be a JSON object.")
+
+    required_keys = AUTOMATA_REQUIRED_KEYS if keys is None else [
+        key for key in AUTOMATA_REQUIRED_KEYS if key in keys
+    ]
+    for key in required_keys:
+        if key not in value:
+            raise serializers.ValidationError(f"Automata data must contain '{key}' key.")
+
+    if 'states' in required_keys:
+        if not isinstance(value['states'], list):
+            raise serializers.ValidationError("'states' must be a list.")
+
+        if len(value['states']) == 0:
+            raise serializers.ValidationError("At least one state is required")
+
+    return value
+
+class SimulationRunSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = SimulationRun
         fields = [
@@ -18,7 +97,17 @@ class SimulationRunSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
-class SimulationSessionsListSerializer(serializers.ModelSerializer):
+class SessionRevisionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SessionRevision
+        fields = [
+            'version',
+            'kind',
+            'automata_type',
+            'created_at'
+        ]
+
+class SimulationSessionsListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     run_count = serializers.IntegerField(read_only=True)
     class Meta:
         model = SimulationSessions
@@ -31,10 +120,13 @@ class SimulationSessionsListSerializer(serializers.ModelSerializer):
             'is_shared',
             'created_at',
             'last_accessed_at',
+            'state_count',
+            'transition_count',
+            'is_deterministic',
             'run_count'
         ]
 
-class SimulationSessionsDetailSerializer(serializers.ModelSerializer):
+class SimulationSessionsDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     runs = serializers.SerializerMethodField()
     
     state_count = serializers.IntegerField(read_only=True)
@@ -53,6 +145,7 @@ class SimulationSessionsDetailSerializer(serializers.ModelSerializer):
             'description',
             'automata_type',
             'automata_data',
+            'version',
             'is_favorite',
             'is_shared',
             'share_url',
@@ -62,12 +155,34 @@ class SimulationSessionsDetailSerializer(serializers.ModelSerializer):
             'last_accessed_at',
             'state_count',
             'transition_count',
+            'alphabet_size',
+            'is_deterministic',
+            'content_hash',
             'runs'
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ?format=compact: same data, indexed encoding
+        if self.context.get('automata_format') == 'compact':
+            if self.fields.pop('automata_data', None) is not None:
+                self.fields['automata_compact'] = serializers.SerializerMethodField()
+
+    def get_automata_compact(self, obj):
+        if obj.automata_compact:
+            return compact.unpack(obj.automata_compact)
+        return compact.encode(obj.automata_data)
+
     def get_runs(self, obj):
-        recent_runs = obj.runs.order_by('-created_at')[:5]
-        return SimulationRunSerializer(recent_runs, many=True).data
+        recent_runs = getattr(obj, 'recent_runs', None)
+        if recent_runs is None:
+            recent_runs = obj.runs.order_by('-created_at')[:RECENT_RUNS]
+        fieldset = self.context.get('fieldset') or Fieldset()
+        return SimulationRunSerializer(
+            recent_runs,
+            many=True,
+            context={'fieldset': fieldset.nested('runs')}
+        ).data
     
     def get_share_url(self, obj):
         """
@@ -85,10 +200,10 @@ class SimulationSessionsDetailSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.user == request.user
+            return obj.user_id == request.user.pk
         return False
 
-class SimulationSessionsCreateSerializer(serializers.ModelSerializer):
+class SimulationSessionsCreateSerializer(CompactAutomataInputMixin, serializers.ModelSerializer):
     class Meta:
         model = SimulationSessions
         fields = [
@@ -102,23 +217,7 @@ class SimulationSessionsCreateSerializer(serializers.ModelSerializer):
     
     # Validate automata_data structure
     def validate_automata_data(self, value):
-
-        required_keys = ['states', 'transitions', 'alphabet']
-
-        if not isinstance(value, dict):
-            raise serializers.ValidationError("Automata data must be a JSON object.")
-        
-        for key in required_keys:
-            if key not in value:
-                raise serializers.ValidationError(f"Automata data must contain '{key}' key.")
-        
-        if not isinstance(value['states'], list):
-            raise serializers.ValidationError("'states' must be a list.")
-        
-        if len(value['states']) == 0:
-            raise serializers.ValidationError("At least one state is required")
-        
-        return value
+        return validate_automata_structure(value)
     
     def validate(self, data):
         # Check if user already has session with this name
@@ -139,10 +238,35 @@ class SimulationSessionsCreateSerializer(serializers.ModelSerializer):
 
         return SimulationSessions.objects.create(**validated_data)
     
-class SimulationSessionsUpdateSerializer(serializers.ModelSerializer):
+class SimulationSessionsImportSerializer(serializers.ModelSerializer):
+    """
+    One session record of a bulk import (see transfer.py). Name conflicts
+    are resolved by the importer for the whole file, not per record.
+    """
+    class Meta:
+        model = SimulationSessions
+        fields = [
+            'session_name',
+            'description',
+            'automata_type',
+            'automata_data',
+            'is_favorite'
+        ]
+
+    def validate_automata_data(self, value):
+        return validate_automata_structure(value)
+
+class SimulationSessionsUpdateSerializer(CompactAutomataInputMixin, serializers.ModelSerializer):
+    """
+    PUT / PATCH of a session. A change to automata_data goes through the
+    same conditional update as JSON patches: it applies only if the session
+    is still at `version` (from the body, the If-Match header, or else the
+    version loaded for this request) and raises VersionConflict otherwise.
+    """
 
     session_name = serializers.CharField(required=False)
     automata_data = serializers.JSONField(required=False)
+    version = serializers.IntegerField(required=False, min_value=1)
     
     class Meta:
         model = SimulationSessions
@@ -151,27 +275,175 @@ class SimulationSessionsUpdateSerializer(serializers.ModelSerializer):
             'description',
             'automata_type',
             'automata_data',
+            'version',
             'is_favorite'
         ]
     
     def update(self, instance, validated_data):
+        if_match = validated_data.pop('expected_version', None)
+        expected_version = validated_data.pop('version', if_match)
+        automata_data = validated_data.pop('automata_data', instance.automata_data)
+        data_changed = automata_data != instance.automata_data
+
+        if expected_version is None:
+            expected_version = instance.version
+        elif expected_version != instance.version:
+            raise VersionConflict(instance.version)
 
         changes = []
-        
         for field, value in validated_data.items():
             if getattr(instance, field) != value:
                 changes.append(field)
                 setattr(instance, field, value)
-        
-        instance.save()
-        
+
+        # Never save() automata_data or version from memory: a concurrent
+        # patch would be overwritten and its version number reused
+        with transaction.atomic():
+            if changes:
+                instance.save(update_fields=[*changes, 'updated_at'])
+            if data_changed:
+                if 'automata_type' in changes:
+                    engine.forget(instance.pk)
+                if not instance.update_automata_data(automata_data, expected_version):
+                    raise VersionConflict(
+                        SimulationSessions.objects.filter(
+                            pk=instance.pk
+                        ).values_list('version', flat=True).first()
+                    )
+
+        if 'automata_type' in changes and not data_changed:
+            engine.forget(instance.pk)
+
         # Log changes
+        if data_changed:
+            changes.append('automata_data')
         if changes:
             logger = logging.getLogger(__name__)
             logger.info(f"Updated session {instance.id}: {', '.join(changes)}")
         
         return instance
 
+class SimulationSessionsPatchSerializer(serializers.Serializer):
+    """
+    Delta update of automata_data: RFC 6902 operations applied server-side
+    against the version the client last saw.
+    """
+    version = serializers.IntegerField(min_value=1)
+    operations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=1000
+    )
+
+    def validate(self, data):
+        try:
+            patched, touched = apply_patch(
+                self.instance.automata_data,
+                data['operations']
+            )
+        except JSONPatchError as e:
+            raise serializers.ValidationError({'operations': str(e)})
+
+        # Only re-check what the patch wrote to
+        try:
+            validate_automata_structure(
+                patched,
+                keys=None if None in touched else touched
+            )
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({'operations': e.detail})
+
+        data['automata_data'] = patched
+        return data
+
+class LayoutRequestSerializer(serializers.Serializer):
+    """
+    Options for the layout action; the iteration limit also depends on
+    the state count and is checked by compute_layout().
+    """
+    algorithm = serializers.ChoiceField(choices=ALGORITHMS, default='layered')
+    iterations = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=settings.AUTOMATA_LAYOUT['MAX_ITERATIONS']
+    )
+    version = serializers.IntegerField(required=False, min_value=1)
+
+
+class SimulationRequestSerializer(serializers.Serializer):
+    """
+    Inputs for a server-side run: one `input` or a list of `inputs`.
+    """
+    input = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+    inputs = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, trim_whitespace=False),
+        required=False,
+        allow_empty=False
+    )
+    trace = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        config = settings.SIMULATION_ENGINE
+        if ('input' in data) == ('inputs' in data):
+            raise serializers.ValidationError('Give exactly one of input or inputs')
+        inputs = data.pop('inputs', None) or [data.pop('input')]
+        if len(inputs) > config['MAX_INPUTS']:
+            raise serializers.ValidationError(
+                {'inputs': f"At most {config['MAX_INPUTS']} inputs per request"}
+            )
+        if any(len(value) > config['MAX_INPUT_LENGTH'] for value in inputs):
+            raise serializers.ValidationError(
+                {'inputs': f"Inputs are limited to {config['MAX_INPUT_LENGTH']} characters"}
+            )
+        data['inputs'] = inputs
+        return data
+
+class GradingTestSerializer(serializers.Serializer):
+    input = serializers.CharField(allow_blank=True, trim_whitespace=False)
+    expected = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+class GradingRequestSerializer(serializers.Serializer):
+    """
+    Which sessions to grade against the reference, and how. Test vectors
+    are input strings or {"input", "expected"}; without "expected" the
+    reference's verdict is used.
+    """
+    submissions = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False
+    )
+    name = serializers.CharField(required=False)
+    automata_type = serializers.ChoiceField(
+        choices=SimulationSessions.AUTOMATA_TYPES,
+        required=False
+    )
+    tests = serializers.ListField(child=serializers.JSONField(), required=False, default=list)
+    equivalence = serializers.BooleanField(default=True)
+
+    def validate_tests(self, value):
+        max_tests = settings.GRADING['MAX_TESTS']
+        if len(value) > max_tests:
+            raise serializers.ValidationError(f"At most {max_tests} tests")
+        tests = []
+        for test in value:
+            if isinstance(test, str):
+                test = {'input': test}
+            serializer = GradingTestSerializer(data=test)
+            if not serializer.is_valid():
+                raise serializers.ValidationError(serializer.errors)
+            tests.append(serializer.validated_data)
+        return tests
+
+    def validate(self, data):
+        if not ({'submissions', 'name', 'automata_type'} & data.keys()):
+            raise serializers.ValidationError(
+                'Give submissions, or a name / automata_type filter'
+            )
+        if not data['equivalence'] and not data['tests']:
+            raise serializers.ValidationError('Nothing to check: no tests and equivalence off')
+        return data
+
 class SimulationSessionsHyperlinkSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = SimulationSessions
@@ -206,4 +478,4 @@ class SimulationSessionWithUserSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        return obj.user == request.user
\ No newline at end of file
+        return obj.user_id == request.user.pk
\ No newline at end of file
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import engine
+from .caching import invalidate_shared_session
+from .models import SimulationRun, SimulationSessions
+
+
+@receiver(post_save, sender=SimulationSessions)
+@receiver(post_delete, sender=SimulationSessions)
+def invalidate_session_cache(sender, instance, **kwargs):
+    # Always invalidate: revoking a share link saves with is_shared=False
+    invalidate_shared_session(instance.public_id)
+
+
+@receiver(post_delete, sender=SimulationSessions)
+def forget_compiled_session(sender, instance, **kwargs):
+    engine.forget(instance.pk)
+
+
+@receiver(post_save, sender=SimulationRun)
+def invalidate_session_cache_on_run(sender, instance, created, **kwargs):
+    session = instance.session
+    if session.is_shared:
+        invalidate_shared_session(session.public_id)
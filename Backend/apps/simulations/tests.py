@@ -1,3 +1,413 @@
-from django.test import TestCase
+import itertools
+import json
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.simulations import compact
+from apps.simulations.caching import get_shared_session
+from apps.simulations.engine import CompiledAutomaton, accepts, run
+from apps.simulations.jsonpatch import JSONPatchError, apply_patch
+from apps.simulations.models import SessionRevision, SimulationSessions
+from apps.simulations.revisions import apply_delta, diff
+from apps.simulations.views import build_shared_entry
+from config.middleware import CompressionMiddleware
+
+
+class CompactRoundTripTests(SimpleTestCase):
+    CASES = [
+        # Columns equal under Python's == but not as JSON
+        {'states': [{'id': 'a', 'x': 0, 'isFinal': False}, {'id': 'b', 'x': 1, 'isFinal': True}]},
+        {'states': [{'id': 'a', 'x': 1, 'y': 1.0}, {'id': 'b', 'x': 2, 'y': 2.0}]},
+        {'states': [{'id': 'a', 'x': 0.0, 'y': 0, 'f': False}]},
+        # Genuinely repeated columns, and columns with gaps
+        {'states': [{'id': 'q0', 'name': 'q0'}, {'id': 'q1', 'name': 'q1', 'isStart': True}]},
+        {
+            'alphabet': ['a', 'b'],
+            'states': [{'id': 'q0'}, {'id': 'q1'}],
+            'transitions': [
+                {'from': 'q0', 'to': 'q1', 'symbol': 'a'},
+                {'from': 'q1', 'to': 'q0', 'symbol': 'b', 'weight': 1.5},
+            ],
+            'tape': [0, 1, True],
+        },
+        # Shapes kept verbatim
+        {'states': ['q0', 'q1'], 'transitions': [], 'big': 2 ** 70},
+    ]
+
+    def test_round_trip_keeps_json_types(self):
+        for data in self.CASES:
+            with self.subTest(data=data):
+                decoded = compact.decode(compact.encode(data))
+                self.assertEqual(json.dumps(decoded, sort_keys=True), json.dumps(data, sort_keys=True))
+
+    def test_packed_round_trip(self):
+        # msgpack has no ints over 64 bits, so the last case can't be packed
+        for data in self.CASES[:-1]:
+            with self.subTest(data=data):
+                decoded = compact.decode(compact.unpack(compact.pack(data)))
+                self.assertEqual(json.dumps(decoded, sort_keys=True), json.dumps(data, sort_keys=True))
+
+
+class PatchedEngineTests(SimpleTestCase):
+    """
+    An engine patched edit by edit must behave like a fresh compile, also
+    for "DFAs" with several transitions on one symbol.
+    """
+    INPUTS = ['', 'a', 'b', 'ab', 'ba', 'aab', 'abb', 'bab', 'abab']
+
+    def random_dfa(self, rng):
+        return {
+            'alphabet': ['a', 'b'],
+            'states': [
+                {'id': f'q{i}', 'isInitial': i == 0, 'isFinal': rng.random() < 0.4}
+                for i in range(4)
+            ],
+            'transitions': [self.random_transition(rng, f't{j}') for j in range(8)],
+        }
+
+    def random_transition(self, rng, tid):
+        return {
+            'id': tid,
+            'from': f'q{rng.randrange(4)}',
+            'to': f'q{rng.randrange(4)}',
+            'symbol': rng.choice('ab'),
+        }
+
+    def edit(self, rng, data, ids):
+        transitions = [dict(t) for t in data['transitions']]
+        for _ in range(rng.randrange(1, 4)):
+            kind = rng.randrange(4)
+            if kind == 0 and transitions:
+                transitions.pop(rng.randrange(len(transitions)))
+            elif kind == 1:
+                transitions.insert(
+                    rng.randrange(len(transitions) + 1),
+                    self.random_transition(rng, f'n{next(ids)}')
+                )
+            elif kind == 2:
+                rng.shuffle(transitions)
+            elif transitions:
+                transition = rng.choice(transitions)
+                transition['symbol'] = rng.choice('ab')
+                transition['to'] = f'q{rng.randrange(4)}'
+        return {**data, 'transitions': transitions}
+
+    def assertSameAsFresh(self, engine, data):
+        fresh = CompiledAutomaton.compile(data, 'DFA')
+        for value in self.INPUTS:
+            self.assertEqual(accepts(engine, value), accepts(fresh, value), value)
+            self.assertEqual(run(engine, value)['steps'], run(fresh, value)['steps'], value)
+
+    def test_apply_delta_matches_fresh_compile(self):
+        rng = random.Random(1)
+        ids = itertools.count()
+        for _ in range(40):
+            data = self.random_dfa(rng)
+            engine = CompiledAutomaton.compile(data, 'DFA')
+            for _ in range(5):
+                new_data = self.edit(rng, data, ids)
+                engine.apply_delta(diff(data, new_data))
+                data = new_data
+                self.assertSameAsFresh(engine, data)
+
+    def test_sync_matches_fresh_compile(self):
+        rng = random.Random(2)
+        ids = itertools.count()
+        for _ in range(40):
+            data = self.random_dfa(rng)
+            engine = CompiledAutomaton.compile(data, 'DFA')
+            for _ in range(5):
+                data = self.edit(rng, data, ids)
+                engine.sync(data)
+                self.assertSameAsFresh(engine, data)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, content_type, encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding)
+        response = HttpResponse(b'x' * 4096, content_type=content_type)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compresses_api_media_types(self):
+        for content_type in ['application/json', 'application/msgpack', 'application/x-ndjson']:
+            with self.subTest(content_type=content_type):
+                self.assertEqual(self.respond(content_type)['Content-Encoding'], 'gzip')
+
+    def test_skips_html(self):
+        response = self.respond('text/html; charset=utf-8')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'x' * 4096)
+
+    def test_keeps_existing_content_encoding(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = HttpResponse(b'x' * 4096, content_type='application/json')
+        response['Content-Encoding'] = 'identity'
+        response = CompressionMiddleware(lambda request: response)(request)
+        self.assertEqual(response['Content-Encoding'], 'identity')
+        self.assertEqual(response.content, b'x' * 4096)
+
+
+class SessionTestCase(TestCase):
+    AUTOMATON = {
+        'alphabet': ['a'],
+        'states': [{'id': 'q0', 'isInitial': True, 'isFinal': True}],
+        'transitions': [{'id': 't0', 'from': 'q0', 'to': 'q0', 'symbol': 'a'}],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='owner@example.com', username='owner', password='pw', is_active=True
+        )
+
+    def setUp(self):
+        self.session = SimulationSessions.objects.create(
+            user=self.user,
+            session_name='Loop',
+            automata_type='DFA',
+            automata_data=self.AUTOMATON,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class SharedSessionTests(SessionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session.is_shared = True
+        self.session.save()
+        self.url = f'/simulations/sessions/{self.session.public_id}/shared/'
+
+    def test_entry_is_none_once_deleted_or_unshared(self):
+        request = RequestFactory().get(self.url)
+        session = SimulationSessions.objects.get(pk=self.session.pk)
+        SimulationSessions.objects.filter(pk=session.pk).update(is_shared=False)
+        self.assertIsNone(build_shared_entry(session, request))
+        SimulationSessions.objects.filter(pk=session.pk).delete()
+        self.assertIsNone(build_shared_entry(session, request))
+
+    def test_gone_while_building_is_404_and_not_cached(self):
+        with mock.patch('apps.simulations.views.build_shared_entry', return_value=None), \
+                mock.patch('apps.simulations.async_views.build_shared_entry', return_value=None):
+            response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(get_shared_session(self.session.public_id))
+
+    def test_conditional_get_returns_304(self):
+        response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response = APIClient().get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class ConditionalRequestTests(SessionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/simulations/sessions/{self.session.public_id}/'
+
+    def edited(self, symbol):
+        data = json.loads(json.dumps(self.AUTOMATON))
+        data['transitions'][0]['symbol'] = symbol
+        data['alphabet'] = [symbol]
+        return data
+
+    def test_detail_returns_304_until_the_session_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.patch(self.url, {'session_name': 'Renamed'}, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_stale_version_in_body_is_409(self):
+        version = self.client.get(self.url).data['version']
+        response = self.client.patch(
+            self.url, {'automata_data': self.edited('b'), 'version': version}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.patch(
+            self.url, {'automata_data': self.edited('c'), 'version': version}, format='json'
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['version'], version + 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.automata_data, self.edited('b'))
+
+    def test_stale_if_match_is_409(self):
+        version = self.client.get(self.url).data['version']
+        payload = {
+            'session_name': 'Loop',
+            'automata_type': 'DFA',
+            'automata_data': self.edited('b'),
+        }
+        response = self.client.put(self.url, payload, format='json', HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 200)
+
+        payload['automata_data'] = self.edited('c')
+        response = self.client.put(self.url, payload, format='json', HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 409)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.version, version + 1)
+        self.assertEqual(self.session.automata_data, self.edited('b'))
+
+
+class JSONPatchTests(SimpleTestCase):
+    DOCUMENT = {'states': [{'id': 'q0'}, {'id': 'q1'}], 'alphabet': ['a']}
+
+    def test_operations(self):
+        patched, touched = apply_patch(self.DOCUMENT, [
+            {'op': 'add', 'path': '/states/-', 'value': {'id': 'q2'}},
+            {'op': 'replace', 'path': '/states/0/id', 'value': 'p0'},
+            {'op': 'remove', 'path': '/states/1'},
+            {'op': 'copy', 'from': '/alphabet/0', 'path': '/alphabet/1'},
+            {'op': 'test', 'path': '/alphabet', 'value': ['a', 'a']},
+        ])
+        self.assertEqual(patched, {'states': [{'id': 'p0'}, {'id': 'q2'}], 'alphabet': ['a', 'a']})
+        self.assertEqual(touched, {'states', 'alphabet'})
+        self.assertEqual(self.DOCUMENT['states'], [{'id': 'q0'}, {'id': 'q1'}])
+
+    def test_move_touches_source_and_target(self):
+        patched, touched = apply_patch(self.DOCUMENT, [
+            {'op': 'move', 'from': '/alphabet', 'path': '/symbols'},
+        ])
+        self.assertEqual(patched, {'states': self.DOCUMENT['states'], 'symbols': ['a']})
+        self.assertEqual(touched, {'alphabet', 'symbols'})
+
+    def test_invalid_operations(self):
+        cases = [
+            {'op': 'frobnicate', 'path': '/states'},
+            {'op': 'add', 'path': '/states/-'},
+            {'op': 'add', 'path': 'states', 'value': 1},
+            {'op': 'remove', 'path': '/missing'},
+            {'op': 'remove', 'path': '/states/2'},
+            {'op': 'remove', 'path': '/states/01'},
+            {'op': 'remove', 'path': '/states/\u00b2'},
+            {'op': 'remove', 'path': ''},
+            {'op': 'move', 'path': '/alphabet'},
+            {'op': 'move', 'from': 1, 'path': '/alphabet'},
+            {'op': 'move', 'from': '/states', 'path': '/states/0/x'},
+            {'op': 'test', 'path': '/alphabet', 'value': ['b']},
+        ]
+        for operation in cases:
+            with self.subTest(operation=operation):
+                with self.assertRaises(JSONPatchError):
+                    apply_patch(self.DOCUMENT, [operation])
+
+
+class PatchAutomataTests(SessionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/simulations/sessions/{self.session.public_id}/automata/'
+
+    def patch(self, version, operations):
+        return self.client.patch(
+            self.url, {'version': version, 'operations': operations}, format='json'
+        )
+
+    def test_patch_bumps_version(self):
+        version = self.session.version
+        response = self.patch(version, [{'op': 'replace', 'path': '/alphabet', 'value': ['a', 'b']}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], version + 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.automata_data['alphabet'], ['a', 'b'])
+
+    def test_invalid_patch_is_400(self):
+        version = self.session.version
+        for operations in [
+            [{'op': 'remove', 'path': '/states/5'}],
+            [{'op': 'replace', 'path': '/states', 'value': 'q0'}],
+            [],
+        ]:
+            with self.subTest(operations=operations):
+                response = self.patch(version, operations)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('operations', response.data)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.version, version)
+        self.assertEqual(self.session.automata_data, self.AUTOMATON)
+
+    def test_stale_version_is_409(self):
+        version = self.session.version
+        operations = [{'op': 'replace', 'path': '/alphabet', 'value': ['a', 'b']}]
+        self.assertEqual(self.patch(version, operations).status_code, 200)
+        response = self.patch(version, operations)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['version'], version + 1)
+
+
+@override_settings(SESSION_REVISIONS={
+    'SNAPSHOT_INTERVAL': 3, 'MAX_DELTA_RATIO': 0.5, 'KEEP_DAYS': 30, 'KEEP_LATEST': 50,
+})
+class RevisionTests(SessionTestCase):
+    AUTOMATON = {
+        'alphabet': ['a', 'b'],
+        'states': [
+            {'id': f'q{i}', 'isInitial': i == 0, 'isFinal': i == 9, 'x': 60 * i, 'y': 100}
+            for i in range(10)
+        ],
+        'transitions': [
+            {'id': f't{i}', 'from': f'q{i}', 'to': f'q{i + 1}', 'symbol': 'a'}
+            for i in range(9)
+        ],
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/simulations/sessions/{self.session.public_id}/'
+        # automata_data by version, as the client saw it
+        self.history = {self.session.version: self.AUTOMATON}
+        for i in range(7):
+            version = max(self.history)
+            response = self.client.patch(self.url + 'automata/', {
+                'version': version,
+                'operations': [{'op': 'replace', 'path': f'/states/{i}/x', 'value': i}],
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.history[response.data['version']] = SimulationSessions.objects.get(
+                pk=self.session.pk
+            ).automata_data
+
+    def test_every_version_is_reconstructed(self):
+        kinds = set(SessionRevision.objects.values_list('kind', flat=True))
+        self.assertEqual(kinds, {SessionRevision.KIND_SNAPSHOT, SessionRevision.KIND_DELTA})
+        for version, data in self.history.items():
+            with self.subTest(version=version):
+                self.assertEqual(SessionRevision.reconstruct(self.session, version), data)
+                response = self.client.get(f'{self.url}revisions/{version}/')
+                self.assertEqual(response.data['automata_data'], data)
+        self.assertEqual(self.client.get(f'{self.url}revisions/999/').status_code, 404)
+
+    def test_delta_round_trip(self):
+        versions = sorted(self.history)
+        for old, new in zip(versions, versions[1:]):
+            old_data, new_data = self.history[old], self.history[new]
+            self.assertEqual(apply_delta(old_data, diff(old_data, new_data)), new_data)
+
+    def test_restore_adds_a_version(self):
+        latest = max(self.history)
+        oldest = min(self.history)
+        response = self.client.post(self.url + 'restore/', {'version': oldest}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], latest + 1)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.automata_data, self.history[oldest])
+        # The restore can itself be undone
+        self.assertEqual(SessionRevision.reconstruct(self.session, latest), self.history[latest])
+
+    def test_restore_errors(self):
+        latest = max(self.history)
+        for version, status_code in [(latest, 400), ('x', 400), (999, 404)]:
+            with self.subTest(version=version):
+                response = self.client.post(self.url + 'restore/', {'version': version}, format='json')
+                self.assertEqual(response.status_code, status_code)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.version, latest)
@@ -0,0 +1,297 @@
+"""
+Bulk export / import of a user's sessions and runs as NDJSON.
+
+One JSON object per line, tagged by "type":
+
+    {"type": "export", "format": 1, "exported_at": ...}
+    {"type": "session", "public_id": ..., "session_name": ..., ...}
+    {"type": "run", "session": <session public_id>, "input_string": ..., ...}
+
+All sessions come before their runs. Export reads with .iterator() and
+import validates and inserts in chunks of SESSION_TRANSFER['CHUNK_SIZE'],
+so memory stays flat however many sessions a user has.
+"""
+import gzip
+import logging
+
+import orjson
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SimulationSessions, SimulationRun
+from .serializers import (
+    SimulationRunSerializer,
+    SimulationSessionsImportSerializer,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+SESSION_EXPORT_FIELDS = [
+    'public_id',
+    'session_name',
+    'description',
+    'automata_type',
+    'automata_data',
+    'is_favorite',
+    'created_at',
+    'updated_at',
+]
+
+RUN_EXPORT_FIELDS = [
+    'input_string',
+    'is_accepted',
+    'execution_time',
+    'result_steps',
+    'created_at',
+]
+
+CONFLICT_POLICIES = ('rename', 'skip')
+
+# Errors reported before an import gives up
+MAX_REPORTED_ERRORS = 20
+
+
+class TransferError(Exception):
+    """
+    Import rejected; `errors` lists {'line': n, 'error': ...} entries.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid record(s)")
+        self.errors = errors
+
+
+def _line(record):
+    return orjson.dumps(record) + b'\n'
+
+
+# Export
+def export_lines(user, chunk_size=None):
+    """
+    Yield the user's sessions and runs as NDJSON, one chunk of lines per
+    database fetch.
+    """
+    chunk_size = chunk_size or settings.SESSION_TRANSFER['CHUNK_SIZE']
+
+    yield _line({
+        'type': 'export',
+        'format': FORMAT_VERSION,
+        'exported_at': timezone.now(),
+    })
+
+    sessions = SimulationSessions.objects.filter(user=user).order_by('id').values(
+        *SESSION_EXPORT_FIELDS
+    )
+    runs = SimulationRun.objects.filter(session__user=user).order_by(
+        'session_id', 'id'
+    ).values(session_public_id=F('session__public_id'), *RUN_EXPORT_FIELDS)
+
+    buffer = []
+    for session in sessions.iterator(chunk_size=chunk_size):
+        buffer.append(_line({'type': 'session', **session}))
+        if len(buffer) >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+
+    for run in runs.iterator(chunk_size=chunk_size):
+        run['session'] = run.pop('session_public_id')
+        buffer.append(_line({'type': 'run', **run}))
+        if len(buffer) >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+
+    if buffer:
+        yield b''.join(buffer)
+
+
+# Import
+def open_upload(upload):
+    """
+    Line iterator over an uploaded file, gunzipping `.gz` uploads.
+    """
+    if upload.name.endswith('.gz'):
+        return gzip.GzipFile(fileobj=upload)
+    return upload
+
+
+def unique_name(name, taken):
+    """
+    First of "name", "name (2)", "name (3)", ... not in `taken`.
+    """
+    max_length = SimulationSessions._meta.get_field('session_name').max_length
+    candidate = name
+    n = 2
+    while candidate in taken:
+        suffix = f" ({n})"
+        candidate = name[:max_length - len(suffix)] + suffix
+        n += 1
+    return candidate
+
+
+class SessionImporter:
+    """
+    Stream NDJSON records into `user`'s account.
+
+    Sessions get new public_ids; runs are attached through the exported
+    public_id of their session. Name clashes with existing sessions (or
+    earlier ones in the file) follow `on_conflict`: 'rename' appends
+    " (2)", " (3)", ...; 'skip' drops the session and its runs.
+    """
+
+    def __init__(self, user, on_conflict='rename', chunk_size=None):
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"on_conflict must be one of {CONFLICT_POLICIES}")
+        self.user = user
+        self.on_conflict = on_conflict
+        self.chunk_size = chunk_size or settings.SESSION_TRANSFER['CHUNK_SIZE']
+
+        self.sessions = []
+        self.runs = []
+        self.errors = []
+        # Exported public_id -> new session id (None when skipped)
+        self.session_ids = {}
+        self.taken_names = set(
+            SimulationSessions.objects.filter(user=user)
+            .values_list('session_name', flat=True)
+        )
+        self.stats = {
+            'sessions_created': 0,
+            'sessions_renamed': 0,
+            'sessions_skipped': 0,
+            'runs_created': 0,
+            'runs_skipped': 0,
+        }
+
+    def run(self, lines):
+        """
+        Import everything in one transaction; raises TransferError (and
+        writes nothing) if any record is invalid.
+        """
+        with transaction.atomic():
+            for number, line in enumerate(lines, start=1):
+                line = line.strip()
+                if line:
+                    self.add(number, line)
+                if len(self.errors) >= MAX_REPORTED_ERRORS:
+                    break
+            self.flush_sessions()
+            self.flush_runs()
+
+            if self.errors:
+                raise TransferError(sorted(self.errors, key=lambda e: e['line']))
+
+        logger.info(
+            f"Imported sessions for user {self.user.email}: "
+            + ', '.join(f"{key}={value}" for key, value in self.stats.items())
+        )
+        return self.stats
+
+    def error(self, number, error):
+        self.errors.append({'line': number, 'error': error})
+
+    def add(self, number, line):
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            return self.error(number, f"Invalid JSON: {e}")
+        if not isinstance(record, dict):
+            return self.error(number, 'Expected a JSON object')
+
+        kind = record.get('type')
+        if kind == 'export':
+            if record.get('format') != FORMAT_VERSION:
+                self.error(number, f"Unsupported format {record.get('format')!r}")
+        elif kind == 'session':
+            self.sessions.append((number, record))
+            if len(self.sessions) >= self.chunk_size:
+                self.flush_sessions()
+        elif kind == 'run':
+            # Runs refer to sessions, which must be in the database first
+            self.flush_sessions()
+            self.runs.append((number, record))
+            if len(self.runs) >= self.chunk_size:
+                self.flush_runs()
+        else:
+            self.error(number, f"Unknown record type {kind!r}")
+
+    def validate(self, serializer_class, chunk):
+        """
+        Validate a chunk of (line number, record) pairs in one pass.
+        Returns the validated data, or None after recording the errors.
+        """
+        serializer = serializer_class(
+            data=[record for _, record in chunk],
+            many=True
+        )
+        if serializer.is_valid():
+            return serializer.validated_data
+        for (number, _), error in zip(chunk, serializer.errors):
+            if error:
+                self.error(number, error)
+        return None
+
+    def flush_sessions(self):
+        if not self.sessions:
+            return
+        chunk, self.sessions = self.sessions, []
+        validated = self.validate(SimulationSessionsImportSerializer, chunk)
+        if validated is None:
+            return
+
+        to_create = []
+        exported_ids = []
+        for (_, record), data in zip(chunk, validated):
+            exported_id = str(record.get('public_id'))
+            name = data['session_name']
+            if name in self.taken_names:
+                if self.on_conflict == 'skip':
+                    self.session_ids[exported_id] = None
+                    self.stats['sessions_skipped'] += 1
+                    continue
+                data['session_name'] = name = unique_name(name, self.taken_names)
+                self.stats['sessions_renamed'] += 1
+            self.taken_names.add(name)
+
+            session = SimulationSessions(user=self.user, **data)
+            session.refresh_metadata()
+            to_create.append(session)
+            exported_ids.append(exported_id)
+
+        if self.errors or not to_create:
+            return
+
+        created = SimulationSessions.objects.bulk_create_indexed(to_create)
+
+        for exported_id, session in zip(exported_ids, created):
+            self.session_ids[exported_id] = session.pk
+        self.stats['sessions_created'] += len(created)
+
+    def flush_runs(self):
+        if not self.runs:
+            return
+        chunk, self.runs = self.runs, []
+        validated = self.validate(SimulationRunSerializer, chunk)
+        if validated is None:
+            return
+
+        to_create = []
+        for (number, record), data in zip(chunk, validated):
+            exported_id = str(record.get('session'))
+            if exported_id not in self.session_ids:
+                self.error(number, f"Run refers to unknown session {exported_id}")
+                continue
+            session_id = self.session_ids[exported_id]
+            if session_id is None:
+                self.stats['runs_skipped'] += 1
+                continue
+            to_create.append(SimulationRun(session_id=session_id, **data))
+
+        if self.errors or not to_create:
+            return
+
+        SimulationRun.objects.bulk_create(to_create)
+        self.stats['runs_created'] += len(to_create)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import SimulationSessionsViewSet, SimulationRunViewSet
@@ -16,6 +17,53 @@ router.register(
     basename='simulation-run'
 )
 
-urlpatterns = [
+urlpatterns = []
+
+# Under ASGI, GETs on these routes are served by async views; other
+# methods fall through to the same viewsets. Must come before the router.
+if settings.ASYNC_VIEWS:
+    from . import async_views
+    from .async_views import method_dispatch
+
+    urlpatterns += [
+        path(
+            'sessions/',
+            method_dispatch(
+                async_views.session_list,
+                SimulationSessionsViewSet.as_view({'get': 'list', 'post': 'create'})
+            ),
+            name='simulation-session-list'
+        ),
+        path(
+            'sessions/<uuid:public_id>/',
+            method_dispatch(
+                async_views.session_detail,
+                SimulationSessionsViewSet.as_view({
+                    'get': 'retrieve',
+                    'put': 'update',
+                    'patch': 'partial_update',
+                    'delete': 'destroy'
+                })
+            ),
+            name='simulation-session-detail'
+        ),
+        path(
+            'sessions/<uuid:public_id>/shared/',
+            async_views.session_shared,
+            name='simulation-session-shared'
+        ),
+        path(
+            'runs/',
+            async_views.run_list,
+            name='simulation-run-list'
+        ),
+        path(
+            'runs/<int:pk>/',
+            async_views.run_detail,
+            name='simulation-run-detail'
+        ),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
@@ -1,23 +1,58 @@
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.settings import api_settings
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Count, Max
 from django.utils import timezone
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
 from datetime import timedelta
+import hashlib
 import logging
 from rest_framework.permissions import BasePermission
 
-from .models import SimulationSessions, SimulationRun
+from apps.authentication.throttling import SimulationBatchRateThrottle
+from config import metrics
+from config.db_routers import primary_reads, start_replica_reads, stop_replica_reads
+from config.renderers import CompactJSONRenderer
+
+from . import engine
+from .caching import get_shared_session, set_shared_session
+from .compact import encode as encode_compact
+from .fieldsets import Fieldset
+from .grading import select_submissions, verdict_lines
+from .layout import LayoutError, compute_layout
+from .filters import SessionOrderingFilter, SessionSearchFilter
+from .models import SessionRevision, SimulationSessions, SimulationRun, VersionConflict
 from .serializers import (
+    GradingRequestSerializer,
+    LayoutRequestSerializer,
     SimulationSessionsListSerializer,
     SimulationSessionsDetailSerializer,
     SimulationSessionsCreateSerializer,
     SimulationSessionsUpdateSerializer,
+    SimulationSessionsPatchSerializer,
+    SimulationRequestSerializer,
     SimulationRunSerializer,
+    SessionRevisionSerializer,
+    recent_runs_prefetch,
+)
+from .transfer import (
+    CONFLICT_POLICIES,
+    SessionImporter,
+    TransferError,
+    export_lines,
+    open_upload,
 )
 
 logger = logging.getLogger(__name__)
@@ -27,6 +62,42 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+class ReplicaReadMixin:
+    """
+    Serve the actions in `replica_actions` from read replicas.
+
+    Any write during the request pins the rest of it to the primary.
+    `None` means every action.
+    """
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        if self.replica_actions is None or self.action in self.replica_actions:
+            self._replica_token = start_replica_reads()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            stop_replica_reads(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class SparseFieldsetMixin:
+    """
+    Parse ?fields= / ?omit= once per request and hand them to serializers.
+    """
+    @property
+    def fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_request(self.request)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.fieldset
+        return context
+
 # Permissions
 class IsOwnerOrSharedReadOnly(BasePermission):
     """
@@ -48,8 +119,8 @@ class IsOwnerOrSharedReadOnly(BasePermission):
         return request.user and request.user.is_authenticated
     
     def has_object_permission(self, request, view, obj):
-        # Owner: Full access
-        if obj.user == request.user:
+        # Owner: Full access (compare ids; avoids loading obj.user)
+        if request.user.is_authenticated and obj.user_id == request.user.pk:
             return True
         
         # Shared session: Read-only for anyone with the UUID
@@ -58,8 +129,180 @@ class IsOwnerOrSharedReadOnly(BasePermission):
         
         return False
 
+# Conditional GET
+def build_validators(owner_id, updated_at, latest_run_id, latest_run_at, user):
+    """
+    Return (etag, last_modified) for a session.
+
+    The ETag covers updated_at, the latest run and whether `user` owns the
+    session (is_owner/share_url differ per viewer).
+    """
+    is_owner = bool(user and user.is_authenticated and owner_id == user.pk)
+    raw = f"{updated_at.isoformat()}:{latest_run_id or 0}:{int(is_owner)}"
+    etag = quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+    last_modified = max(filter(None, [updated_at, latest_run_at]))
+    return etag, int(last_modified.timestamp())
+
+
+def session_version(queryset):
+    """
+    Fetch the fields validators are built from for the single session in
+    `queryset`, without loading automata_data. None if it does not exist.
+    """
+    return queryset.order_by().prefetch_related(None).annotate(
+        latest_run_id=Max('runs__id'),
+        latest_run_at=Max('runs__created_at'),
+    ).values('user_id', 'updated_at', 'latest_run_id', 'latest_run_at').first()
+
+
+def session_validators(queryset, user):
+    """
+    Compute (etag, last_modified) for the single session in `queryset`.
+    Returns (None, None) if the session does not exist.
+    """
+    row = session_version(queryset)
+    if row is None:
+        return None, None
+    return build_validators(
+        row['user_id'], row['updated_at'],
+        row['latest_run_id'], row['latest_run_at'], user
+    )
+
+
+def if_match_version(request):
+    """
+    Session version from an `If-Match: "7"` header, or None without one.
+    """
+    value = request.headers.get('If-Match', '').strip()
+    if not value or value == '*':
+        return None
+    value = value.removeprefix('W/').strip('"')
+    if not (value.isascii() and value.isdigit()):
+        raise ValidationError({'If-Match': 'Must be a session version, e.g. "7"'})
+    return int(value)
+
+
+def set_validator_headers(response, etag, last_modified):
+    if response.status_code == status.HTTP_200_OK:
+        response.headers.setdefault('ETag', etag)
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+    # Payload depends on who is asking (is_owner)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def set_shared_cache_headers(response, request):
+    """
+    Let CDNs cache anonymous shared-session responses; keep anything
+    fetched with credentials private.
+    """
+    config = settings.SHARED_SESSION_CACHE
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=config['MAX_AGE'],
+            s_maxage=config['S_MAXAGE'],
+            stale_while_revalidate=config['STALE_WHILE_REVALIDATE'],
+        )
+    return response
+
+
+def wants_compact(request):
+    """
+    True if `?format=compact` selected CompactJSONRenderer.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    return getattr(renderer, 'format', None) == CompactJSONRenderer.format
+
+
+# Shared sessions
+# Embedded list fields filtered in cached shared payloads
+SHARED_NESTED_FIELDS = ('runs',)
+
+def shared_session_queryset(public_id):
+    return SimulationSessions.objects.filter(
+        public_id=public_id,
+        is_shared=True
+    ).select_related('user').prefetch_related(
+        recent_runs_prefetch()
+    ).defer('automata_compact')
+
+
+def build_shared_entry(session, request):
+    """
+    Cacheable, viewer-independent part of a shared-session response.
+    None if the session was deleted or unshared since it was fetched.
+    """
+    # Version first: if the session changes while serializing, the
+    # entry carries the older validators and is replaced on next change
+    entry = session_version(
+        SimulationSessions.objects.filter(pk=session.pk, is_shared=True)
+    )
+    if entry is None:
+        return None
+
+    # Use detail serializer for full data; viewer-specific fields
+    # are filled in per request by shared_response()
+    data = SimulationSessionsDetailSerializer(
+        session,
+        context={'request': request}
+    ).data
+    data['shared_by'] = {
+        'username': session.user.username,
+        'first_name': session.user.first_name,
+        'last_name': session.user.last_name
+    }
+    entry['data'] = dict(data)
+    return entry
+
+
+def shared_response(request, public_id, entry):
+    """
+    Build the shared-session response (or 304) for this viewer.
+    """
+    etag, last_modified = build_validators(
+        entry['user_id'], entry['updated_at'],
+        entry['latest_run_id'], entry['latest_run_at'], request.user
+    )
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        set_validator_headers(not_modified, etag, last_modified)
+        return set_shared_cache_headers(not_modified, request)
+
+    # Cache holds the full payload; ?fields= / ?omit= apply per request
+    fieldset = Fieldset.from_request(request)
+    data = fieldset.filter_data(entry['data'], nested=SHARED_NESTED_FIELDS)
+
+    # Add sharing metadata
+    if fieldset.includes('is_owner'):
+        data['is_owner'] = (
+            request.user.is_authenticated and
+            entry['user_id'] == request.user.pk
+        )
+    if fieldset.includes('share_url'):
+        data['share_url'] = (
+            f"{request.scheme}://{request.get_host()}/shared/{public_id}"
+        )
+    if wants_compact(request) and 'automata_data' in data:
+        data['automata_compact'] = encode_compact(data.pop('automata_data'))
+
+    response = Response(data)
+    set_validator_headers(response, etag, last_modified)
+    return set_shared_cache_headers(response, request)
+
+
 # Main ViewSet
-class SimulationSessionsViewSet(viewsets.ModelViewSet):
+class SimulationSessionsViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet
+):
     
     queryset = SimulationSessions.objects.all()
     
@@ -71,15 +314,32 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
 
     lookup_field = 'public_id'
 
+    # Adds ?format=compact (see compact.py)
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactJSONRenderer]
+
+    replica_actions = {
+        'list', 'retrieve', 'shared', 'favorites', 'recent', 'statistics'
+    }
+
     # Filtering and Searching
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter
+        SessionSearchFilter,
+        SessionOrderingFilter
     ]
-    filterset_fields = ['automata_type', 'is_favorite', 'is_shared']
+    filterset_fields = {
+        'automata_type': ['exact'],
+        'is_favorite': ['exact'],
+        'is_shared': ['exact'],
+        'is_deterministic': ['exact'],
+        'state_count': ['exact', 'gte', 'lte'],
+        'transition_count': ['exact', 'gte', 'lte'],
+    }
     search_fields = ['session_name', 'description']
-    ordering_fields = ['created_at', 'updated_at', 'session_name', 'last_accessed_at']
+    ordering_fields = [
+        'created_at', 'updated_at', 'session_name', 'last_accessed_at',
+        'state_count', 'transition_count'
+    ]
     ordering = ['-last_accessed_at']
 
     # Override get_queryset to filter
@@ -93,14 +353,24 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         
         # Detail view: Allow accessing shared sessions by UUID
         if self.action == 'retrieve':
-            return SimulationSessions.objects.filter(
-                Q(user=user) | Q(is_shared=True)
-            ).select_related('user').prefetch_related(
-                Prefetch(
-                    'runs',
-                    queryset=SimulationRun.objects.order_by('-created_at')
-                )
-            )
+            access = Q(is_shared=True)
+            if user.is_authenticated:
+                access |= Q(user=user)
+            queryset = SimulationSessions.objects.filter(access)
+
+            # Skip what ?fields= / ?omit= leave out
+            fieldset = self.fieldset
+            if fieldset.includes('runs'):
+                queryset = queryset.prefetch_related(recent_runs_prefetch(
+                    with_steps=fieldset.nested('runs').includes('result_steps')
+                ))
+            if wants_compact(self.request):
+                queryset = queryset.defer('automata_data')
+            else:
+                queryset = queryset.defer('automata_compact')
+                if not fieldset.includes('automata_data'):
+                    queryset = queryset.defer('automata_data')
+            return queryset
         
         # List view: Only user's own sessions
         queryset = SimulationSessions.objects.filter(
@@ -113,14 +383,25 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(automata_type=automata_type.upper())
         
         # Optimize queries
-        queryset = queryset.select_related('user')
-        queryset = queryset.annotate(run_count=Count('runs'))
-        queryset = queryset.prefetch_related('runs')
-        
-        logger.debug(f"Queryset for user {self.request.user.email}: {queryset.query}")
+        if self.fieldset.includes('run_count'):
+            queryset = queryset.annotate(run_count=Count('runs'))
+
+        # Collection actions only need the metadata columns, not the JSON
+        queryset = queryset.defer('automata_compact')
+        if not self.detail:
+            queryset = queryset.defer('automata_data', 'search_vector')
+        elif self.action == 'simulate':
+            # Only read when the compiled engine isn't cached
+            queryset = queryset.defer('automata_data')
 
         return queryset
     
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if wants_compact(self.request):
+            context['automata_format'] = 'compact'
+        return context
+
     def get_serializer_class(self):
         if self.action == 'list':
             return SimulationSessionsListSerializer
@@ -134,6 +415,30 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         # Default: Full detail serializer
         return SimulationSessionsDetailSerializer
     
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Session detail with ETag / Last-Modified support.
+
+        A matching If-None-Match or If-Modified-Since returns 304 before the
+        session is loaded or serialized.
+        """
+        etag, last_modified = session_validators(
+            self.get_queryset().filter(public_id=kwargs[self.lookup_field]),
+            request.user
+        )
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                return set_validator_headers(not_modified, etag, last_modified)
+
+        response = super().retrieve(request, *args, **kwargs)
+
+        if etag is not None:
+            set_validator_headers(response, etag, last_modified)
+        return response
+
     def perform_create(self, serializer):
         session = serializer.save(user=self.request.user)
         
@@ -142,8 +447,28 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
             f"'{session.session_name}' (ID: {session.id})"
         )
     
+    def update(self, request, *args, **kwargs):
+        """
+        PUT / PATCH. `version` in the body or `If-Match: "<version>"` makes
+        the write conditional; a changed automata_data is always written
+        conditionally and gives 409 if the session moved on meanwhile.
+        """
+        try:
+            return super().update(request, *args, **kwargs)
+        except VersionConflict as e:
+            return Response(
+                {
+                    'error': 'Session was modified by another request',
+                    'version': e.version
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
     def perform_update(self, serializer):
-        serializer.save(last_accessed_at=timezone.now())
+        serializer.save(
+            last_accessed_at=timezone.now(),
+            expected_version=if_match_version(self.request)
+        )
         
         logger.info(
             f"User {self.request.user.email} updated session "
@@ -162,7 +487,11 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         )
     
     # Custom Actions
-    @action(detail=True, methods=['post'])
+    @action(
+        detail=True,
+        methods=['post'],
+        throttle_classes=[SimulationBatchRateThrottle]
+    )
     def save_run(self, request, public_id=None):
         """
         Custom endpoint: POST /sessions/{id}/save_run/
@@ -199,6 +528,335 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
     
+    @action(
+        detail=True,
+        methods=['post'],
+        throttle_classes=[SimulationBatchRateThrottle]
+    )
+    def simulate(self, request, public_id=None):
+        """
+        Custom endpoint: POST /sessions/{id}/simulate/
+
+        Run inputs on the server against the saved automaton.
+
+        Example request:
+        {
+            "inputs": ["ab", "aab"],
+            "trace": false
+        }
+
+        Results have the editor's SimulationResult shape; with
+        "trace": false only input and isAccepted are returned. Turing
+        machines are searched breadth-first (nondeterminism allowed) and
+        report the search's size and any cap it hit under "search".
+        """
+        session = self.get_object()
+
+        serializer = SimulationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        inputs = serializer.validated_data['inputs']
+        trace = serializer.validated_data['trace']
+
+        with metrics.timed('engine_compile'):
+            compiled = engine.get_engine(session)
+        try:
+            with compiled.lock, metrics.timed('engine_run'):
+                results = [engine.run(compiled, value, trace) for value in inputs]
+        except engine.EngineError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(
+            f"User {request.user.email} simulated {len(inputs)} input(s) "
+            f"on session {session.id} v{session.version}"
+        )
+
+        return Response({
+            'version': session.version,
+            'results': results
+        })
+
+    @action(
+        detail=True,
+        methods=['post'],
+        throttle_classes=[SimulationBatchRateThrottle]
+    )
+    def grade(self, request, public_id=None):
+        """
+        Custom endpoint: POST /sessions/{id}/grade/
+
+        Grade other sessions against this one as the reference.
+
+        Example request:
+        {
+            "submissions": ["<public_id>", ...],
+            "tests": ["ab", {"input": "ba", "expected": false}],
+            "equivalence": true
+        }
+
+        Instead of "submissions", "name" / "automata_type" select by
+        filter among the user's own sessions. Shared sessions of other
+        users are only graded when listed in "submissions".
+        Streams NDJSON verdicts (format in grading.py).
+        """
+        reference = self.get_object()
+
+        serializer = GradingRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # Filters alone must not enumerate everyone's shared sessions
+        candidates = Q(user=request.user)
+        if data.get('submissions'):
+            candidates |= Q(is_shared=True)
+        submissions = select_submissions(
+            SimulationSessions.objects.filter(candidates),
+            public_ids=data.get('submissions'),
+            name=data.get('name'),
+            automata_type=data.get('automata_type'),
+        )
+        max_submissions = settings.GRADING['MAX_SUBMISSIONS']
+        if submissions.count() > max_submissions:
+            return Response(
+                {'error': f"At most {max_submissions} sessions can be graded at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(
+            f"User {request.user.email} is grading against session {reference.id}"
+        )
+        return StreamingHttpResponse(
+            verdict_lines(
+                reference, submissions, data['tests'],
+                check_equivalence=data['equivalence']
+            ),
+            content_type='application/x-ndjson'
+        )
+
+    @action(detail=True, methods=['patch'], url_path='automata')
+    def patch_automata(self, request, public_id=None):
+        """
+        Custom endpoint: PATCH /sessions/{id}/automata/
+
+        Apply RFC 6902 JSON-patch operations to automata_data.
+
+        Example request:
+        {
+            "version": 7,
+            "operations": [
+                {"op": "replace", "path": "/states/3/x", "value": 120}
+            ]
+        }
+
+        Returns the new version, or 409 with the current version if the
+        session changed since `version`.
+        """
+        session = self.get_object()
+
+        serializer = SimulationSessionsPatchSerializer(
+            session,
+            data=request.data
+        )
+        serializer.is_valid(raise_exception=True)
+
+        expected_version = serializer.validated_data['version']
+        if not session.update_automata_data(
+            serializer.validated_data['automata_data'],
+            expected_version
+        ):
+            current = SimulationSessions.objects.filter(
+                pk=session.pk
+            ).values_list('version', flat=True).first()
+            return Response(
+                {
+                    'error': 'Session was modified by another request',
+                    'version': current
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        logger.info(
+            f"User {request.user.email} patched session {session.id} "
+            f"({len(serializer.validated_data['operations'])} op(s)) "
+            f"to version {session.version}"
+        )
+
+        return Response({
+            'version': session.version,
+            'updated_at': session.updated_at
+        })
+
+    @action(
+        detail=True,
+        methods=['post'],
+        throttle_classes=[SimulationBatchRateThrottle]
+    )
+    def layout(self, request, public_id=None):
+        """
+        Custom endpoint: POST /sessions/{id}/layout/
+
+        Compute state coordinates server-side and save them into
+        automata_data (as a new version).
+
+        Example request:
+        {
+            "version": 7,
+            "algorithm": "force",
+            "iterations": 150
+        }
+
+        `algorithm` is "layered" (default) or "force"; `version` is
+        optional and gives a 409 if the session changed since.
+        """
+        session = self.get_object()
+
+        serializer = LayoutRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        expected_version = data.get('version', session.version)
+        algorithm = data['algorithm']
+        try:
+            automata_data = compute_layout(
+                session.automata_data, algorithm, data.get('iterations')
+            )
+        except LayoutError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not session.update_automata_data(automata_data, expected_version):
+            current = SimulationSessions.objects.filter(
+                pk=session.pk
+            ).values_list('version', flat=True).first()
+            return Response(
+                {
+                    'error': 'Session was modified by another request',
+                    'version': current
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        logger.info(
+            f"User {request.user.email} laid out session {session.id} "
+            f"({algorithm}, {len(automata_data['states'])} states)"
+        )
+
+        return Response({
+            'version': session.version,
+            'updated_at': session.updated_at,
+            'positions': {
+                state['id']: {'x': state['x'], 'y': state['y']}
+                for state in automata_data['states']
+            }
+        })
+
+    # Revision history
+    @action(detail=True, methods=['get'])
+    def revisions(self, request, public_id=None):
+        """
+        Custom endpoint: GET /sessions/{id}/revisions/
+
+        Stored versions of automata_data, newest first
+        """
+        session = self.get_object()
+        queryset = session.revisions.only(
+            'version', 'kind', 'automata_type', 'created_at'
+        ).order_by('-version')
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = SessionRevisionSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = SessionRevisionSerializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path=r'revisions/(?P<version>[0-9]+)'
+    )
+    def revision(self, request, public_id=None, version=None):
+        """
+        Custom endpoint: GET /sessions/{id}/revisions/{version}/
+
+        automata_data as it was at `version`
+        """
+        session = self.get_object()
+        version = int(version)
+
+        if version == session.version:
+            automata_data = session.automata_data
+        else:
+            automata_data = SessionRevision.reconstruct(session, version)
+        if automata_data is None:
+            return Response(
+                {'error': f'Revision {version} not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'version': version,
+            'automata_data': automata_data
+        })
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, public_id=None):
+        """
+        Custom endpoint: POST /sessions/{id}/restore/
+
+        Make a stored revision the current automata_data (as a new version,
+        so the restore itself can be undone).
+
+        Example request:
+        {
+            "version": 12
+        }
+        """
+        session = self.get_object()
+
+        try:
+            version = int(request.data.get('version'))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'version must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if version == session.version:
+            return Response(
+                {'error': f'Version {version} is already current'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        automata_data = SessionRevision.reconstruct(session, version)
+        if automata_data is None:
+            return Response(
+                {'error': f'Revision {version} not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        expected_version = session.version
+        if not session.update_automata_data(automata_data, expected_version):
+            return Response(
+                {'error': 'Session was modified by another request'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        logger.info(
+            f"User {request.user.email} restored session {session.id} "
+            f"to revision {version} (now version {session.version})"
+        )
+
+        return Response({
+            'message': f'Restored revision {version}',
+            'version': session.version,
+            'updated_at': session.updated_at
+        })
+
     @action(detail=True, methods=['post'])
     def duplicate(self, request, public_id=None):
         """
@@ -234,7 +892,7 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         """
         session = self.get_object()
         session.is_favorite = not session.is_favorite
-        session.save(update_fields=['is_favorite'])
+        session.save(update_fields=['is_favorite', 'updated_at'])
         
         return Response({
             'message': f"Session {'added to' if session.is_favorite else 'removed from'} favorites",
@@ -305,6 +963,73 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         
         return Response(stats)
     
+    # Bulk transfer
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Custom endpoint: GET /sessions/export/
+
+        Stream all of the user's sessions and runs as NDJSON
+        (format in transfer.py), for re-import with /sessions/import/.
+        """
+        filename = f"sessions-{timezone.now():%Y%m%d-%H%M%S}.ndjson"
+        response = StreamingHttpResponse(
+            export_lines(request.user),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        logger.info(f"User {request.user.email} exported their sessions")
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        parser_classes=[MultiPartParser]
+    )
+    def import_sessions(self, request):
+        """
+        Custom endpoint: POST /sessions/import/
+
+        Import an NDJSON export (multipart field `file`, optionally .gz).
+        `on_conflict` (rename | skip) decides what happens to sessions whose
+        name is already taken. All-or-nothing: any invalid record returns
+        400 with the offending line numbers.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'No file uploaded'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        on_conflict = request.data.get('on_conflict', 'rename')
+        if on_conflict not in CONFLICT_POLICIES:
+            return Response(
+                {'error': f"on_conflict must be one of: {', '.join(CONFLICT_POLICIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            stats = SessionImporter(request.user, on_conflict).run(open_upload(upload))
+        except TransferError as e:
+            return Response(
+                {'error': 'Import failed, nothing was saved', 'errors': e.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except (OSError, EOFError) as e:
+            # Corrupt .gz upload
+            return Response(
+                {'error': f'Could not read file: {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {'message': 'Import completed', **stats},
+            status=status.HTTP_201_CREATED
+        )
+
     # Sharing Actions
     @action(detail=True, methods=['post'])
     def generate_share_link(self, request, public_id=None):
@@ -326,7 +1051,7 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         session = self.get_object()
         
         # Only owner can generate share links
-        if session.user != request.user:
+        if session.user_id != request.user.pk:
             return Response(
                 {'error': 'Only the owner can share this session'},
                 status=status.HTTP_403_FORBIDDEN
@@ -334,7 +1059,7 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         
         # Enable sharing
         session.is_shared = True
-        session.save(update_fields=['is_shared'])
+        session.save(update_fields=['is_shared', 'updated_at'])
         
         # Build shareable URL
         share_url = f"/shared/{session.public_id}"
@@ -360,7 +1085,7 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         session = self.get_object()
         
         # Only owner can revoke
-        if session.user != request.user:
+        if session.user_id != request.user.pk:
             return Response(
                 {'error': 'Only the owner can revoke sharing'},
                 status=status.HTTP_403_FORBIDDEN
@@ -368,7 +1093,7 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         
         # Disable sharing
         session.is_shared = False
-        session.save(update_fields=['is_shared'])
+        session.save(update_fields=['is_shared', 'updated_at'])
         
         logger.info(
             f"User {request.user.email} revoked share link for session {session.id}"
@@ -394,39 +1119,35 @@ class SimulationSessionsViewSet(viewsets.ModelViewSet):
         - Full session details if shared
         - 404 if not found or not shared
         - Includes owner info and whether current user is owner
+        - 304 if If-None-Match / If-Modified-Since still match
+
+        Payloads are cached per public_id (see caching.py) and anonymous
+        responses are CDN-cacheable.
         """
-        try:
-            session = SimulationSessions.objects.get(
-                public_id=public_id,
-                is_shared=True
-            )
-        except SimulationSessions.DoesNotExist:
-            return Response(
-                {'error': 'Session not found or not shared'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Use detail serializer for full data
-        serializer = SimulationSessionsDetailSerializer(
-            session,
-            context={'request': request}
-        )
-        
-        # Add sharing metadata
-        data = serializer.data
-        data['is_owner'] = (
-            request.user.is_authenticated and 
-            session.user == request.user
-        )
-        data['shared_by'] = {
-            'username': session.user.username,
-            'first_name': session.user.first_name,
-            'last_name': session.user.last_name
-        }
-        
-        return Response(data)
+        entry = get_shared_session(public_id)
+
+        if entry is None:
+            # Refill from the primary: a replica's lagging copy would
+            # otherwise be cached until the next change
+            with primary_reads():
+                session = shared_session_queryset(public_id).first()
+                if session is not None:
+                    entry = build_shared_entry(session, request)
+
+            if entry is None:
+                return Response(
+                    {'error': 'Session not found or not shared'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            set_shared_session(public_id, entry)
+
+        return shared_response(request, public_id, entry)
 
-class SimulationRunViewSet(viewsets.ReadOnlyModelViewSet):
+class SimulationRunViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     """
     ReadOnlyModelViewSet: Only list and retrieve
     
@@ -437,7 +1158,10 @@ class SimulationRunViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         # Only show runs from user's sessions
-        return SimulationRun.objects.filter(
+        queryset = SimulationRun.objects.filter(
             session__user=self.request.user
-        ).select_related('session')
+        )
+        if not self.fieldset.includes('result_steps'):
+            queryset = queryset.defer('result_steps')
+        return queryset
         
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Database routing for read replicas.
+
+Reads only go to a replica inside a `replica_reads()` block (views opt in
+per action, see ReplicaReadMixin). Everything else, all writes, and any
+read that follows a write in the same block stay on the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class _ReplicaState:
+    __slots__ = ('pinned',)
+
+    def __init__(self):
+        # Set once anything is written; later reads must see that write
+        self.pinned = False
+
+
+_replica_state = ContextVar('replica_state', default=None)
+
+
+def start_replica_reads():
+    """Enable replica reads for the current context; returns a reset token."""
+    return _replica_state.set(_ReplicaState())
+
+
+def stop_replica_reads(token):
+    _replica_state.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    token = start_replica_reads()
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block, e.g. when the result is
+    cached and must not capture a lagging replica.
+    """
+    token = _replica_state.set(None)
+    try:
+        yield
+    finally:
+        _replica_state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _replica_state.get()
+        replicas = settings.DATABASE_REPLICAS
+        if state is None or state.pinned or not replicas:
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see its uncommitted writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _replica_state.get()
+        if state is not None:
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
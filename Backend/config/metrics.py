@@ -0,0 +1,344 @@
+"""
+Per-request instrumentation exposed in Prometheus text format at /metrics/.
+
+MetricsMiddleware keeps a RequestMetrics record in a context variable for
+the duration of each request. Hooks add to it as the request runs:
+
+- every SQL statement, through a database execute wrapper installed on
+  each new connection (so queries made by async views through
+  sync_to_async are counted too)
+- serializer time, around DRF's `.data` and `.is_valid()`
+- engine compile / run time, where views call `timed('engine_compile')`
+  and `timed('engine_run')`
+
+When the response is ready the totals go into histograms labelled with
+the HTTP method and the URL name (e.g. `simulation-session-save-run`), so
+the number of series stays bounded whatever the URLs contain.
+
+The registry lives in process memory. Under gunicorn each worker keeps
+its own, and a scrape sees the worker that answered it.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds; every histogram also has +Inf
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_registry_lock = threading.Lock()
+_current = ContextVar('request_metrics', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self.series = {}
+
+    def inc(self, labels, amount=1):
+        with _registry_lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self.series = {}
+
+    def observe(self, labels, value):
+        with _registry_lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                label_text = _labels(self.label_names, labels, [('le', _number(float(bound)))])
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+ENDPOINT_LABELS = ('method', 'endpoint')
+
+REQUESTS = Counter(
+    'toc_http_requests_total',
+    'Requests handled, by response status.',
+    (*ENDPOINT_LABELS, 'status'),
+)
+REQUEST_DURATION = Histogram(
+    'toc_http_request_duration_seconds',
+    'Time from the request reaching the app to the response being ready.',
+    ENDPOINT_LABELS, TIME_BUCKETS,
+)
+QUERY_COUNT = Histogram(
+    'toc_db_queries_per_request',
+    'SQL statements executed per request.',
+    ENDPOINT_LABELS, COUNT_BUCKETS,
+)
+QUERY_DURATION = Histogram(
+    'toc_db_query_duration_seconds',
+    'Total SQL execution time per request.',
+    ENDPOINT_LABELS, TIME_BUCKETS,
+)
+PHASE_DURATION = Histogram(
+    'toc_phase_duration_seconds',
+    'Time per request spent in a phase (serializer, engine_compile, engine_run).',
+    (*ENDPOINT_LABELS, 'phase'), TIME_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'toc_http_response_size_bytes',
+    'Response body size as sent (after compression).',
+    ENDPOINT_LABELS, SIZE_BUCKETS,
+)
+
+METRICS = (REQUESTS, REQUEST_DURATION, QUERY_COUNT, QUERY_DURATION, PHASE_DURATION, RESPONSE_SIZE)
+
+
+def render():
+    """
+    The registry in Prometheus text exposition format.
+    """
+    with _registry_lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'query_time', 'phases', 'active')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.phases = {}
+        # Phases being timed, so nested calls aren't counted twice
+        self.active = set()
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to `phase` for the current request.
+    A no-op outside a request and inside another block for the same phase.
+    """
+    record = _current.get()
+    if record is None or phase in record.active:
+        yield
+        return
+    record.active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.phases[phase] = record.phases.get(phase, 0.0) + time.perf_counter() - started
+        record.active.discard(phase)
+
+
+def _record_query(execute, sql, params, many, context):
+    record = _current.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record.queries += 1
+        record.query_time += time.perf_counter() - started
+
+
+def _instrument_connection(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed_method(method, phase):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with timed(phase):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _timed_property(prop, phase):
+    return property(_timed_method(prop.fget, phase), prop.fset, prop.fdel, prop.__doc__)
+
+
+_installed = False
+
+
+def install():
+    """
+    Hook SQL execution and DRF serializers. Idempotent.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    connection_created.connect(_instrument_connection, dispatch_uid='config.metrics')
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(connection=connection)
+
+    from rest_framework import serializers
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        cls.data = _timed_property(cls.data, 'serializer')
+    for cls in (serializers.BaseSerializer, serializers.ListSerializer):
+        cls.is_valid = _timed_method(cls.is_valid, 'serializer')
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+def _observe(request, response, record, elapsed, size):
+    labels = (request.method, _endpoint(request))
+    REQUESTS.inc((*labels, str(response.status_code)))
+    REQUEST_DURATION.observe(labels, elapsed)
+    QUERY_COUNT.observe(labels, record.queries)
+    QUERY_DURATION.observe(labels, record.query_time)
+    for phase, seconds in record.phases.items():
+        PHASE_DURATION.observe((*labels, phase), seconds)
+    if size is not None:
+        RESPONSE_SIZE.observe(labels, size)
+
+
+class MetricsMiddleware:
+    """
+    Record per-request metrics. Sits above CompressionMiddleware so
+    response sizes are what goes over the wire; streamed responses are
+    measured as the stream is consumed.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        record = RequestMetrics()
+        token = _current.set(record)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, record, started)
+
+    async def __acall__(self, request):
+        record = RequestMetrics()
+        token = _current.set(record)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, record, started)
+
+    def finish(self, request, response, record, started):
+        if not response.streaming:
+            _observe(request, response, record, time.perf_counter() - started, len(response.content))
+            return response
+
+        # Streamed bodies (NDJSON exports, grading) do their queries and
+        # serializing while being consumed: attribute that work to this
+        # request and time it to the end of the stream
+        response.streaming_content = self.measure_stream(request, response, record, started)
+        return response
+
+    def measure_stream(self, request, response, record, started):
+        content = response.streaming_content
+
+        def done(size):
+            _observe(request, response, record, time.perf_counter() - started, size)
+
+        if response.is_async:
+            async def stream():
+                size = 0
+                iterator = aiter(content)
+                while True:
+                    token = _current.set(record)
+                    try:
+                        chunk = await anext(iterator)
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        _current.reset(token)
+                    size += len(chunk)
+                    yield chunk
+                done(size)
+        else:
+            def stream():
+                size = 0
+                iterator = iter(content)
+                while True:
+                    token = _current.set(record)
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        break
+                    finally:
+                        _current.reset(token)
+                    size += len(chunk)
+                    yield chunk
+                done(size)
+        return stream()
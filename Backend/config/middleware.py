@@ -0,0 +1,188 @@
+"""
+Negotiated gzip / Brotli compression for dynamic API responses.
+
+Only the API's own media types are compressed. HTML pages (the admin, the
+browsable API) may reflect request input next to a CSRF token, and
+compressing those would expose the token to BREACH-style length attacks.
+
+Static files are already served pre-compressed by WhiteNoise, which sits
+above this middleware and never reaches it.
+"""
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+def accepted_encodings(header):
+    """
+    Parse Accept-Encoding into {coding: q}, dropping q=0 entries.
+    """
+    encodings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            encodings[coding] = q
+    return encodings
+
+
+def is_compressible(response):
+    """
+    True if the response's media type is listed in CONTENT_TYPES.
+    """
+    media_type = response.get('Content-Type', '').partition(';')[0].strip().lower()
+    return media_type in settings.RESPONSE_COMPRESSION['CONTENT_TYPES']
+
+
+def choose_encoding(header):
+    """
+    Pick 'br' or 'gzip' for the request, or None. Brotli wins ties.
+    """
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get('*', 0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0
+    for coding in candidates:
+        q = encodings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class Compressor:
+    """
+    Incremental compressor: feed chunks, each call returns what can be sent.
+    """
+
+    def __init__(self, encoding):
+        config = settings.RESPONSE_COMPRESSION
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=config['BROTLI_QUALITY'])
+        else:
+            # wbits=31: gzip container
+            self.compressor = zlib.compressobj(config['GZIP_LEVEL'], zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self.compressor.process(data)
+        return self.compressor.compress(data)
+
+    def flush(self):
+        """
+        Emit everything buffered so far, keeping the stream open.
+        """
+        if self.encoding == 'br':
+            return self.compressor.flush()
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush(zlib.Z_FINISH)
+
+    def chunk(self, data):
+        """
+        Compress a streamed chunk and flush it so clients see it right away.
+        """
+        if not data:
+            return b''
+        return self.compress(data) + self.flush()
+
+
+def compress_bytes(data, encoding):
+    compressor = Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compressed_body(content, encoding):
+    """
+    Compress `content`, reusing the result for identical large bodies
+    (e.g. cached shared-session payloads requested over and over).
+    """
+    config = settings.RESPONSE_COMPRESSION
+    if len(content) < config['CACHE_MIN_SIZE']:
+        return compress_bytes(content, encoding)
+
+    digest = hashlib.blake2b(content, digest_size=20).hexdigest()
+    key = f"compressed:{encoding}:{digest}"
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress_bytes(content, encoding)
+        cache.set(key, compressed, config['CACHE_TIMEOUT'])
+    return compressed
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with the client's preferred Accept-Encoding
+    (Brotli, then gzip), above RESPONSE_COMPRESSION['MIN_SIZE'] bytes.
+    Streaming responses are compressed chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.RESPONSE_COMPRESSION['MIN_SIZE']
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(response, encoding)
+            # Compressed size is unknown until the stream ends
+            del response.headers['Content-Length']
+        else:
+            content = compressed_body(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # A strong ETag must not match a different representation
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress_stream(self, response, encoding):
+        # Bind now: streaming_content is replaced with the wrapper below
+        content = response.streaming_content
+        compressor = Compressor(encoding)
+
+        if response.is_async:
+            async def stream():
+                async for chunk in content:
+                    yield compressor.chunk(chunk)
+                yield compressor.finish()
+        else:
+            def stream():
+                for chunk in content:
+                    yield compressor.chunk(chunk)
+                yield compressor.finish()
+        return stream()
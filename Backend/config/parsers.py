@@ -0,0 +1,42 @@
+"""
+Request parsers matching config/renderers.py.
+"""
+import io
+import re
+
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+# orjson reads integers over 64 bits as lossy floats; bodies that might
+# hold one (any run of 19+ digits) go to DRF's parser instead
+_LONG_DIGITS = re.compile(rb'\d{19}')
+
+
+class ORJSONParser(BaseParser):
+    """
+    orjson for the common case; DRF's JSONParser for bodies orjson would
+    read differently (long integers) or rejects, so results and error
+    messages match DRF's.
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read()
+        if not _LONG_DIGITS.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return JSONParser().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.metrics.MetricsMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,19 +75,32 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
+    # orjson for JSON; MessagePack when the client sends/accepts application/msgpack
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.ORJSONRenderer',
+        'config.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.parsers.ORJSONParser',
+        'config.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'apps.authentication.throttling.SlidingWindowAnonRateThrottle',
+        'apps.authentication.throttling.SlidingWindowUserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/day',
-        'user': '1000/day'
+        'anon': os.getenv('ANON_THROTTLE_RATE', '100/day'),
+        'user': os.getenv('USER_THROTTLE_RATE', '1000/day'),
+        'simulation_batch': os.getenv('SIMULATION_BATCH_THROTTLE_RATE', '20000/day')
     }
 }
 
@@ -97,6 +113,14 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'authentication.User'
 
+# Users resolved by CachedJWTAuthentication (dropped on user save/delete)
+AUTH_USER_CACHE = {
+    # Needs a cache shared by all workers (Redis): with per-process LocMem a
+    # save on one worker can't drop the copies held by the others
+    'ENABLED': os.getenv('AUTH_USER_CACHE_ENABLED', 'True' if os.getenv('REDIS_URL') else 'False') == 'True',
+    'TIMEOUT': int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60')),
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -119,18 +143,128 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connection handling for PostgreSQL. With DATABASE_POOL enabled Django keeps
+# a psycopg pool per worker (CONN_MAX_AGE must then be 0); otherwise
+# DATABASE_CONN_MAX_AGE controls persistent connections (0 = per request).
+DATABASE_POOL = {
+    'ENABLED': os.getenv('DATABASE_POOL', 'False') == 'True',
+    'MIN_SIZE': int(os.getenv('DATABASE_POOL_MIN_SIZE', '2')),
+    'MAX_SIZE': int(os.getenv('DATABASE_POOL_MAX_SIZE', '10')),
+    # Seconds a request waits for a free connection before failing
+    'TIMEOUT': float(os.getenv('DATABASE_POOL_TIMEOUT', '10')),
+    # Seconds an idle connection above MIN_SIZE is kept open
+    'MAX_IDLE': float(os.getenv('DATABASE_POOL_MAX_IDLE', '300')),
+    # Seconds after which a connection is replaced regardless of use
+    'MAX_LIFETIME': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', '3600')),
+}
+DATABASE_CONN_MAX_AGE = int(os.getenv('DATABASE_CONN_MAX_AGE', '0'))
+
+
+def configure_database(config):
+    """Apply PostgreSQL-specific options and pooling to a DATABASES entry."""
+    if config.get('ENGINE') != 'django.db.backends.postgresql':
+        return config
+
+    config['OPTIONS'] = {
+        'connect_timeout': 10,
+    }
+    if DATABASE_POOL['ENABLED']:
+        # Connections are verified on checkout via CONN_HEALTH_CHECKS
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': DATABASE_POOL['MIN_SIZE'],
+            'max_size': DATABASE_POOL['MAX_SIZE'],
+            'timeout': DATABASE_POOL['TIMEOUT'],
+            'max_idle': DATABASE_POOL['MAX_IDLE'],
+            'max_lifetime': DATABASE_POOL['MAX_LIFETIME'],
+        }
+    return config
+
+
 DATABASES = {
-        'default': dj_database_url.config(
+        'default': configure_database(dj_database_url.config(
             default=os.getenv('DATABASE_URL'),
-            conn_max_age=0,  # Don't persist connections in serverless
+            conn_max_age=DATABASE_CONN_MAX_AGE,
             conn_health_checks=True,
-        )
+        ))
     }
-# Add PostgreSQL-specific options
-DATABASES['default']['OPTIONS'] = {
-        'connect_timeout': 10,
+
+# Read replicas: comma-separated DATABASE_REPLICA_URLS, e.g.
+# "postgres://ro1/db,postgres://ro2/db" or "sqlite:///replica.sqlite3" locally.
+# Only actions that opt in read from them (see config/db_routers.py).
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = configure_database(dj_database_url.parse(
+        url.strip(),
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+    ))
+    # Tests run against the primary's test database
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['config.db_routers.ReplicaRouter']
+
+
+# Cache
+# Shared across workers when REDIS_URL is set; per-process otherwise
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
 
+# Throttle counters must be shared by all workers: Redis when available,
+# otherwise the throttle_counters table ('cache' + LocMem is per-process,
+# only suitable for a single worker)
+THROTTLE = {
+    'STORE': os.getenv('THROTTLE_STORE', 'cache' if os.getenv('REDIS_URL') else 'database'),
+    'CACHE': 'default',
+}
+
+# API response compression (config.middleware.CompressionMiddleware)
+RESPONSE_COMPRESSION = {
+    # Smaller bodies go out as-is
+    'MIN_SIZE': int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', '1024')),
+    'GZIP_LEVEL': int(os.getenv('RESPONSE_COMPRESSION_GZIP_LEVEL', '6')),
+    'BROTLI_QUALITY': int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', '5')),
+    # API media types only: HTML carries CSRF tokens (BREACH)
+    'CONTENT_TYPES': ['application/json', 'application/msgpack', 'application/x-ndjson'],
+    # Bodies at least this large are compressed once and reused while cached
+    'CACHE_MIN_SIZE': int(os.getenv('RESPONSE_COMPRESSION_CACHE_MIN_SIZE', '16384')),
+    'CACHE_TIMEOUT': int(os.getenv('RESPONSE_COMPRESSION_CACHE_TIMEOUT', '300')),
+}
+
+# Per-request metrics in Prometheus format at /metrics/ (config.metrics)
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True') == 'True',
+    # Scrapes must send `Authorization: Bearer <token>`; unset, /metrics/
+    # is only served with DEBUG on
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+# Public shared-session payloads (GET /simulations/sessions/{uuid}/shared/)
+SHARED_SESSION_CACHE = {
+    # Server-side cache lifetime; entries are also invalidated on save
+    'TIMEOUT': int(os.getenv('SHARED_SESSION_CACHE_TIMEOUT', '300')),
+    # Cache-Control for anonymous responses (browsers / CDN)
+    'MAX_AGE': int(os.getenv('SHARED_SESSION_MAX_AGE', '60')),
+    'S_MAXAGE': int(os.getenv('SHARED_SESSION_S_MAXAGE', '300')),
+    'STALE_WHILE_REVALIDATE': int(os.getenv('SHARED_SESSION_STALE_WHILE_REVALIDATE', '60')),
+}
+
+# Serve hot read endpoints from async views (requires running under ASGI)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -184,3 +318,107 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Mailjet Email Configuration
 MAILJET_API_KEY = os.getenv('MAILJET_API_KEY')
 MAILJET_API_SECRET = os.getenv('MAILJET_API_SECRET')
+
+# Outgoing email queue (delivered by `python manage.py send_queued_emails`)
+EMAIL_OUTBOX = {
+    # Dotted path to an EmailTransport: MailjetTransport, ConsoleTransport or FileTransport
+    'TRANSPORT': os.getenv(
+        'EMAIL_TRANSPORT',
+        'apps.authentication.services.MailjetTransport' if MAILJET_API_KEY
+        else 'apps.authentication.services.ConsoleTransport'
+    ),
+    'FILE_PATH': os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails.jsonl')),
+    'SENDER_EMAIL': os.getenv('EMAIL_SENDER', 'theshahidkhan.2004@gmail.com'),
+    'SENDER_NAME': os.getenv('EMAIL_SENDER_NAME', 'TOC Simulator'),
+    # Messages claimed and sent per batch (Mailjet accepts up to 50 per call)
+    'BATCH_SIZE': int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '50')),
+    'MAX_ATTEMPTS': int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6')),
+    # Retry n waits BACKOFF_BASE * 2**(n-1) seconds, capped at BACKOFF_MAX.
+    # The defaults spend under 8 minutes on retries, inside the 10-minute
+    # verification code lifetime; messages past their expires_at are dropped
+    'BACKOFF_BASE': int(os.getenv('EMAIL_OUTBOX_BACKOFF_BASE', '15')),
+    'BACKOFF_MAX': int(os.getenv('EMAIL_OUTBOX_BACKOFF_MAX', '240')),
+    # A claimed batch becomes available again if the worker dies mid-send
+    'LEASE_SECONDS': int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', '300')),
+    'POLL_INTERVAL': float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', '5')),
+}
+
+# Simulation run retention (enforced by `python manage.py prune_simulation_runs`)
+SIMULATION_RUN_RETENTION = {
+    # Full runs (with result_steps) kept per session; older ones are archived
+    'KEEP_LATEST': int(os.getenv('SIMULATION_RUNS_KEEP_LATEST', '50')),
+    # Rows archived/deleted per transaction
+    'BATCH_SIZE': int(os.getenv('SIMULATION_RUNS_PRUNE_BATCH_SIZE', '1000')),
+    # 'compress' keeps a zlib-compressed trace in the archive, 'drop' discards it
+    'ARCHIVE_TRACES': os.getenv('SIMULATION_RUNS_ARCHIVE_TRACES', 'compress'),
+    # PostgreSQL only: monthly partitions of simulation_runs to create ahead
+    'PARTITION_MONTHS_AHEAD': int(os.getenv('SIMULATION_RUNS_PARTITION_MONTHS_AHEAD', '3')),
+}
+
+# Server-side auto-layout (POST /sessions/{id}/layout/)
+AUTOMATA_LAYOUT = {
+    'MAX_STATES': int(os.getenv('AUTOMATA_LAYOUT_MAX_STATES', '5000')),
+    # Force-directed steps when the request doesn't say
+    'ITERATIONS': int(os.getenv('AUTOMATA_LAYOUT_ITERATIONS', '100')),
+    # Most steps a request may ask for; larger automata get fewer, so that
+    # states x steps stays within MAX_STATE_ITERATIONS
+    'MAX_ITERATIONS': int(os.getenv('AUTOMATA_LAYOUT_MAX_ITERATIONS', '1000')),
+    'MAX_STATE_ITERATIONS': int(os.getenv('AUTOMATA_LAYOUT_MAX_STATE_ITERATIONS', '500000')),
+    # Above this many states, repulsion uses the grid approximation
+    'EXACT_REPULSION_LIMIT': int(os.getenv('AUTOMATA_LAYOUT_EXACT_REPULSION_LIMIT', '800')),
+}
+
+# automata_data revision history (pruned by `python manage.py prune_session_revisions`)
+SESSION_REVISIONS = {
+    # A full snapshot at least every N versions bounds reconstruction cost
+    'SNAPSHOT_INTERVAL': int(os.getenv('SESSION_REVISIONS_SNAPSHOT_INTERVAL', '20')),
+    # Store a snapshot instead when the delta is larger than this share of the document
+    'MAX_DELTA_RATIO': float(os.getenv('SESSION_REVISIONS_MAX_DELTA_RATIO', '0.5')),
+    # Revisions newer than this, and the latest N per session, survive pruning
+    'KEEP_DAYS': int(os.getenv('SESSION_REVISIONS_KEEP_DAYS', '30')),
+    'KEEP_LATEST': int(os.getenv('SESSION_REVISIONS_KEEP_LATEST', '50')),
+}
+
+# Bulk export/import of sessions and runs (/sessions/export/, /sessions/import/)
+SESSION_TRANSFER = {
+    # Rows fetched per query on export, validated and inserted per batch on import
+    'CHUNK_SIZE': int(os.getenv('SESSION_TRANSFER_CHUNK_SIZE', '500')),
+}
+
+# Server-side simulation engine (/sessions/{id}/simulate/)
+SIMULATION_ENGINE = {
+    # Compiled sessions kept per worker process, patched in place on save
+    'CACHE_SIZE': int(os.getenv('SIMULATION_ENGINE_CACHE_SIZE', '64')),
+    # Inputs per simulate request, and characters per input
+    'MAX_INPUTS': int(os.getenv('SIMULATION_ENGINE_MAX_INPUTS', '100')),
+    'MAX_INPUT_LENGTH': int(os.getenv('SIMULATION_ENGINE_MAX_INPUT_LENGTH', '10000')),
+    # Turing machine search caps; a run hitting one is reported undecided
+    'TM_MAX_STEPS': int(os.getenv('SIMULATION_ENGINE_TM_MAX_STEPS', '1000')),
+    'TM_MAX_CONFIGURATIONS': int(os.getenv('SIMULATION_ENGINE_TM_MAX_CONFIGURATIONS', '200000')),
+    'TM_MAX_FRONTIER': int(os.getenv('SIMULATION_ENGINE_TM_MAX_FRONTIER', '50000')),
+    # Estimated bytes held by visited configurations, per run
+    'TM_MEMORY_LIMIT': int(os.getenv('SIMULATION_ENGINE_TM_MEMORY_LIMIT', str(64 * 1024 * 1024))),
+    # Tape cells either side of the head per trace step, once full tapes
+    # would push a run past TM_MEMORY_LIMIT
+    'TM_TRACE_WINDOW': int(os.getenv('SIMULATION_ENGINE_TM_TRACE_WINDOW', '32')),
+}
+
+# Bulk grading against a reference session (/sessions/{id}/grade/, `grade_sessions`)
+GRADING = {
+    # Worker processes per grading run
+    'WORKERS': int(os.getenv('GRADING_WORKERS', str(min(os.cpu_count() or 1, 8)))),
+    # Submissions handed to a worker at a time
+    'CHUNK_SIZE': int(os.getenv('GRADING_CHUNK_SIZE', '8')),
+    # 'spawn' keeps workers clear of the web process's threads and connections
+    'START_METHOD': os.getenv('GRADING_START_METHOD', 'spawn'),
+    'MAX_SUBMISSIONS': int(os.getenv('GRADING_MAX_SUBMISSIONS', '1000')),
+    'MAX_TESTS': int(os.getenv('GRADING_MAX_TESTS', '500')),
+    # Product states explored per equivalence check before giving up
+    'MAX_PRODUCT_STATES': int(os.getenv('GRADING_MAX_PRODUCT_STATES', '100000')),
+}
+
+# Session search (PostgreSQL full-text + trigram; plain icontains elsewhere)
+SESSION_SEARCH = {
+    # Text search configuration used for the tsvector and queries
+    'CONFIG': os.getenv('SESSION_SEARCH_CONFIG', 'english'),
+}
@@ -14,16 +14,78 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.db import DatabaseError, connections
+from django.utils.crypto import constant_time_compare
+import logging
+
+from config import metrics
+
+logger = logging.getLogger(__name__)
+
+def database_status(alias):
+    """Ping a database over a (pooled, if enabled) connection and report pool stats"""
+    connection = connections[alias]
+    report = {"vendor": connection.vendor}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        report["status"] = "ok"
+    except DatabaseError as e:
+        report["status"] = "unavailable"
+        logger.warning(f"Health check failed for database '{alias}': {e}")
+
+    pool = getattr(connection, "pool", None)
+    if pool is not None:
+        report["pool"] = pool.get_stats()
+    return report
+
+def has_metrics_token(request):
+    """True if the request carries `Authorization: Bearer <METRICS_TOKEN>`"""
+    token = settings.METRICS['TOKEN']
+    return bool(token) and constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f"Bearer {token}"
+    )
 
 def health_check(request):
-    """Health check endpoint for Render"""
-    return JsonResponse({"status": "healthy", "service": "TOC-Simulator API"})
+    """
+    Health check endpoint for Render: 503 when any database is down.
+    Per-database details (pool stats, replicas) only for the metrics
+    token, staff or DEBUG.
+    """
+    databases = {alias: database_status(alias) for alias in connections}
+    healthy = all(db["status"] == "ok" for db in databases.values())
+    body = {
+        "status": "healthy" if healthy else "degraded",
+        "service": "TOC-Simulator API",
+    }
+    user = getattr(request, 'user', None)
+    if settings.DEBUG or has_metrics_token(request) or (user is not None and user.is_staff):
+        body["databases"] = databases
+    return JsonResponse(body, status=200 if healthy else 503)
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (see config/metrics.py)"""
+    config = settings.METRICS
+    if not config['ENABLED']:
+        return JsonResponse({"error": "Metrics are disabled"}, status=404)
+    if not config['TOKEN']:
+        # Open scrapes only in development
+        if not settings.DEBUG:
+            return JsonResponse({"error": "Metrics require METRICS_TOKEN"}, status=404)
+    elif not has_metrics_token(request):
+        return JsonResponse({"error": "Invalid metrics token"}, status=401)
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
 
 urlpatterns = [
     path('health/', health_check, name='health_check'),
+    path('metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('auth/', include('apps.authentication.urls')),
     path('simulations/', include('apps.simulations.urls')),